@@ -11,12 +11,15 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 from datetime import timedelta
 import os
-from decouple import config
+from decouple import AutoConfig
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Look for .env next to manage.py only, instead of walking up from the caller
+config = AutoConfig(search_path=BASE_DIR)
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -29,6 +32,12 @@ DEBUG = config('DEBUG', default=False, cast=bool)
 
 ALLOWED_HOSTS = config('ALLOWED_HOSTS', cast=lambda v: [s.strip() for s in v.split(',')])
 
+# debug_toolbar and drf_spectacular are only loaded when this is on; production
+# workers serve the OpenAPI schema from the file generated at build time:
+#   DEV_TOOLS=True python manage.py spectacular --file openapi-schema.yml
+DEV_TOOLS = config('DEV_TOOLS', default=DEBUG, cast=bool)
+OPENAPI_SCHEMA_FILE = config('OPENAPI_SCHEMA_FILE', default=str(BASE_DIR / 'openapi-schema.yml'))
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -38,17 +47,17 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'core_api.apps.CoreApiConfig',
     'rest_framework',
     'rest_framework_simplejwt',
     'corsheaders',
     'django_filters',
-    'debug_toolbar',
-    'drf_spectacular'
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core_api.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -56,10 +65,13 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware'
 ]
 INTERNAL_IPS = ['127.0.0.1']
 
+if DEV_TOOLS:
+    INSTALLED_APPS += ['debug_toolbar', 'drf_spectacular']
+    MIDDLEWARE += ['debug_toolbar.middleware.DebugToolbarMiddleware']
+
 
 LOGGING = {
     'version': 1,
@@ -114,6 +126,22 @@ DATABASES = {
     }
 }
 
+# Password hashing
+# Same algorithms as Django's default list, with PBKDF2 taking its cost from
+# PASSWORD_HASH_ITERATIONS so it can be tuned per environment.
+PASSWORD_HASHERS = [
+    'core_api.hashers.ConfigurablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+PASSWORD_HASH_ITERATIONS = config('PASSWORD_HASH_ITERATIONS', default=1_000_000, cast=int)
+# Concurrent registration hashes are bounded (see core_api/registration.py)
+PASSWORD_HASH_WORKERS = config('PASSWORD_HASH_WORKERS', default=2, cast=int)
+PASSWORD_HASH_QUEUE_SIZE = 32
+PASSWORD_HASH_WAIT = 5  # seconds to wait for a slot before answering 503
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -187,8 +215,7 @@ REST_FRAMEWORK = {'DEFAULT_AUTHENTICATION_CLASSES': (
 ), 'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.CursorPagination', 'PAGE_SIZE': 10,
     'DEFAULT_FILTER_BACKENDS': (
         'django_filters.rest_framework.DjangoFilterBackend',
-    ), 'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema'
-    ,'DEFAULT_THROTTLE_CLASSES': [
+    ), 'DEFAULT_THROTTLE_CLASSES': [
         'rest_framework.throttling.UserRateThrottle',
         'rest_framework.throttling.AnonRateThrottle',
     ],
@@ -197,6 +224,9 @@ REST_FRAMEWORK = {'DEFAULT_AUTHENTICATION_CLASSES': (
         'anon': '100/day',
     }
 }
+if DEV_TOOLS:
+    # drf_spectacular isn't installed in production images
+    REST_FRAMEWORK['DEFAULT_SCHEMA_CLASS'] = 'drf_spectacular.openapi.AutoSchema'
 
 # Simple JWT Configuration
 SIMPLE_JWT = {
@@ -240,6 +270,18 @@ MEDIA_URL = '/media/'
 # Option 1: Using pathlib (if BASE_DIR is a Path object)
 MEDIA_ROOT = BASE_DIR / 'media' # Or just 'media' if you prefer
 
+# Uploads are content-addressed (see core_api/storage.py)
+STORAGES = {
+    'default': {'BACKEND': 'core_api.storage.ContentAddressedStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+# How MediaView hands out files: 'django' streams them itself (development),
+# 'x-accel' answers with X-Accel-Redirect to MEDIA_ACCEL_PREFIX (nginx
+# `internal` location aliased to MEDIA_ROOT), 'x-sendfile' with the file path.
+MEDIA_SERVE_MODE = config('MEDIA_SERVE_MODE', default='django' if DEBUG else 'x-accel')
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+
 # Option 2: Using os.path.join (traditional)
 # MEDIA_ROOT = os.path.join(BASE_DIR, 'mediafiles') # Or just 'media'
 
@@ -247,9 +289,132 @@ MEDIA_ROOT = BASE_DIR / 'media' # Or just 'media' if you prefer
 # or Django will try to create it if it has permissions.
 # It's good practice to create it manually: mkdir anime_market_backend/mediafiles
 
+# Without REDIS_URL the default cache is per-process; features that need one
+# cache shared by all workers (SHARED_CACHE) default to off.
+REDIS_URL = config('REDIS_URL', default='')
+SHARED_CACHE = bool(REDIS_URL)
+
 CACHES = {
     'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    } if SHARED_CACHE else {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'unique-snowflake',
-    }
-}
\ No newline at end of file
+    },
+    # Per-user recommendation rankings, bounded so memory stays flat
+    'recommendations': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'recommendations',
+        'TIMEOUT': 60 * 60,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+}
+
+# Wishlist status events (see core_api/events.py)
+EVENT_BROKER = 'core_api.events.LocalBroker'
+EVENT_STREAM_HEARTBEAT = 15  # seconds between keep-alive comments
+
+# Trade matching (see core_api/matching.py)
+TRADE_MATCH_LIMIT = 20
+
+# Recommendations (see core_api/recommendations.py)
+RECOMMENDATIONS = {
+    'NEIGHBOURS': 50,  # similar items kept per item by build_recommendations
+    'LIMIT': 20,
+    'COOCCURRENCE_WEIGHT': 1.0,
+    'GENRE_WEIGHT': 0.5,
+}
+
+# Serve list endpoints through core_api.fastpath (values() + row serializers)
+FAST_LIST_SERIALIZATION = True
+
+# Response compression (see core_api/middleware.py)
+COMPRESSION_MIN_SIZE = 1024  # bytes, smaller bodies aren't worth compressing
+COMPRESSION_BROTLI_QUALITY = 5
+
+# Internal batch API (see core_api/authentication.py)
+INTERNAL_API_TOKENS = config('INTERNAL_API_TOKENS', default='', cast=lambda v: [s.strip() for s in v.split(',') if s.strip()])
+INTERNAL_API_CLIENT_DNS = config('INTERNAL_API_CLIENT_DNS', default='', cast=lambda v: [s.strip() for s in v.split(';') if s.strip()])
+INTERNAL_BATCH_MAX_SIZE = 100
+
+# Background jobs (see core_api/jobs.py). Eager runs jobs in-process after
+# commit, for local development; deployments run `manage.py run_jobs` workers.
+JOBS_EAGER = config('JOBS_EAGER', default=DEBUG, cast=bool)
+JOBS_BACKOFF_BASE = 5
+JOBS_BACKOFF_MAX = 3600
+JOBS_LOCK_TIMEOUT = 600
+
+# Precomputed landing feed for GET /api/items/ (see core_api/feed.py)
+LANDING_FEED = {
+    'ENABLED': config('LANDING_FEED_ENABLED', default=SHARED_CACHE, cast=bool),
+    'CACHE': 'default',  # must be shared between processes
+    'PAGES': 3,
+    'TTL': 300,
+    'MAX_STALE': 3600,
+}
+
+# Review-graph trust scores (see core_api/trust.py)
+TRUST = {
+    'DAMPING': 0.15,  # teleport share, also caps what a closed review ring can gain
+    'TOLERANCE': 1e-8,
+    'MAX_ITERATIONS': 100,
+    'INCREMENTAL_ITERATIONS': 50,  # push rounds (two small queries each) per incremental refresh
+    'INCREMENTAL_TOLERANCE': 1e-4,  # residuals below this stay unpropagated
+    'WRITE_THRESHOLD': 1e-3,  # smaller score changes aren't written
+    'REFRESH_DELAY': 60,  # seconds, batches review bursts into one refresh
+}
+
+# Near-duplicate listing images (see core_api/imagehash.py)
+IMAGE_HASH = {
+    'DUPLICATES': 'flag',  # or 'reject': refuse the owner's near-identical re-uploads
+    'DUPLICATE_DISTANCE': 6,  # Hamming bits out of 64
+    'SIMILAR_DISTANCE': 10,
+    'SIMILAR_LIMIT': 20,
+}
+
+# Aggregated item pages, GET /api/items/pages/?ids= (see core_api/pages.py)
+ITEM_PAGE_MAX_BATCH = 50
+
+# Request coalescing for hot item reads (see core_api/singleflight.py)
+SINGLE_FLIGHT = {
+    # the generation in every key lives in the cache, so it has to be shared
+    'ENABLED': config('SINGLE_FLIGHT', default=SHARED_CACHE, cast=bool),
+    'CACHE': 'default',  # Redis when REDIS_URL is set, per-process locmem otherwise
+    'TTL': 30,
+    'BETA': 1.0,  # XFetch aggressiveness, >1 refreshes earlier
+    'LOCK_TIMEOUT': 10,
+    'WAIT': 5,  # seconds a follower waits for the leader before computing itself
+    'POLL_INTERVAL': 0.05,
+}
+
+# Item view counters and ?ordering=trending (see core_api/viewcounts.py)
+TRENDING = {
+    'HALF_LIFE': 24 * 60 * 60,  # seconds for a view's weight to halve
+    'EPOCH': 1704067200,  # 2024-01-01 UTC, forward decay landmark; never change it
+    'FLUSH_INTERVAL': 10,  # seconds between batched writes per worker
+    'FLUSH_MAX_ITEMS': 1000,
+    'LIMIT': 50,  # items in /api/items/trending/
+}
+
+# Header-triggered request profiler for staff (see core_api/profiling.py)
+PROFILING = {
+    'ENABLED': config('PROFILING', default=False, cast=bool),
+    'HEADER': 'HTTP_X_PROFILE',
+    'SAMPLE_RATE': 1.0,  # share of triggering requests that get sampled
+    'INTERVAL': 0.005,  # seconds between stack samples
+    'MAX_STACKS': 2000,  # heaviest stacks returned per route
+}
+if PROFILING['ENABLED']:
+    # after AuthenticationMiddleware, so session staff are recognised
+    MIDDLEWARE += ['core_api.profiling.SamplingProfilerMiddleware']
+
+# Optional monthly partitioning on created_at (see core_api/partitioning.py)
+PARTITIONING = {
+    # TradeItem isn't supported, too many tables hold foreign keys to it
+    'MODELS': ['core_api.Review'],
+    'MONTHS_AHEAD': 3,
+    'RETAIN_MONTHS': None,  # months kept attached by `partition_tables maintain --detach`
+}
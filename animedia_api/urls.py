@@ -16,24 +16,35 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
-from django.conf.urls.static import static
 from django.conf import settings
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
+from core_api.profiling import profiling_view
+from core_api.views import MediaView, OpenAPISchemaFileView
 
 
 urlpatterns = [
+    # folded stacks from the request profiler (see core_api/profiling.py)
+    path('admin/profiling/', admin.site.admin_view(profiling_view), name='admin-profiling'),
     path('admin/', admin.site.urls),
     path('api/', include('core_api.urls')),
 ]
+
+# Dev tools generate the schema per request; production serves the build artifact
+if settings.DEV_TOOLS:
+    from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
+    urlpatterns += [
+        path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
+        path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
+    ]
+else:
+    urlpatterns += [
+        path('api/schema/', OpenAPISchemaFileView.as_view(), name='schema'),
+    ]
+
+# Media goes through MediaView, which defers to the web server outside development
 urlpatterns += [
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
-    path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
+    path(settings.MEDIA_URL.lstrip('/') + '<path:name>', MediaView.as_view(), name='media'),
 ]
 
-# Serve media files during development
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
-
-if settings.DEBUG:
+if settings.DEV_TOOLS:
     import debug_toolbar
     urlpatterns += [path('__debug__/', include(debug_toolbar.urls))]
@@ -1,8 +1,15 @@
 from django.contrib import admin
 
 # Register your models here.
-from django.contrib import admin
-from .models import UserProfile, TradeItem, Review, Wishlist
+from django.contrib import admin, messages
+from django.contrib.auth.models import User
+from django.core.paginator import Paginator
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.functional import cached_property
+from . import events, feed, matching
+from .models import UserProfile, TradeItem, Review, Wishlist, Job, TradeOffer, ImageHash
 
 """
 Admin configuration for core_api models
@@ -11,12 +18,112 @@ Admin configuration for core_api models
     and the list display , ways to display this sa UI 
     functions also help in viewing the fields
 
+Changelists are meant to stay fast on tables with millions of rows: no
+per-row joins (list_select_related or snapshot columns), no full counts of
+the unfiltered list (EstimatedCountPaginator, show_full_result_count =
+False), no list filters that enumerate users, and search only on
+trigram-indexed columns (migrations 0010 and 0016).
 """
 
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Uses the planner's row estimate instead of COUNT(*) on PostgreSQL for
+    the unfiltered list once the estimate is large. Filtered and searched
+    lists, where estimates can be far off, and small tables get an exact
+    count.
+    """
+    exact_below = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql' and not queryset.query.where:
+            compiler = queryset.query.get_compiler(using=queryset.db)
+            sql, params = compiler.as_sql()
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+                estimate = int(cursor.fetchone()[0][0]['Plan']['Plan Rows'])
+            if estimate >= self.exact_below:
+                return estimate
+        return super().count
+
+
+class FastChangeListMixin:
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class InputFilter(admin.ListFilter):
+    """
+    Free-text list filter; unlike a related-field filter it doesn't render
+    an entry per row of the related table.
+    """
+    parameter_name = None
+    lookup = None
+    placeholder = ''
+    template = 'admin/core_api/input_filter.html'
+
+    def __init__(self, request, params, model, model_admin):
+        super().__init__(request, params, model, model_admin)
+        value = params.pop(self.parameter_name, '')
+        self.value = (value[-1] if isinstance(value, list) else value).strip()
+
+    def has_output(self):
+        return True
+
+    def expected_parameters(self):
+        return [self.parameter_name]
+
+    def suggestions(self):
+        return []
+
+    def choices(self, changelist):
+        other_params = [
+            (name, value)
+            for name, values in changelist.get_filters_params().items() if name != self.parameter_name
+            for value in (values if isinstance(values, list) else [values])
+        ]
+        yield {
+            'parameter_name': self.parameter_name,
+            'value': self.value,
+            'placeholder': self.placeholder,
+            'other_params': other_params,
+            'suggestions': self.suggestions(),
+        }
+
+    def queryset(self, request, queryset):
+        if self.value:
+            return queryset.filter(**{self.lookup: self.value})
+        return queryset
+
+
+class OwnerFilter(InputFilter):
+    """
+    Exact owner username (indexed snapshot column), suggesting up to ten
+    usernames starting with what was typed.
+    """
+    title = 'owner'
+    parameter_name = 'owner'
+    lookup = 'owner_username'
+    placeholder = 'username'
+
+    def suggestions(self):
+        if not self.value:
+            return []
+        return list(
+            User.objects.filter(username__startswith=self.value)
+            .order_by('username').values_list('username', flat=True)[:10]
+        )
+
+
 @admin.register(UserProfile)
-class UserProfileAdmin(admin.ModelAdmin):
+class UserProfileAdmin(FastChangeListMixin, admin.ModelAdmin):
     list_display = ('user', 'bio', 'created_at', 'updated_at')
+    list_select_related = ('user',)
     search_fields = ('user__username', 'bio')
+    autocomplete_fields = ('user',)
 
     def bio_summary(self, obj):
         return obj.bio[:50] + '...' if len(obj.bio) > 50 else obj.bio
@@ -24,25 +131,98 @@ class UserProfileAdmin(admin.ModelAdmin):
 
 
 @admin.register(TradeItem)
-class TradeItemAdmin(admin.ModelAdmin):
-    list_display = ('title', 'owner', 'status', 'created_at', 'updated_at')
-    list_filter = ('status', 'owner', 'created_at')
-    search_fields = ('title', 'description', 'owner__username', 'interests')
+class TradeItemAdmin(FastChangeListMixin, admin.ModelAdmin):
+    list_display = ('title', 'owner_username', 'status', 'created_at', 'updated_at')
+    list_filter = ('status', OwnerFilter, 'created_at')
+    search_fields = ('title', 'description', 'owner_username', 'interests')
+    autocomplete_fields = ('owner',)
+    readonly_fields = ('owner_username', 'owner_avatar', 'owner_rating', 'version')
+    actions = ('mark_available', 'mark_pending', 'mark_traded')
+
+    reindex_limit = 1000
+
+    def set_status(self, request, queryset, status):
+        """
+        One UPDATE for the whole selection. Model signals don't run, so the
+        follow-up work they would do is scheduled here instead.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            previous = dict(
+                queryset.exclude(status=status).select_for_update().order_by('pk').values_list('pk', 'status')
+            )
+            updated = TradeItem.objects.filter(pk__in=previous).update(
+                status=status, version=F('version') + 1, updated_at=now
+            )
+            transaction.on_commit(feed.mark_stale)
+            transaction.on_commit(lambda: self.publish_status_changes(previous, status, now))
+            if len(previous) > self.reindex_limit:
+                matching.rebuild_index_job.enqueue(key='matching:rebuild')
+            elif previous:
+                matching.index_items_job.enqueue(item_ids=list(previous))
+        self.message_user(request, f'{updated} items marked {status}.', messages.SUCCESS)
+
+    def publish_status_changes(self, previous, status, updated_at):
+        for item_id, previous_status in previous.items():
+            events.publish_status_change(item_id, status, previous_status, updated_at)
+
+    @admin.action(description='Mark selected items available')
+    def mark_available(self, request, queryset):
+        self.set_status(request, queryset, 'available')
+
+    @admin.action(description='Mark selected items pending')
+    def mark_pending(self, request, queryset):
+        self.set_status(request, queryset, 'pending')
+
+    @admin.action(description='Mark selected items traded')
+    def mark_traded(self, request, queryset):
+        self.set_status(request, queryset, 'traded')
+
 
 @admin.register(Review)
-class ReviewAdmin(admin.ModelAdmin):
+class ReviewAdmin(FastChangeListMixin, admin.ModelAdmin):
     list_display = ('reviewer', 'reviewee', 'rating', 'created_at')
     list_filter = ('rating', 'created_at')
+    list_select_related = ('reviewer', 'reviewee')
     search_fields = ('reviewer__username', 'reviewee__username', 'comment')
+    autocomplete_fields = ('reviewer', 'reviewee')
 
 
 @admin.register(Wishlist)
-class WishlistAdmin(admin.ModelAdmin):
-    list_display = ('user', 'item', 'added_at')
-    search_fields = ('user__username', 'item_name')
+class WishlistAdmin(FastChangeListMixin, admin.ModelAdmin):
+    list_display = ('user', 'item_name', 'added_at')
+    list_select_related = ('user', 'item')
+    search_fields = ('user__username', 'item__title')
     list_filter = ('added_at',)
+    autocomplete_fields = ('user', 'item')
 
     def item_name(self, obj):
-        return obj.item_name
+        return obj.item.title
     item_name.short_description = 'Item Name'
 
+
+@admin.register(TradeOffer)
+class TradeOfferAdmin(FastChangeListMixin, admin.ModelAdmin):
+    list_display = ('id', 'sender', 'recipient', 'offered_item', 'requested_item', 'status', 'created_at')
+    list_filter = ('status', 'created_at')
+    list_select_related = ('sender', 'recipient', 'offered_item', 'requested_item')
+    search_fields = ('sender__username', 'recipient__username')
+    autocomplete_fields = ('sender', 'recipient', 'offered_item', 'requested_item', 'parent')
+
+
+@admin.register(Job)
+class JobAdmin(FastChangeListMixin, admin.ModelAdmin):
+    list_display = ('name', 'status', 'attempts', 'run_at', 'updated_at')
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'idempotency_key')
+    readonly_fields = ('created_at', 'updated_at')
+
+
+@admin.register(ImageHash)
+class ImageHashAdmin(FastChangeListMixin, admin.ModelAdmin):
+    list_display = ('item', 'duplicate_of', 'image')
+    list_filter = (('duplicate_of', admin.EmptyFieldListFilter),)
+    list_select_related = ('item', 'duplicate_of')
+    search_fields = ('item__title',)
+    autocomplete_fields = ('item', 'duplicate_of')
+    readonly_fields = ('value', 'band_0', 'band_1', 'band_2', 'band_3')
@@ -0,0 +1,52 @@
+import hmac
+
+from django.conf import settings
+from rest_framework import authentication, exceptions
+
+
+class InternalService:
+    """
+    request.user for calls authenticated as one of our own services.
+    """
+    is_authenticated = True
+    is_anonymous = False
+    is_staff = False
+    pk = id = None
+
+    def __init__(self, name):
+        self.name = name
+
+    def __str__(self):
+        return f"internal:{self.name}"
+
+
+class InternalServiceAuthentication(authentication.BaseAuthentication):
+    """
+    Cheap authentication for service-to-service calls, no DB access.
+
+    Either a shared secret in `X-Internal-Token` matching one of
+    INTERNAL_API_TOKENS (several can be configured for rotation), or a client
+    certificate the TLS-terminating proxy verified and reported in
+    `X-SSL-Client-Verify` / `X-SSL-Client-DN`, with the DN listed in
+    INTERNAL_API_CLIENT_DNS. The proxy must strip those headers from
+    outside traffic.
+    """
+    header = 'HTTP_X_INTERNAL_TOKEN'
+
+    def authenticate(self, request):
+        token = request.META.get(self.header)
+        if token:
+            for expected in settings.INTERNAL_API_TOKENS:
+                if hmac.compare_digest(token.encode(), expected.encode()):
+                    return InternalService('token'), None
+            raise exceptions.AuthenticationFailed('Invalid internal token.')
+
+        if request.META.get('HTTP_X_SSL_CLIENT_VERIFY') == 'SUCCESS':
+            dn = request.META.get('HTTP_X_SSL_CLIENT_DN', '')
+            if dn and dn in settings.INTERNAL_API_CLIENT_DNS:
+                return InternalService(dn), None
+            raise exceptions.AuthenticationFailed('Client certificate not allowed.')
+        return None
+
+    def authenticate_header(self, request):
+        return 'Internal-Token'
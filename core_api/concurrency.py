@@ -0,0 +1,161 @@
+"""
+Optimistic locking for models edited through the API.
+
+VersionedModel keeps a `version` column and remembers the values an
+instance was loaded with. Saving an existing row then:
+
+  * writes only the fields that changed (plus version and auto_now fields),
+  * adds `WHERE version = <loaded version>` to the UPDATE and bumps it,
+  * raises VersionConflict (409) when no row matched, i.e. someone else
+    saved in between. Like an IntegrityError it aborts the surrounding
+    atomic block.
+
+VersionedViewMixin exposes the version as an ETag and checks If-Match on
+writes (412 on mismatch), so clients can detect stale edits up front.
+"""
+import copy
+
+from django.db import models
+from rest_framework import permissions, status
+from rest_framework.exceptions import APIException
+
+
+class VersionConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'This object was changed by someone else, reload and try again.'
+    default_code = 'conflict'
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = 'If-Match does not match the current version.'
+    default_code = 'precondition_failed'
+
+
+class VersionedModel(models.Model):
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_loaded_values()
+        return instance
+
+    def _remember_loaded_values(self, fields=None):
+        # deferred fields aren't in __dict__; JSON values are copied so
+        # in-place edits still show up as changes
+        loaded = {
+            field.attname: copy.deepcopy(self.__dict__[field.attname])
+            for field in self._meta.concrete_fields
+            if field.attname in self.__dict__ and (fields is None or {field.name, field.attname} & fields)
+        }
+        if fields is None or getattr(self, '_loaded_values', None) is None:
+            self._loaded_values = loaded
+        else:
+            self._loaded_values.update(loaded)
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using, fields, from_queryset)
+        # only the reloaded fields, other unsaved edits still count as changes
+        self._remember_loaded_values(set(fields) if fields is not None else None)
+
+    def changed_fields(self):
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return None
+        changed = []
+        for field in self._meta.concrete_fields:
+            if field.primary_key or field.attname not in self.__dict__:
+                continue
+            if field.attname not in loaded or getattr(self, field.attname) != loaded[field.attname]:
+                changed.append(field.name)
+        return changed
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._remember_loaded_values()
+
+    def _save_table(self, raw=False, cls=None, force_insert=False, force_update=False, using=None,
+                    update_fields=None):
+        if self._state.adding or raw:
+            return super()._save_table(raw, cls, force_insert, force_update, using, update_fields)
+
+        if update_fields is None:
+            # runs after pre_save, so fields set by signal handlers are included
+            update_fields = self.changed_fields()
+        if update_fields is not None:
+            auto_now = {f.name for f in self._meta.concrete_fields if getattr(f, 'auto_now', False)}
+            update_fields = frozenset(update_fields) | auto_now | {'version'}
+
+        self._expected_version = self.version
+        self.version += 1
+        try:
+            return super()._save_table(raw, cls, force_insert, True, using, update_fields)
+        except VersionConflict:
+            self.version = self._expected_version
+            raise
+        finally:
+            del self._expected_version
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        expected = getattr(self, '_expected_version', None)
+        if expected is not None:
+            base_qs = base_qs.filter(version=expected)
+        updated = super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+        if expected is not None and not updated:
+            raise VersionConflict()
+        return updated
+
+
+def etag_for(instance):
+    version = instance.__dict__.get('version')
+    return f'"{version}"' if version is not None else None
+
+
+def if_match(request):
+    """
+    ETags from the If-Match header, None when absent ('*' matches anything).
+    The W/ prefix is dropped: CompressionMiddleware weakens the ETags it
+    sends, and clients echo them back as they got them.
+    """
+    header = request.META.get('HTTP_IF_MATCH')
+    if not header:
+        return None
+    tags = (tag.strip() for tag in header.split(','))
+    return {tag.removeprefix('W/') for tag in tags if tag}
+
+
+class VersionedViewMixin:
+    """
+    For views whose get_object() returns a VersionedModel. Views that
+    replace get_object() should pass their result through track_version().
+    """
+    sparse_extra_columns = ('version',)
+
+    def check_precondition(self, request, instance):
+        tags = if_match(request)
+        if tags is None or '*' in tags:
+            return
+        if etag_for(instance) not in tags:
+            raise PreconditionFailed()
+
+    def track_version(self, instance):
+        if self.request.method not in permissions.SAFE_METHODS:
+            self.check_precondition(self.request, instance)
+        self.versioned_object = instance
+        return instance
+
+    def get_object(self):
+        return self.track_version(super().get_object())
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        instance = getattr(self, 'versioned_object', None)
+        if instance is not None and response.status_code < 300 and request.method != 'DELETE':
+            etag = etag_for(instance)
+            if etag:
+                response['ETag'] = etag
+        return response
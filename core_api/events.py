@@ -0,0 +1,144 @@
+"""
+In-process pub/sub used to push TradeItem status changes to wishlist subscribers.
+
+The broker class is picked with the EVENT_BROKER setting so tests (or a shared
+backend later on) can swap it without touching the views or signals.
+"""
+import asyncio
+import json
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+def item_channel(item_id):
+    return f"item:{item_id}"
+
+
+class Subscription:
+    """
+    A consumer's view of the broker: one bounded queue fed from any thread.
+    Must be created inside the event loop that will read from it.
+    """
+
+    def __init__(self, broker, channels, maxsize=100):
+        self.broker = broker
+        self.channels = frozenset(channels)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def deliver(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # the consumer's loop is gone, it will unsubscribe on its way out
+            pass
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # slow consumer, drop the event; clients resync from /api/wishlist/
+            pass
+
+    async def get(self, timeout=None):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker:
+    """
+    Fans events out to subscribers living in the same process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, channels, maxsize=100):
+        subscription = Subscription(self, channels, maxsize=maxsize)
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[channel]
+
+    def publish(self, channel, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.deliver(event)
+
+
+class RecordingBroker(LocalBroker):
+    """
+    Stand-in broker for tests, keeps every published event.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.published = []
+
+    def publish(self, channel, event):
+        self.published.append((channel, event))
+        super().publish(channel, event)
+
+
+_brokers = {}
+
+
+def get_broker():
+    path = getattr(settings, 'EVENT_BROKER', 'core_api.events.LocalBroker')
+    if path not in _brokers:
+        _brokers[path] = import_string(path)()
+    return _brokers[path]
+
+
+def publish_status_change(item_id, status, previous_status, updated_at):
+    event = {
+        'type': 'status',
+        'item': item_id,
+        'status': status,
+        'previous_status': previous_status,
+        'updated_at': updated_at.isoformat() if updated_at else None,
+    }
+    get_broker().publish(item_channel(item_id), event)
+
+
+def format_sse(event):
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+async def wishlist_event_stream(item_ids, heartbeat=None):
+    """
+    Yields server-sent events for status changes on the given items.
+    """
+    if heartbeat is None:
+        heartbeat = getattr(settings, 'EVENT_STREAM_HEARTBEAT', 15)
+    subscription = get_broker().subscribe([item_channel(item_id) for item_id in item_ids])
+    try:
+        yield 'retry: 5000\n\n'
+        while True:
+            event = await subscription.get(timeout=heartbeat)
+            if event is None:
+                yield ': keep-alive\n\n'
+                continue
+            yield format_sse(event)
+    finally:
+        subscription.close()
@@ -0,0 +1,188 @@
+"""
+Fast path for read-only list endpoints.
+
+Instead of building model instances and walking DRF's field machinery for
+every row, list views that opt in fetch plain dicts with `.values()` and turn
+them into the exact same payload with a hand-written row serializer.
+tests/test_fastpath.py checks the rendered bytes against the DRF serializers,
+so a field added to one side has to be added to the other.
+"""
+from abc import ABC, abstractmethod
+
+from django.conf import settings
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from .fieldsets import sparse_params
+from .models import Review, TradeItem, UserProfile
+
+# DRF's own field, so timezone handling and ISO formatting stay identical
+_datetime_field = serializers.DateTimeField()
+format_datetime = _datetime_field.to_representation
+
+
+def user_columns(prefix):
+    return tuple(prefix + name for name in ('id', 'username', 'email', 'first_name', 'last_name'))
+
+
+def user_data(row, prefix):
+    return {
+        'id': row[prefix + 'id'],
+        'username': row[prefix + 'username'],
+        'email': row[prefix + 'email'],
+        'first_name': row[prefix + 'first_name'],
+        'last_name': row[prefix + 'last_name'],
+    }
+
+
+class RowSerializer(ABC):
+    """
+    Base for row serializers: `columns` is what to pass to `.values()`,
+    `to_representation` turns one of those dicts into response data.
+    """
+    model = None
+    columns = ()
+
+    def __init__(self, request=None):
+        self.request = request
+
+    def file_url_for(self, field_name):
+        storage = self.model._meta.get_field(field_name).storage
+        request = self.request
+
+        def file_url(name):
+            if not name:
+                return None
+            url = storage.url(name)
+            if request is not None:
+                return request.build_absolute_uri(url)
+            return url
+
+        return file_url
+
+    @abstractmethod
+    def to_representation(self, row):
+        pass
+
+    def serialize(self, rows):
+        to_representation = self.to_representation
+        return [to_representation(row) for row in rows]
+
+
+class TradeItemListRowSerializer(RowSerializer):
+    """
+    Mirrors TradeItemListSerializer.
+    """
+    model = TradeItem
+    columns = (
+        'id', 'title', 'status', 'owner_username', 'owner_avatar', 'owner_rating', 'owner_trust_score',
+        'image', 'created_at',
+    )
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.image_url = self.file_url_for('image')
+        self.avatar_url = self.file_url_for('owner_avatar')
+
+    def to_representation(self, row):
+        return {
+            'id': row['id'],
+            'title': row['title'],
+            'status': row['status'],
+            'owner_username': row['owner_username'],
+            'owner_avatar': self.avatar_url(row['owner_avatar']),
+            'owner_rating': row['owner_rating'],
+            'owner_trust_score': row['owner_trust_score'],
+            'image': self.image_url(row['image']),
+            'created_at': format_datetime(row['created_at']),
+        }
+
+
+class ReviewRowSerializer(RowSerializer):
+    """
+    Mirrors ReviewSerializer.
+    """
+    model = Review
+    columns = (
+        ('id', 'rating', 'comment', 'created_at') +
+        user_columns('reviewer__') + user_columns('reviewee__')
+    )
+
+    def to_representation(self, row):
+        return {
+            'id': row['id'],
+            'reviewer': user_data(row, 'reviewer__'),
+            'reviewee': user_data(row, 'reviewee__'),
+            'rating': row['rating'],
+            'comment': row['comment'],
+            'created_at': format_datetime(row['created_at']),
+        }
+
+
+class UserProfileRowSerializer(RowSerializer):
+    """
+    Mirrors UserProfileSerializer.
+    """
+    model = UserProfile
+    columns = (
+        ('id', 'avatar', 'bio', 'favorite_genres', 'trust_score', 'created_at', 'updated_at') +
+        user_columns('user__')
+    )
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.avatar_url = self.file_url_for('avatar')
+
+    def to_representation(self, row):
+        return {
+            'id': row['id'],
+            'user': user_data(row, 'user__'),
+            'avatar': self.avatar_url(row['avatar']),
+            'bio': row['bio'],
+            'favorite_genres': row['favorite_genres'],
+            'trust_score': row['trust_score'],
+            'created_at': format_datetime(row['created_at']),
+            'updated_at': format_datetime(row['updated_at']),
+        }
+
+
+class FastListMixin:
+    """
+    Opt-in fast path for `list()`: set `fast_serializer_class` on the view.
+    Only used for JSON responses (the browsable API keeps the DRF path),
+    without sparse fieldset parameters, and when FAST_LIST_SERIALIZATION is on.
+    """
+    fast_serializer_class = None
+
+    def use_fast_list(self, request):
+        return (
+            self.fast_serializer_class is not None
+            and getattr(settings, 'FAST_LIST_SERIALIZATION', True)
+            and isinstance(getattr(request, 'accepted_renderer', None), JSONRenderer)
+            and sparse_params(request) is None
+        )
+
+    def fast_columns(self, queryset):
+        columns = list(self.fast_serializer_class.columns)
+        # cursor pagination reads the ordering field off each row
+        paginator = self.paginator
+        if paginator is not None and hasattr(paginator, 'get_ordering'):
+            for field in paginator.get_ordering(self.request, queryset, self):
+                field = field.lstrip('-')
+                if field not in columns:
+                    columns.append(field)
+        return columns
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_fast_list(request):
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = queryset.values(*self.fast_columns(queryset))
+        fast_serializer = self.fast_serializer_class(request=request)
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(fast_serializer.serialize(page))
+        return Response(fast_serializer.serialize(rows))
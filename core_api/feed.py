@@ -0,0 +1,160 @@
+"""
+Precomputed landing feed for GET /api/items/.
+
+The first LANDING_FEED['PAGES'] pages of the default ordering, unfiltered
+and per status, are rendered through the list view itself and kept in the
+cache as finished JSON bytes, so a hit skips the ORM and serialization
+entirely. Absolute URLs (cursor links, images) are rendered against a
+placeholder origin that is swapped for the requesting one on the way out.
+
+TradeItem changes bump a generation counter instead of rebuilding. Stale
+pages keep being served (up to MAX_STALE seconds) while the first reader
+to notice enqueues a rebuild job; pages also go stale after TTL seconds to
+pick up changes made without signals. `manage.py warm_feed` rebuilds on a
+schedule.
+
+The generation and the pages have to be shared by every process, so the
+feed is only on by default when CACHES['default'] is shared (REDIS_URL set);
+with the per-process locmem cache a write would only mark one process's
+copy stale.
+"""
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpRequest, HttpResponse, QueryDict
+from django.utils.cache import patch_vary_headers
+from django.urls import resolve, reverse
+from rest_framework.renderers import JSONRenderer
+
+from . import jobs
+from .models import TradeItem
+
+PLACEHOLDER_HOST = 'landing-feed.invalid'
+PLACEHOLDER_ORIGIN = f'http://{PLACEHOLDER_HOST}'.encode()
+FEED_PARAMS = {'status', 'cursor'}
+GENERATION_KEY = 'feed:generation'
+BUILD_FLAG = 'landing_feed.build'
+
+
+def _cache():
+    return caches[settings.LANDING_FEED['CACHE']]
+
+
+def _page_key(params):
+    return 'feed:page:' + urlencode(sorted(params.items()))
+
+
+def _generation(cache):
+    return cache.get(GENERATION_KEY, 0)
+
+
+def generation():
+    return _generation(_cache())
+
+
+def mark_stale():
+    cache = _cache()
+    cache.add(GENERATION_KEY, 0, None)
+    cache.incr(GENERATION_KEY)
+
+
+def feed_params(request):
+    """
+    Query params of a request the feed can answer, or None.
+    """
+    params = request.query_params
+    if set(params) - FEED_PARAMS or any(len(params.getlist(name)) > 1 for name in params):
+        return None
+    status = params.get('status')
+    if status is not None and status not in dict(TradeItem.STATUS_CHOICES):
+        return None
+    return params.dict()
+
+
+def _build_request(params):
+    request = HttpRequest()
+    request.method = 'GET'
+    request.path = request.path_info = reverse('tradeitem-list')
+    request.GET = QueryDict(urlencode(params))
+    request.META = {'HTTP_ACCEPT': 'application/json', 'SERVER_NAME': PLACEHOLDER_HOST, 'SERVER_PORT': '80'}
+    request.META[BUILD_FLAG] = True
+    request.get_host = lambda: PLACEHOLDER_HOST
+    return request
+
+
+def rebuild():
+    """
+    Renders and stores every feed page; returns the number of pages.
+    """
+    cache = _cache()
+    generation = _generation(cache)
+    config = settings.LANDING_FEED
+    view = resolve(reverse('tradeitem-list')).func
+    pages = {}
+    for status in [None] + [value for value, _ in TradeItem.STATUS_CHOICES]:
+        params = {'status': status} if status else {}
+        for _ in range(config['PAGES']):
+            response = view(_build_request(params))
+            response.render()
+            if response.status_code != 200:
+                break
+            pages[_page_key(params)] = (generation, time.time(), response.content)
+            if not response.data.get('next'):
+                break
+            params = dict(parse_qsl(urlsplit(response.data['next']).query))
+    # entries outlive MAX_STALE only to be ignored, let the cache drop them
+    cache.set_many(pages, config['MAX_STALE'])
+    return len(pages)
+
+
+@jobs.job('feed.rebuild')
+def rebuild_job():
+    rebuild()
+
+
+def cached_page(request, params):
+    """
+    The stored page for `params` with the request's origin, or None. Stale
+    pages are returned within MAX_STALE and schedule a single rebuild.
+    """
+    cache = _cache()
+    key = _page_key(params)
+    found = cache.get_many([key, GENERATION_KEY])
+    entry = found.get(key)
+    if entry is None:
+        return None
+    generation, built_at, content = entry
+    age = time.time() - built_at
+    config = settings.LANDING_FEED
+    if generation != found.get(GENERATION_KEY, 0) or age > config['TTL']:
+        if cache.add(f'feed:revalidate:{generation}:{built_at}', 1, config['MAX_STALE']):
+            rebuild_job.enqueue(key='feed:rebuild')
+        if age > config['MAX_STALE']:
+            return None
+    origin = f'{request.scheme}://{request.get_host()}'.encode()
+    return content.replace(PLACEHOLDER_ORIGIN, origin)
+
+
+class LandingFeedMixin:
+    """
+    Serves default-ordered list pages from the precomputed feed.
+    """
+
+    def get_throttles(self):
+        if self.request.META.get(BUILD_FLAG):
+            return []
+        return super().get_throttles()
+
+    def list(self, request, *args, **kwargs):
+        if (settings.LANDING_FEED['ENABLED'] and not request.META.get(BUILD_FLAG)
+                and isinstance(request.accepted_renderer, JSONRenderer)):
+            params = feed_params(request)
+            content = cached_page(request, params) if params is not None else None
+            if content is not None:
+                response = HttpResponse(content, content_type=request.accepted_renderer.media_type)
+                # the same URL renders the browsable API for text/html
+                patch_vary_headers(response, ['Accept'])
+                return response
+        return super().list(request, *args, **kwargs)
@@ -1,5 +1,6 @@
 import django_filters
-from .models import TradeItem
+from .genres import normalize_genres
+from .models import TradeItem, UserProfile
 
 class TradeItemFilter(django_filters.FilterSet):
     created_at_min = django_filters.DateTimeFilter(field_name="created_at", lookup_expr='gte')
@@ -8,4 +9,33 @@ class TradeItemFilter(django_filters.FilterSet):
 
     class Meta:
         model = TradeItem
-        fields = ['status', 'owner', 'created_at_min', 'created_at_max','title']
\ No newline at end of file
+        fields = ['status', 'owner', 'created_at_min', 'created_at_max','title']
+
+
+class UserProfileFilter(django_filters.FilterSet):
+    """
+    ?genres=a,b    profiles that like all of the genres (jsonb @>)
+    ?genres_any=a,b profiles that like at least one of them (jsonb ?|)
+    Both go through the GIN index on favorite_genres.
+    """
+    genres = django_filters.CharFilter(method='filter_genres')
+    genres_any = django_filters.CharFilter(method='filter_genres_any')
+
+    class Meta:
+        model = UserProfile
+        fields = ['genres', 'genres_any']
+
+    def _genres(self, value):
+        return normalize_genres(value.split(','))
+
+    def filter_genres(self, queryset, name, value):
+        genres = self._genres(value)
+        if not genres:
+            return queryset
+        return queryset.filter(favorite_genres__contains=genres)
+
+    def filter_genres_any(self, queryset, name, value):
+        genres = self._genres(value)
+        if not genres:
+            return queryset
+        return queryset.filter(favorite_genres__has_any_keys=genres)
@@ -0,0 +1,42 @@
+"""
+Genre vocabulary for UserProfile.favorite_genres.
+
+Genres are stored as slugs so "Sci Fi", "sci-fi" and "SciFi" end up as one
+value in the GIN index and in cache keys. Slugs keep non-ASCII letters, so
+titles in other scripts aren't reduced to nothing. ALIASES folds common
+alternative spellings onto the canonical slug.
+"""
+from django.utils.text import slugify
+
+ALIASES = {
+    'scifi': 'sci-fi',
+    'science-fiction': 'sci-fi',
+    'sf': 'sci-fi',
+    'shonen': 'shounen',
+    'shoujo': 'shojo',
+    'sol': 'slice-of-life',
+    'slice-life': 'slice-of-life',
+    'romcom': 'romantic-comedy',
+    'rom-com': 'romantic-comedy',
+    'mechas': 'mecha',
+    'isekai-fantasy': 'isekai',
+}
+
+MAX_GENRES = 20
+
+
+def normalize_genre(value):
+    slug = slugify(str(value), allow_unicode=True)
+    return ALIASES.get(slug, slug)
+
+
+def normalize_genres(values):
+    """
+    Canonical slugs in their original order, without blanks or duplicates.
+    """
+    seen = []
+    for value in values:
+        slug = normalize_genre(value)
+        if slug and slug not in seen:
+            seen.append(slug)
+    return seen
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 with the iteration count taken from PASSWORD_HASH_ITERATIONS.
+
+    The algorithm name stays 'pbkdf2_sha256', so existing hashes keep
+    verifying and are re-hashed at the configured cost on next login.
+    Must replace, not sit next to, Django's PBKDF2PasswordHasher in
+    PASSWORD_HASHERS since hashers are looked up by algorithm name.
+    """
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'PASSWORD_HASH_ITERATIONS', PBKDF2PasswordHasher.iterations)
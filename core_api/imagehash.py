@@ -0,0 +1,134 @@
+"""
+Near-duplicate listing images.
+
+Each item image gets a 64-bit difference hash (dHash: 9x8 grayscale
+thumbnail, one bit per horizontally adjacent pixel pair), which survives
+re-encoding, resizing and small crops. Hashes live in ImageHash, split into
+four 16-bit bands with a B-tree index each. Two hashes within Hamming
+distance r must agree to within r // 4 bits on at least one band
+(pigeonhole), so a lookup is a handful of indexed IN lists, enumerating the
+band values within that radius, then an exact distance check on the
+few candidates. Nothing scans all hashes.
+
+On create, an image within IMAGE_HASH['DUPLICATE_DISTANCE'] of one of the
+owner's other items is rejected or flagged (ImageHash.duplicate_of),
+per IMAGE_HASH['DUPLICATES'].
+"""
+from functools import reduce
+from itertools import combinations
+import operator
+
+from django.conf import settings
+from django.db.models import Q
+from PIL import Image
+
+from . import jobs
+from .models import ImageHash, TradeItem
+
+BANDS = 4
+BAND_BITS = 16
+BAND_MASK = (1 << BAND_BITS) - 1
+
+
+def dhash(content):
+    """
+    Hash of an image file object, or None if it can't be decoded.
+    """
+    try:
+        content.seek(0)
+        with Image.open(content) as image:
+            image.draft('L', (64, 64))  # cheap JPEG downscale before resampling
+            pixels = image.convert('L').resize((9, 8), Image.LANCZOS).tobytes()
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+    finally:
+        content.seek(0)
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            value = (value << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return value
+
+
+def distance(a, b):
+    return bin((a ^ b) & 0xFFFFFFFFFFFFFFFF).count('1')
+
+
+def to_signed(value):
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def bands(value):
+    value &= 0xFFFFFFFFFFFFFFFF
+    return tuple((value >> (BAND_BITS * i)) & BAND_MASK for i in range(BANDS))
+
+
+def _band_neighbours(band, radius):
+    values = [band]
+    for flips in range(1, radius + 1):
+        for bits in combinations(range(BAND_BITS), flips):
+            values.append(band ^ reduce(operator.or_, (1 << bit for bit in bits)))
+    return values
+
+
+def near(value, radius, queryset=None, exclude=None):
+    """
+    [(distance, item_id)] of stored hashes within `radius` of `value`,
+    closest first.
+    """
+    band_radius = radius // BANDS
+    candidates = Q()
+    for index, band in enumerate(bands(value)):
+        candidates |= Q(**{f'band_{index}__in': _band_neighbours(band, band_radius)})
+    queryset = (queryset if queryset is not None else ImageHash.objects.all()).filter(candidates)
+    if exclude is not None:
+        queryset = queryset.exclude(item_id=exclude)
+    found = []
+    for item_id, other in queryset.values_list('item_id', 'value'):
+        d = distance(value, other)
+        if d <= radius:
+            found.append((d, item_id))
+    return sorted(found)
+
+
+def find_duplicate(value, owner_id, exclude=None):
+    """
+    Id of the owner's closest near-identical item, or None.
+    """
+    matches = near(
+        value, settings.IMAGE_HASH['DUPLICATE_DISTANCE'],
+        queryset=ImageHash.objects.filter(item__owner_id=owner_id), exclude=exclude,
+    )
+    return matches[0][1] if matches else None
+
+
+def index_item(item, value=None):
+    """
+    Stores (or drops) the hash for the item's current image and flags
+    same-owner duplicates. `value` skips re-reading the file.
+    """
+    if not item.image:
+        ImageHash.objects.filter(item=item).delete()
+        return None
+    if value is None:
+        with item.image.open('rb') as content:
+            value = dhash(content)
+        if value is None:
+            return None
+    band_values = bands(value)
+    return ImageHash.objects.update_or_create(item=item, defaults={
+        'image': item.image.name,
+        'value': to_signed(value),
+        'duplicate_of_id': find_duplicate(value, item.owner_id, exclude=item.pk),
+        **{f'band_{index}': band for index, band in enumerate(band_values)},
+    })[0]
+
+
+@jobs.job('imagehash.index_item')
+def index_item_job(item_id):
+    item = TradeItem.objects.filter(pk=item_id).only('id', 'image', 'owner_id').first()
+    if item is None:
+        return
+    stored = ImageHash.objects.filter(item_id=item_id).values_list('image', flat=True).first()
+    if stored != (item.image.name or None):
+        index_item(item)
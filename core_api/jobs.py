@@ -0,0 +1,177 @@
+"""
+Small DB-backed job queue for work a response doesn't depend on.
+
+    @jobs.job('matching.index_item')
+    def index_item_job(item_id): ...
+
+    index_item_job.enqueue(item_id=item.pk, key=f'matching:{item.pk}')
+
+Jobs are inserted on transaction commit, so a rolled back request enqueues
+nothing and workers never see rows that aren't visible yet. An idempotency
+key coalesces repeated enqueues while a job is still queued. Workers
+(`manage.py run_jobs`) claim rows with SELECT ... FOR UPDATE SKIP LOCKED
+and retry failures with exponential backoff. With JOBS_EAGER (the default
+when DEBUG is on, and in the test suite) the job runs in-process right
+after commit instead.
+"""
+import logging
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+class RegisteredJob:
+    def __init__(self, func, name, max_attempts, eager=True):
+        self.func = func
+        self.name = name
+        self.max_attempts = max_attempts
+        self.eager = eager
+
+    def __call__(self, **payload):
+        return self.func(**payload)
+
+    def enqueue(self, key=None, delay=None, **payload):
+        enqueue(self.name, payload, key=key, delay=delay)
+
+
+def job(name, max_attempts=5, eager=True):
+    """
+    Registers a function as a job; payload is passed as keyword arguments
+    and must be JSON serializable. Jobs registered with eager=False are
+    always queued, even with JOBS_EAGER, for work whose delay and key
+    coalescing matter more than running it right away.
+    """
+    def register(func):
+        if name in _registry:
+            raise ValueError(f"Job {name!r} is already registered.")
+        _registry[name] = RegisteredJob(func, name, max_attempts, eager)
+        return _registry[name]
+    return register
+
+
+def enqueue(name, payload=None, key=None, delay=None):
+    registered = _registry[name]
+    payload = payload or {}
+    if settings.JOBS_EAGER and registered.eager:
+        transaction.on_commit(lambda: _run_eager(registered, payload))
+        return
+
+    def insert():
+        run_at = timezone.now() + (delay or timedelta())
+        # ON CONFLICT DO NOTHING against the queued-key constraint
+        Job.objects.bulk_create([Job(
+            name=name, payload=payload, idempotency_key=key,
+            max_attempts=registered.max_attempts, run_at=run_at,
+        )], ignore_conflicts=True)
+
+    transaction.on_commit(insert)
+
+
+def _run_eager(registered, payload):
+    try:
+        registered(**payload)
+    except Exception:
+        logger.exception("Job %s failed", registered.name)
+
+
+def backoff(attempts):
+    """
+    Seconds before the next try: exponential with full jitter, capped.
+    """
+    ceiling = min(settings.JOBS_BACKOFF_MAX, settings.JOBS_BACKOFF_BASE * 2 ** (attempts - 1))
+    return random.uniform(ceiling / 2, ceiling)
+
+
+def claim(limit):
+    """
+    Marks up to `limit` due jobs as running and returns them. Jobs left
+    running past JOBS_LOCK_TIMEOUT (a crashed worker) are claimed again
+    while they have attempts left, and marked failed otherwise, so a job
+    that kills its worker can't be retried forever.
+    """
+    now = timezone.now()
+    stale = Q(status=Job.RUNNING, locked_at__lt=now - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT))
+    with transaction.atomic():
+        Job.objects.filter(stale, attempts__gte=F('max_attempts')).update(
+            status=Job.FAILED, locked_at=None, last_error='Worker lost the job on its last attempt.'
+        )
+        claimed = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(Q(status=Job.QUEUED, run_at__lte=now) | (stale & Q(attempts__lt=F('max_attempts'))))
+            .order_by('run_at')[:limit]
+        )
+        if claimed:
+            Job.objects.filter(pk__in=[j.pk for j in claimed]).update(
+                status=Job.RUNNING, locked_at=now, attempts=F('attempts') + 1
+            )
+    for claimed_job in claimed:
+        claimed_job.status, claimed_job.locked_at = Job.RUNNING, now
+        claimed_job.attempts += 1
+    return claimed
+
+
+def execute(claimed_job):
+    """
+    Runs a claimed job and records the outcome. Returns True on success.
+    """
+    registered = _registry.get(claimed_job.name)
+    try:
+        if registered is None:
+            raise LookupError(f"Unknown job {claimed_job.name!r}")
+        registered(**claimed_job.payload)
+    except Exception as exc:
+        logger.warning("Job %s #%s failed (attempt %s)", claimed_job.name, claimed_job.pk, claimed_job.attempts,
+                       exc_info=True)
+        _record_failure(claimed_job, exc, retry=registered is not None)
+        return False
+
+    Job.objects.filter(pk=claimed_job.pk).update(status=Job.DONE, locked_at=None, last_error='')
+    return True
+
+
+def _record_failure(claimed_job, exc, retry=True):
+    error = f"{type(exc).__name__}: {exc}"
+    if not retry or claimed_job.attempts >= claimed_job.max_attempts:
+        Job.objects.filter(pk=claimed_job.pk).update(status=Job.FAILED, locked_at=None, last_error=error)
+        return
+    run_at = timezone.now() + timedelta(seconds=backoff(claimed_job.attempts))
+    try:
+        with transaction.atomic():
+            Job.objects.filter(pk=claimed_job.pk).update(
+                status=Job.QUEUED, locked_at=None, last_error=error, run_at=run_at
+            )
+    except IntegrityError:
+        # the same key was queued again meanwhile, that run covers this one
+        Job.objects.filter(pk=claimed_job.pk).update(status=Job.DONE, locked_at=None, last_error=error)
+
+
+def run_pending(limit=100):
+    """
+    Claims and runs one batch; returns (succeeded, failed).
+    """
+    succeeded = failed = 0
+    for claimed_job in claim(limit):
+        if execute(claimed_job):
+            succeeded += 1
+        else:
+            failed += 1
+    return succeeded, failed
+
+
+def purge(older_than):
+    """
+    Deletes finished jobs last touched before `older_than` (a timedelta).
+    """
+    cutoff = timezone.now() - older_than
+    deleted, _ = Job.objects.filter(status__in=[Job.DONE, Job.FAILED], updated_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,426 @@
+"""
+In-process load generator for the API, driven by the `loadtest` command.
+
+Requests are fed straight into the project's WSGI or ASGI application (full
+middleware, auth, throttling and DB stack, no network), paced to a target
+rate. Latency is measured from each request's scheduled start, so a backed up
+server shows up as latency instead of silently lowering the offered load.
+"""
+import asyncio
+import io
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import close_old_connections, connections
+from django.urls import Resolver404, resolve
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import TradeItem, UserProfile, Wishlist
+
+LOADTEST_PREFIX = 'loadtest_'
+LOADTEST_PASSWORD = 'loadtest-pass-123'
+# keeps the debug toolbar (INTERNAL_IPS) out of the measurements
+CLIENT_ADDR = '10.0.0.1'
+
+WORDS = (
+    'naruto', 'one', 'piece', 'bleach', 'gundam', 'evangelion', 'figure', 'poster',
+    'manga', 'volume', 'limited', 'edition', 'signed', 'keychain', 'plush', 'artbook',
+)
+
+DEFAULT_MIX = {
+    'browse_items': 45,
+    'browse_filtered': 15,
+    'item_detail': 20,
+    'wishlist_toggle': 8,
+    'review_post': 2,
+    'login': 6,
+    'refresh': 4,
+}
+
+
+class Request:
+    __slots__ = ('method', 'path', 'body', 'token')
+
+    def __init__(self, method, path, body=None, token=None):
+        self.method = method
+        self.path = path
+        self.body = body
+        self.token = token
+
+
+def seed(users=50, items=1000, wishlists_per_user=10):
+    """
+    Creates loadtest_* users (with profiles) and items, leaves existing rows alone.
+    """
+    password = make_password(LOADTEST_PASSWORD)
+    existing = set(User.objects.filter(username__startswith=LOADTEST_PREFIX).values_list('username', flat=True))
+    new_users = [
+        User(username=f'{LOADTEST_PREFIX}{i}', email=f'{LOADTEST_PREFIX}{i}@example.com', password=password)
+        for i in range(users) if f'{LOADTEST_PREFIX}{i}' not in existing
+    ]
+    User.objects.bulk_create(new_users)
+    seeded = list(User.objects.filter(username__startswith=LOADTEST_PREFIX))
+    with_profile = set(UserProfile.objects.filter(user__in=seeded).values_list('user_id', flat=True))
+    UserProfile.objects.bulk_create([UserProfile(user=user) for user in seeded if user.pk not in with_profile])
+
+    rng = random.Random(0)
+    owners = [rng.choice(seeded) for _ in range(items)]
+    # bulk_create skips signals, so fill the owner snapshot here
+    TradeItem.objects.bulk_create([
+        TradeItem(
+            title=' '.join(rng.sample(WORDS, 3)).title(),
+            description=' '.join(rng.choices(WORDS, k=30)),
+            interests=' '.join(rng.sample(WORDS, 2)),
+            status=rng.choice(['available', 'available', 'available', 'pending', 'traded']),
+            owner=owner,
+            owner_username=owner.username,
+        )
+        for owner in owners
+    ], batch_size=1000)
+
+    item_ids = list(TradeItem.objects.values_list('id', flat=True)[:5000])
+    Wishlist.objects.bulk_create([
+        Wishlist(user=user, item_id=item_id)
+        for user in seeded
+        for item_id in rng.sample(item_ids, min(wishlists_per_user, len(item_ids)))
+    ], ignore_conflicts=True)
+    return len(seeded), items
+
+
+class TrafficMix:
+    """
+    Turns scenario weights into concrete requests against the seeded data.
+    """
+
+    def __init__(self, weights=None, rng=None):
+        self.weights = dict(weights or DEFAULT_MIX)
+        unknown = set(self.weights) - set(self.scenarios())
+        if unknown:
+            raise ValueError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+        self.rng = rng or random.Random()
+        self.users = list(User.objects.filter(username__startswith=LOADTEST_PREFIX).order_by('id'))
+        if not self.users:
+            raise ValueError('No loadtest users, run with --seed first.')
+        self.item_ids = list(TradeItem.objects.values_list('id', flat=True)[:10000])
+        self.refresh = {user.pk: RefreshToken.for_user(user) for user in self.users}
+        self.access = {pk: str(token.access_token) for pk, token in self.refresh.items()}
+        self._names = list(self.weights)
+        self._weights = [self.weights[name] for name in self._names]
+
+    @classmethod
+    def scenarios(cls):
+        return {
+            name[len('scenario_'):]: getattr(cls, name)
+            for name in dir(cls) if name.startswith('scenario_')
+        }
+
+    def next(self):
+        name = self.rng.choices(self._names, weights=self._weights)[0]
+        return getattr(self, f'scenario_{name}')()
+
+    def _user(self):
+        return self.rng.choice(self.users)
+
+    def scenario_browse_items(self):
+        return Request('GET', '/api/items/')
+
+    def scenario_browse_filtered(self):
+        params = [
+            f"status={self.rng.choice(['available', 'pending', 'traded'])}",
+            f"search={self.rng.choice(WORDS)}",
+            f"ordering={self.rng.choice(['-created_at', 'title'])}",
+        ]
+        return Request('GET', '/api/items/?' + '&'.join(self.rng.sample(params, 2)))
+
+    def scenario_item_detail(self):
+        return Request('GET', f'/api/items/{self.rng.choice(self.item_ids)}/')
+
+    def scenario_wishlist_toggle(self):
+        user = self._user()
+        item_id = self.rng.choice(self.item_ids)
+        if self.rng.random() < 0.5:
+            return Request('POST', f'/api/wishlist/{item_id}/add/', token=self.access[user.pk])
+        return Request('DELETE', f'/api/wishlist/{item_id}/remove/', token=self.access[user.pk])
+
+    def scenario_review_post(self):
+        reviewer, reviewee = self.rng.sample(self.users, 2)
+        body = {'reviewee_id': reviewee.pk, 'rating': self.rng.randint(1, 5), 'comment': 'load test'}
+        return Request('POST', '/api/reviews/', body=body, token=self.access[reviewer.pk])
+
+    def scenario_login(self):
+        user = self._user()
+        return Request('POST', '/api/auth/login/', body={'username': user.username, 'password': LOADTEST_PASSWORD})
+
+    def scenario_refresh(self):
+        user = self._user()
+        return Request('POST', '/api/auth/refresh/', body={'refresh': str(self.refresh[user.pk])})
+
+
+def load_replay(path):
+    """
+    Reads a JSON-lines request log. Each line needs a `path` and may have
+    `method` (default GET) and a JSON `body`; other lines are skipped.
+    Returns (requests, skipped line count).
+    """
+    requests, skipped = [], 0
+    with open(path) as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                skipped += 1
+                continue
+            if not isinstance(entry, dict) or not str(entry.get('path', '')).startswith('/'):
+                skipped += 1
+                continue
+            requests.append(Request(entry.get('method', 'GET').upper(), entry['path'], body=entry.get('body')))
+    return requests, skipped
+
+
+def route_name(path):
+    try:
+        match = resolve(urlsplit(path).path)
+    except Resolver404:
+        return 'unresolved'
+    return match.view_name or match.route
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class Results:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.started = self.finished = None
+
+    def record(self, route, status, latency):
+        with self._lock:
+            self.latencies[route].append(latency)
+            self.statuses[route][status] += 1
+
+    def summary(self):
+        elapsed = max((self.finished or 0) - (self.started or 0), 1e-9)
+        rows = []
+        for route in sorted(self.latencies):
+            latencies = sorted(self.latencies[route])
+            statuses = self.statuses[route]
+            count = len(latencies)
+            errors = sum(n for status, n in statuses.items() if status == 0 or status >= 500)
+            client_errors = sum(n for status, n in statuses.items() if 400 <= status < 500)
+            rows.append({
+                'route': route,
+                'requests': count,
+                'rps': count / elapsed,
+                'p50_ms': percentile(latencies, 0.50) * 1000,
+                'p90_ms': percentile(latencies, 0.90) * 1000,
+                'p99_ms': percentile(latencies, 0.99) * 1000,
+                'max_ms': latencies[-1] * 1000,
+                'error_rate': errors / count,
+                'client_error_rate': client_errors / count,
+                'statuses': dict(statuses),
+            })
+        return {'elapsed': elapsed, 'routes': rows}
+
+
+def _host():
+    hosts = [host for host in settings.ALLOWED_HOSTS if host and host != '*' and not host.startswith('.')]
+    return hosts[0] if hosts else 'localhost'
+
+
+def _encode(request):
+    body = json.dumps(request.body).encode() if request.body is not None else b''
+    headers = {'accept': 'application/json'}
+    if body:
+        headers['content-type'] = 'application/json'
+    if request.token:
+        headers['authorization'] = f'Bearer {request.token}'
+    return body, headers
+
+
+def call_wsgi(app, request, host):
+    body, headers = _encode(request)
+    url = urlsplit(request.path)
+    environ = {
+        'REQUEST_METHOD': request.method,
+        'PATH_INFO': url.path,
+        'QUERY_STRING': url.query,
+        'SERVER_NAME': host,
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': CLIENT_ADDR,
+        'HTTP_HOST': host,
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': io.StringIO(),
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in headers.items():
+        key = name.upper().replace('-', '_')
+        environ[key if key == 'CONTENT_TYPE' else f'HTTP_{key}'] = value
+
+    status = []
+    response = app(environ, lambda line, response_headers, exc_info=None: status.append(line))
+    try:
+        for _ in response:
+            pass
+    finally:
+        close = getattr(response, 'close', None)
+        if close:
+            close()
+    return int(status[0].split(' ', 1)[0])
+
+
+async def call_asgi(app, request, host):
+    body, headers = _encode(request)
+    url = urlsplit(request.path)
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': request.method,
+        'scheme': 'http',
+        'path': url.path,
+        'raw_path': url.path.encode(),
+        'query_string': url.query.encode(),
+        'root_path': '',
+        'headers': [(b'host', host.encode())] + [
+            (name.encode(), value.encode()) for name, value in headers.items()
+        ],
+        'client': (CLIENT_ADDR, 0),
+        'server': (host, 80),
+    }
+    sent = False
+    disconnect = asyncio.Event()
+    status = []
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+        await disconnect.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+        elif message['type'] == 'http.response.body' and not message.get('more_body'):
+            disconnect.set()
+
+    await app(scope, receive, send)
+    disconnect.set()
+    return status[0]
+
+
+def build_app(interface):
+    """
+    The project's WSGI or ASGI application. Note that building it re-runs
+    django.setup(), which reapplies LOGGING.
+    """
+    if interface == 'asgi':
+        from django.core.asgi import get_asgi_application
+        return get_asgi_application()
+    from django.core.wsgi import get_wsgi_application
+    return get_wsgi_application()
+
+
+def run_wsgi(app, source, rps, duration, concurrency, max_requests=None):
+    host = _host()
+    results = Results()
+    lock = threading.Lock()
+    counter = {'sent': 0}
+    interval = 1.0 / rps
+    results.started = time.perf_counter()
+    deadline = results.started + duration
+
+    def worker():
+        try:
+            while True:
+                with lock:
+                    index = counter['sent']
+                    if max_requests is not None and index >= max_requests:
+                        return
+                    counter['sent'] += 1
+                    request = source(index)
+                if request is None:
+                    return
+                scheduled = results.started + index * interval
+                if scheduled >= deadline:
+                    return
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                try:
+                    status = call_wsgi(app, request, host)
+                except Exception:
+                    status = 0
+                results.record(route_name(request.path), status, time.perf_counter() - scheduled)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.finished = time.perf_counter()
+    return results
+
+
+def run_asgi(app, source, rps, duration, concurrency, max_requests=None):
+    host = _host()
+    results = Results()
+    interval = 1.0 / rps
+
+    async def main():
+        slots = asyncio.Semaphore(concurrency)
+        tasks = []
+        results.started = time.perf_counter()
+        deadline = results.started + duration
+        index = 0
+        while max_requests is None or index < max_requests:
+            scheduled = results.started + index * interval
+            if scheduled >= deadline:
+                break
+            request = source(index)
+            if request is None:
+                break
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.ensure_future(one(slots, request, scheduled)))
+            index += 1
+        await asyncio.gather(*tasks)
+        results.finished = time.perf_counter()
+
+    async def one(slots, request, scheduled):
+        async with slots:
+            try:
+                status = await call_asgi(app, request, host)
+            except Exception:
+                status = 0
+            results.record(route_name(request.path), status, time.perf_counter() - scheduled)
+
+    close_old_connections()
+    asyncio.run(main())
+    return results
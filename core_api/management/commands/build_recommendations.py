@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+from core_api import recommendations
+
+class Command(BaseCommand):
+    help = 'Recompute item similarities from wishlist co-occurrence (needs numpy and scipy)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=None,
+                            help='Similar items to keep per item (default: RECOMMENDATIONS["NEIGHBOURS"])')
+
+    def handle(self, *args, **options):
+        try:
+            rows = recommendations.rebuild_similarities(top_k=options['top_k'])
+        except ImportError as exc:
+            raise CommandError(f'build_recommendations needs numpy and scipy: {exc}')
+        self.stdout.write(self.style.SUCCESS(f'Stored {rows} item similarities.'))
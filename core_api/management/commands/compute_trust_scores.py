@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+from core_api import trust
+
+class Command(BaseCommand):
+    help = 'Recompute user trust scores from the review graph (needs numpy and scipy)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--incremental', action='store_true',
+                            help='Fold queued review changes into the stored scores')
+
+    def handle(self, *args, **options):
+        try:
+            stats = trust.refresh(incremental=options['incremental'])
+        except ImportError as exc:
+            raise CommandError(f'compute_trust_scores needs numpy and scipy: {exc}')
+        self.stdout.write(self.style.SUCCESS(
+            f"Scored {stats['users']} users from {stats['reviews']} reviews in {stats['iterations']} iterations, "
+            f"updated {stats['updated']} profiles (load {stats['load_seconds']:.2f}s, "
+            f"compute {stats['compute_seconds']:.2f}s, store {stats['store_seconds']:.2f}s)."
+        ))
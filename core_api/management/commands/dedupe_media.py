@@ -0,0 +1,57 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+from core_api import feed
+from core_api.models import TradeItem, UserProfile
+from core_api.storage import is_hashed_name
+
+# owner_avatar mirrors UserProfile.avatar, so it shares the mapping
+MEDIA_FIELDS = [
+    (TradeItem, 'image'),
+    (UserProfile, 'avatar'),
+    (TradeItem, 'owner_avatar'),
+]
+
+class Command(BaseCommand):
+    help = 'Move existing media to content-addressed names, merging duplicates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true')
+        parser.add_argument('--keep-old', action='store_true', help="Don't delete the old files")
+
+    def handle(self, *args, **options):
+        renamed, missing = {}, 0
+        for model, field in MEDIA_FIELDS:
+            names = (
+                model.objects.exclude(**{f'{field}__isnull': True}).exclude(**{field: ''})
+                .values_list(field, flat=True).distinct()
+            )
+            for name in names:
+                if is_hashed_name(name) or name in renamed:
+                    continue
+                if not default_storage.exists(name):
+                    missing += 1
+                    continue
+                if options['dry_run']:
+                    renamed[name] = None
+                    continue
+                with default_storage.open(name) as content:
+                    renamed[name] = default_storage.save(name, content)
+
+        if not options['dry_run']:
+            with transaction.atomic():
+                for old, new in renamed.items():
+                    for model, field in MEDIA_FIELDS:
+                        model.objects.filter(**{field: old}).update(**{field: new, 'version': F('version') + 1})
+                # update() skips the TradeItem signals
+                transaction.on_commit(feed.mark_stale)
+            if not options['keep_old']:
+                for old in renamed:
+                    default_storage.delete(old)
+
+        unique = len(set(renamed.values())) if not options['dry_run'] else len(renamed)
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Would move' if options['dry_run'] else 'Moved'} {len(renamed)} files to {unique} "
+            f"content-addressed names; {missing} referenced files are missing."
+        ))
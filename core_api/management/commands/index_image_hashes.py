@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from core_api import imagehash
+from core_api.models import ImageHash, TradeItem
+
+class Command(BaseCommand):
+    help = 'Hash item images missing from (or stale in) the near-duplicate index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        stored = dict(ImageHash.objects.values_list('item_id', 'image'))
+        items = TradeItem.objects.exclude(image='').exclude(image__isnull=True).only('id', 'image', 'owner_id')
+        indexed = flagged = 0
+        for item in items.order_by('pk').iterator(chunk_size=options['batch_size']):
+            if stored.get(item.pk) == item.image.name:
+                continue
+            row = imagehash.index_item(item)
+            if row is not None:
+                indexed += 1
+                flagged += row.duplicate_of_id is not None
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} images, {flagged} flagged as duplicates.'))
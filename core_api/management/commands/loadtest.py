@@ -0,0 +1,110 @@
+import json
+import logging
+import random
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.views import APIView
+from core_api import loadtest
+
+
+@contextmanager
+def throttles_disabled():
+    # APIView subclasses pick up DEFAULT_THROTTLE_CLASSES through this attribute
+    original = APIView.throttle_classes
+    APIView.throttle_classes = []
+    try:
+        yield
+    finally:
+        APIView.throttle_classes = original
+
+
+class Command(BaseCommand):
+    help = ('Replay a traffic mix or a request log against the in-process WSGI/ASGI app '
+            'and report throughput, latency percentiles and error rates per route. '
+            'Writes go to the configured database, point it at a local copy.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', action='store_true', help='Create loadtest_* users and items first')
+        parser.add_argument('--seed-users', type=int, default=50)
+        parser.add_argument('--seed-items', type=int, default=1000)
+        parser.add_argument('--mix', help='Scenario weights as JSON or a path to a JSON file')
+        parser.add_argument('--list-scenarios', action='store_true')
+        parser.add_argument('--replay', help='JSON-lines request log to replay instead of a mix')
+        parser.add_argument('--rps', type=float, default=50, help='Target requests per second')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds to run')
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--requests', type=int, default=None, help='Stop after this many requests')
+        parser.add_argument('--interface', choices=['wsgi', 'asgi'], default='wsgi')
+        parser.add_argument('--with-throttling', action='store_true',
+                            help='Keep DRF throttles on (by default they would reject most of the run)')
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+        parser.add_argument('--random-seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        if options['list_scenarios']:
+            for name in sorted(loadtest.TrafficMix.scenarios()):
+                self.stdout.write(f"{name} (default weight {loadtest.DEFAULT_MIX.get(name, 0)})")
+            return
+        if options['rps'] <= 0 or options['concurrency'] <= 0:
+            raise CommandError('--rps and --concurrency must be positive')
+
+        if options['seed']:
+            users, items = loadtest.seed(options['seed_users'], options['seed_items'])
+            self.stdout.write(f'Seeded {users} users and {items} items.')
+
+        source = self._source(options)
+        app = loadtest.build_app(options['interface'])
+        run = loadtest.run_asgi if options['interface'] == 'asgi' else loadtest.run_wsgi
+        args = (app, source, options['rps'], options['duration'], options['concurrency'], options['requests'])
+        # 4xx responses end up in the report, not one log line each
+        request_logger = logging.getLogger('django.request')
+        level = request_logger.level
+        request_logger.setLevel(logging.ERROR)
+        try:
+            if options['with_throttling']:
+                results = run(*args)
+            else:
+                with throttles_disabled():
+                    results = run(*args)
+        finally:
+            request_logger.setLevel(level)
+        self._report(results.summary(), options['json'])
+
+    def _source(self, options):
+        if options['replay']:
+            requests, skipped = loadtest.load_replay(options['replay'])
+            if not requests:
+                raise CommandError(f"No replayable requests in {options['replay']} ({skipped} lines skipped)")
+            if skipped:
+                self.stderr.write(f'Skipped {skipped} lines without a request path.')
+            return lambda index: requests[index % len(requests)]
+
+        weights = None
+        if options['mix']:
+            try:
+                weights = json.loads(options['mix'])
+            except ValueError:
+                with open(options['mix']) as fh:
+                    weights = json.load(fh)
+        try:
+            mix = loadtest.TrafficMix(weights, rng=random.Random(options['random_seed']))
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        return lambda index: mix.next()
+
+    def _report(self, summary, as_json):
+        if as_json:
+            self.stdout.write(json.dumps(summary, indent=2))
+            return
+        self.stdout.write(f"Elapsed {summary['elapsed']:.1f}s")
+        header = (f"{'route':<32}{'reqs':>7}{'rps':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}"
+                  f"{'max ms':>10}{'err%':>7}{'4xx%':>7}")
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for row in summary['routes']:
+            self.stdout.write(
+                f"{row['route'][:31]:<32}{row['requests']:>7}{row['rps']:>8.1f}"
+                f"{row['p50_ms']:>10.1f}{row['p90_ms']:>10.1f}{row['p99_ms']:>10.1f}{row['max_ms']:>10.1f}"
+                f"{row['error_rate'] * 100:>7.1f}{row['client_error_rate'] * 100:>7.1f}"
+            )
@@ -0,0 +1,59 @@
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from core_api import partitioning
+
+class Command(BaseCommand):
+    help = 'Monthly created_at partitions for large tables (PostgreSQL, see core_api/partitioning.py)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['status', 'convert', 'maintain'])
+        parser.add_argument('models', nargs='*', help='app_label.Model, defaults to PARTITIONING["MODELS"]')
+        parser.add_argument('--months-ahead', type=int, default=settings.PARTITIONING['MONTHS_AHEAD'])
+        parser.add_argument('--retain-months', type=int, default=settings.PARTITIONING['RETAIN_MONTHS'])
+        parser.add_argument('--detach', action='store_true', help='Detach partitions older than --retain-months')
+        parser.add_argument('--drop-inbound-fks', action='store_true',
+                            help='Drop foreign keys referencing the table (integrity then only enforced by Django)')
+        parser.add_argument('--relax-unique', action='store_true',
+                            help='Extend unique constraints with created_at (unique per partition only)')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Partitioning needs PostgreSQL.')
+        labels = options['models'] or settings.PARTITIONING['MODELS']
+        try:
+            tables = [apps.get_model(label)._meta.db_table for label in labels]
+        except (LookupError, ValueError) as exc:
+            raise CommandError(str(exc))
+        log = (lambda sql: self.stdout.write(f'  {sql}')) if options['verbosity'] > 1 else (lambda sql: None)
+
+        for table in tables:
+            try:
+                if options['action'] == 'status':
+                    self.status(table, options)
+                elif options['action'] == 'convert':
+                    partitioning.convert(
+                        table, options['months_ahead'], options['drop_inbound_fks'], options['relax_unique'], log=log
+                    )
+                    self.stdout.write(self.style.SUCCESS(f'{table}: partitioned by month.'))
+                else:
+                    created, detached = partitioning.maintain(
+                        table, options['months_ahead'], options['retain_months'], options['detach'], log=log
+                    )
+                    self.stdout.write(self.style.SUCCESS(
+                        f'{table}: created {len(created)} partitions, detached {len(detached)}'
+                        + (f' ({", ".join(detached)})' if detached else '') + '.'
+                    ))
+            except partitioning.PartitioningError as exc:
+                raise CommandError(str(exc))
+
+    def status(self, table, options):
+        if partitioning.is_partitioned(table):
+            parts = partitioning.partitions(table)
+            self.stdout.write(f'{table}: {len(parts)} partitions, covered until {parts[-1].upper:%Y-%m-%d}')
+            return
+        reasons = partitioning.blockers(table, options['drop_inbound_fks'], options['relax_unique'])
+        self.stdout.write(f'{table}: not partitioned' + ('' if reasons else ', ready to convert'))
+        for reason in reasons:
+            self.stdout.write(f'  blocked: {reason}')
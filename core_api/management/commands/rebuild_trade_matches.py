@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from core_api import matching
+
+class Command(BaseCommand):
+    help = 'Rebuild the trade matching token index and precomputed matches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        items, matches = matching.rebuild_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {items} items, stored {matches} match rows.'
+        ))
@@ -0,0 +1,41 @@
+import signal
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from core_api import jobs
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (see core_api/jobs.py)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--idle-sleep', type=float, default=1.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Drain due jobs and exit')
+        parser.add_argument('--purge-days', type=int, help='Delete finished jobs older than this many days and exit')
+
+    def handle(self, *args, **options):
+        if options['purge_days'] is not None:
+            deleted = jobs.purge(timedelta(days=options['purge_days']))
+            self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} finished jobs.'))
+            return
+
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        total_ok = total_failed = 0
+        while not self.stopping:
+            succeeded, failed = jobs.run_pending(limit=options['batch_size'])
+            total_ok += succeeded
+            total_failed += failed
+            if succeeded + failed == 0:
+                if options['once']:
+                    break
+                time.sleep(options['idle_sleep'])
+
+        self.stdout.write(self.style.SUCCESS(f'Ran {total_ok} jobs, {total_failed} failed.'))
+
+    def stop(self, signum, frame):
+        # finish the current batch, then exit
+        self.stopping = True
@@ -0,0 +1,114 @@
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter so nothing is imported yet
+CHILD = r'''
+import json, os, sys, time
+started = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+booted = time.perf_counter()
+
+from django.conf import settings
+host = next((h for h in settings.ALLOWED_HOSTS if h and '*' not in h and not h.startswith('.')), 'localhost')
+path, _, query = sys.argv[1].partition('?')
+
+def request():
+    import io
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query,
+        'SERVER_NAME': host, 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': host, 'HTTP_ACCEPT': 'application/json', 'REMOTE_ADDR': '127.0.0.1',
+        'wsgi.version': (1, 0), 'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(),
+        'wsgi.errors': io.StringIO(), 'wsgi.multithread': True, 'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    status = []
+    start = time.perf_counter()
+    body = application(environ, lambda s, h, e=None: status.append(s))
+    b''.join(body)
+    getattr(body, 'close', lambda: None)()
+    return status[0], time.perf_counter() - start
+
+first_status, first = request()
+second_status, second = request()
+print(json.dumps({
+    'boot': booted - started, 'first_request': first, 'second_request': second,
+    'status': first_status, 'modules': len(sys.modules),
+}))
+'''
+
+
+def parse_importtime(stderr):
+    """
+    [(module, self_us, cumulative_us)] from `python -X importtime` output.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+class Command(BaseCommand):
+    help = 'Measure worker cold start: import time per package and time to first request'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/items/', help='Path for the first request')
+        parser.add_argument('--top', type=int, default=15, help='How many packages/modules to list')
+        parser.add_argument('--set', action='append', default=[], metavar='KEY=VALUE',
+                            help='Extra environment for the measured process, e.g. DEV_TOOLS=False')
+        parser.add_argument('--json', action='store_true', help='Print the raw report as JSON')
+
+    def handle(self, *args, **options):
+        env = dict(os.environ)
+        for assignment in options['set']:
+            key, sep, value = assignment.partition('=')
+            if not sep:
+                raise CommandError(f'--set expects KEY=VALUE, got {assignment!r}')
+            env[key] = value
+
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', CHILD, options['path']],
+            env=env, capture_output=True, text=True,
+        )
+        result_line = proc.stdout.strip().splitlines()[-1:] if proc.stdout.strip() else []
+        if proc.returncode or not result_line:
+            errors = [line for line in proc.stderr.splitlines() if not line.startswith('import time:')]
+            raise CommandError('Measured process failed:\n' + '\n'.join(errors[-20:]))
+        report = json.loads(result_line[0])
+
+        modules = parse_importtime(proc.stderr)
+        packages = defaultdict(int)
+        for name, self_us, _ in modules:
+            packages[name.split('.')[0]] += self_us
+        top = options['top']
+        report['packages'] = sorted(packages.items(), key=lambda row: -row[1])[:top]
+        report['slowest_modules'] = [
+            (name, cumulative) for name, _, cumulative in sorted(modules, key=lambda row: -row[2])[:top]
+        ]
+        report['import_total'] = sum(packages.values()) / 1e6
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(f"Imported {report['modules']} modules, {report['import_total']:.3f}s self time")
+        self.stdout.write('\nPackage                          self ms')
+        for name, self_us in report['packages']:
+            self.stdout.write(f'{name:<32} {self_us / 1000:>8.1f}')
+        self.stdout.write('\nModule (cumulative)              ms')
+        for name, cumulative in report['slowest_modules']:
+            self.stdout.write(f'{name[:32]:<32} {cumulative / 1000:>8.1f}')
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS(
+            f"Boot {report['boot'] * 1000:.0f} ms, first request {report['first_request'] * 1000:.0f} ms "
+            f"({report['status']}), second {report['second_request'] * 1000:.1f} ms"
+        ))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from core_api import snapshots
+
+class Command(BaseCommand):
+    help = 'Backfill owner display fields on trade items, or report drift with --check'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help='Only report drift, exit non-zero if any')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        drifted = list(snapshots.find_drift(batch_size=options['batch_size']))
+        for owner_id, stored, expected in drifted[:20]:
+            self.stdout.write(f'owner {owner_id}: stored {stored}, expected {expected}')
+
+        if options['check']:
+            if drifted:
+                raise CommandError(f'{len(drifted)} owner snapshots drifted.')
+            self.stdout.write(self.style.SUCCESS('Owner snapshots are in sync.'))
+            return
+
+        owners = {owner_id for owner_id, _, _ in drifted}
+        rows = sum(snapshots.sync_owner(owner_id) for owner_id in owners)
+        self.stdout.write(self.style.SUCCESS(f'Updated {rows} items of {len(owners)} owners.'))
@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from core_api import feed
+
+class Command(BaseCommand):
+    help = 'Rebuild the precomputed landing feed for /api/items/'
+
+    def handle(self, *args, **options):
+        pages = feed.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Stored {pages} feed pages.'))
@@ -0,0 +1,177 @@
+"""
+Trade matching: pairs available items whose owners want what the other has.
+
+Every available item is tokenized into what it has (title + description) and
+what it wants (interests), and the tokens are kept in ItemToken as an inverted
+index. When an item changes only that item's pairs are recomputed, and the
+results are stored in TradeMatch so reads never have to cross join.
+"""
+import math
+import re
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Q
+
+from . import jobs
+from .models import ItemToken, TradeItem, TradeMatch
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+MAX_TOKEN_LENGTH = 50
+
+STOPWORDS = frozenset("""
+a an and any are as at be but by for from have in is it its looking of on or
+some that the this to trade trading want wanted wants with would
+""".split())
+
+
+def tokenize(text):
+    """
+    Lowercased word set with stopwords dropped and simple plurals folded,
+    so "Figures" on one side matches "figure" on the other.
+    """
+    tokens = set()
+    for token in TOKEN_RE.findall((text or '').lower()):
+        if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        if len(token) < 2 or token in STOPWORDS:
+            continue
+        tokens.add(token[:MAX_TOKEN_LENGTH])
+    return tokens
+
+
+def item_tokens(item):
+    has = tokenize(f"{item.title} {item.description}")
+    want = tokenize(item.interests)
+    return has, want
+
+
+def pair_score(a_hits, a_wants, b_hits, b_wants):
+    """
+    Geometric mean of how much of each side's wishlist the other covers,
+    zero unless interest is mutual.
+    """
+    if not (a_hits and b_hits and a_wants and b_wants):
+        return 0.0
+    return math.sqrt((a_hits / a_wants) * (b_hits / b_wants))
+
+
+def _find_matches(item, has, want):
+    """
+    Scores `item` against every other indexed item using the inverted index,
+    returns {other_item_id: score}.
+    """
+    if not has or not want:
+        return {}
+
+    others = ItemToken.objects.exclude(item__owner_id=item.owner_id).exclude(item_id=item.pk)
+    # other items that have what this item wants
+    a_hits = Counter(
+        others.filter(kind=ItemToken.HAS, token__in=want).values_list('item_id', flat=True)
+    )
+    # other items that want what this item has
+    b_hits = Counter(
+        others.filter(kind=ItemToken.WANT, token__in=has).values_list('item_id', flat=True)
+    )
+    candidates = a_hits.keys() & b_hits.keys()
+    if not candidates:
+        return {}
+
+    b_wants = dict(
+        ItemToken.objects.filter(kind=ItemToken.WANT, item_id__in=candidates)
+        .values('item_id').annotate(total=Count('id')).values_list('item_id', 'total')
+    )
+    return {
+        other: pair_score(a_hits[other], len(want), b_hits[other], b_wants[other])
+        for other in candidates
+    }
+
+
+def index_item(item):
+    """
+    Refreshes the tokens and matches of a single item.
+    """
+    with transaction.atomic():
+        ItemToken.objects.filter(item=item).delete()
+        TradeMatch.objects.filter(Q(item=item) | Q(matched_item=item)).delete()
+        if item.status != 'available':
+            return
+
+        has, want = item_tokens(item)
+        ItemToken.objects.bulk_create(
+            [ItemToken(item=item, kind=ItemToken.HAS, token=token) for token in has] +
+            [ItemToken(item=item, kind=ItemToken.WANT, token=token) for token in want]
+        )
+        matches = _find_matches(item, has, want)
+        rows = []
+        for other, score in matches.items():
+            rows.append(TradeMatch(item=item, matched_item_id=other, score=score))
+            rows.append(TradeMatch(item_id=other, matched_item=item, score=score))
+        TradeMatch.objects.bulk_create(rows)
+
+
+@jobs.job('matching.index_item')
+def index_item_job(item_id):
+    item = TradeItem.objects.filter(pk=item_id).first()
+    if item is not None:
+        index_item(item)
+
+
+@jobs.job('matching.index_items')
+def index_items_job(item_ids):
+    for item in TradeItem.objects.filter(pk__in=item_ids):
+        index_item(item)
+
+
+def rebuild_index(batch_size=1000):
+    """
+    Rebuilds the whole index in memory and rewrites both tables.
+    Returns (indexed item count, match row count).
+    """
+    items = TradeItem.objects.filter(status='available').values_list(
+        'id', 'owner_id', 'title', 'description', 'interests'
+    ).iterator(chunk_size=batch_size)
+
+    owners, haves, wants = {}, {}, {}
+    has_index = defaultdict(set)
+    for item_id, owner_id, title, description, interests in items:
+        owners[item_id] = owner_id
+        haves[item_id] = tokenize(f"{title} {description}")
+        wants[item_id] = tokenize(interests)
+        for token in haves[item_id]:
+            has_index[token].add(item_id)
+
+    rows = []
+    for a, a_wants in wants.items():
+        if not a_wants or not haves[a]:
+            continue
+        a_hits = Counter()
+        for token in a_wants:
+            a_hits.update(has_index.get(token, ()))
+        for b, hits in a_hits.items():
+            # each pair is scored once, from its lower id
+            if b <= a or owners[b] == owners[a]:
+                continue
+            b_hits = len(wants[b] & haves[a])
+            score = pair_score(hits, len(a_wants), b_hits, len(wants[b]))
+            if score:
+                rows.append(TradeMatch(item_id=a, matched_item_id=b, score=score))
+                rows.append(TradeMatch(item_id=b, matched_item_id=a, score=score))
+
+    tokens = [
+        ItemToken(item_id=item_id, kind=kind, token=token)
+        for kind, index in ((ItemToken.HAS, haves), (ItemToken.WANT, wants))
+        for item_id, item_tokens_ in index.items()
+        for token in item_tokens_
+    ]
+    with transaction.atomic():
+        ItemToken.objects.all().delete()
+        TradeMatch.objects.all().delete()
+        ItemToken.objects.bulk_create(tokens, batch_size=batch_size)
+        TradeMatch.objects.bulk_create(rows, batch_size=batch_size)
+    return len(owners), len(rows)
+
+
+@jobs.job('matching.rebuild_index')
+def rebuild_index_job():
+    rebuild_index()
@@ -0,0 +1,61 @@
+import re
+
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # optional, gzip only without it
+    brotli = None
+
+re_accepts_brotli = re.compile(r"\bbr\b")
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware with a configurable size threshold (COMPRESSION_MIN_SIZE)
+    and Brotli for clients that accept it when the `brotli` package is
+    installed. Streaming responses (e.g. the wishlist event stream) are
+    passed through untouched so events aren't held back in a compressor.
+
+    Brotli has no equivalent of the random padding Django adds to gzip
+    output against BREACH, so responses that may carry secrets (CSRF
+    tokens, cookies, anything sent to an authenticated caller) always
+    take the gzip path.
+    """
+
+    def process_response(self, request, response):
+        if response.streaming or response.has_header("Content-Encoding"):
+            return response
+        if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        ae = request.META.get("HTTP_ACCEPT_ENCODING", "")
+        if brotli is None or not re_accepts_brotli.search(ae) or self.is_private(request, response):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        compressed_content = brotli.compress(
+            response.content, quality=settings.COMPRESSION_BROTLI_QUALITY
+        )
+        if len(compressed_content) >= len(response.content):
+            return response
+        response.content = compressed_content
+        response.headers["Content-Length"] = str(len(response.content))
+
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = "br"
+        return response
+
+    @staticmethod
+    def is_private(request, response):
+        if request.META.get("CSRF_COOKIE_NEEDS_UPDATE") or response.cookies:
+            return True
+        if "HTTP_AUTHORIZATION" in request.META:
+            return True
+        # DRF copies the user it authenticated onto the Django request
+        user = getattr(request, "user", None)
+        return bool(user is not None and user.is_authenticated)
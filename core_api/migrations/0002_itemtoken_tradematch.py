@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('has', 'Has'), ('want', 'Wants')], max_length=4)),
+                ('token', models.CharField(max_length=50)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tokens', to='core_api.tradeitem')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'token'], name='core_api_it_kind_f92abb_idx')],
+                'unique_together': {('item', 'kind', 'token')},
+            },
+        ),
+        migrations.CreateModel(
+            name='TradeMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='matches', to='core_api.tradeitem')),
+                ('matched_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core_api.tradeitem')),
+            ],
+            options={
+                'ordering': ['-score'],
+                'indexes': [models.Index(fields=['item', '-score'], name='core_api_tr_item_id_aa22b1_idx')],
+                'unique_together': {('item', 'matched_item')},
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_api', '0002_itemtoken_tradematch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemSimilarity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_items', to='core_api.tradeitem')),
+                ('similar_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core_api.tradeitem')),
+            ],
+            options={
+                'ordering': ['-score'],
+                'indexes': [models.Index(fields=['item', '-score'], name='core_api_it_item_id_287ba7_idx')],
+                'unique_together': {('item', 'similar_item')},
+            },
+        ),
+    ]
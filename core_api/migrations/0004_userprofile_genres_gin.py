@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:05
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+from django.utils.text import slugify
+
+# Frozen copy of core_api.genres as of this migration
+ALIASES = {
+    'scifi': 'sci-fi',
+    'science-fiction': 'sci-fi',
+    'sf': 'sci-fi',
+    'shonen': 'shounen',
+    'shoujo': 'shojo',
+    'sol': 'slice-of-life',
+    'slice-life': 'slice-of-life',
+    'romcom': 'romantic-comedy',
+    'rom-com': 'romantic-comedy',
+    'mechas': 'mecha',
+    'isekai-fantasy': 'isekai',
+}
+
+
+def normalize_genres(values):
+    seen = []
+    for value in values:
+        slug = slugify(str(value), allow_unicode=True)
+        slug = ALIASES.get(slug, slug)
+        if slug and slug not in seen:
+            seen.append(slug)
+    return seen
+
+
+def normalize_favorite_genres(apps, schema_editor):
+    UserProfile = apps.get_model('core_api', 'UserProfile')
+    changed = []
+    for profile in UserProfile.objects.exclude(favorite_genres=[]).only('id', 'favorite_genres').iterator():
+        genres = profile.favorite_genres if isinstance(profile.favorite_genres, list) else []
+        normalized = normalize_genres(str(genre) for genre in genres)
+        if normalized != profile.favorite_genres:
+            profile.favorite_genres = normalized
+            changed.append(profile)
+    UserProfile.objects.bulk_update(changed, ['favorite_genres'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_api', '0003_itemsimilarity'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_favorite_genres, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['favorite_genres'], name='core_api_profile_genres_gin'),
+        ),
+    ]
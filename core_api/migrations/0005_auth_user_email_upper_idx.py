@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('core_api', '0004_userprofile_genres_gin'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # matches the expression Django emits for email__iexact on PostgreSQL
+        migrations.RunSQL(
+            sql='CREATE INDEX CONCURRENTLY IF NOT EXISTS auth_user_email_upper_idx '
+                'ON auth_user (UPPER(email::text));',
+            reverse_sql='DROP INDEX CONCURRENTLY IF EXISTS auth_user_email_upper_idx;',
+        ),
+    ]
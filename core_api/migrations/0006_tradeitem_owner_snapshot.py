@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:17
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Avg, OuterRef, Subquery, Value
+from django.db.models.functions import NullIf
+
+
+def backfill_owner_snapshot(apps, schema_editor):
+    TradeItem = apps.get_model('core_api', 'TradeItem')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    UserProfile = apps.get_model('core_api', 'UserProfile')
+    Review = apps.get_model('core_api', 'Review')
+    owner = OuterRef('owner_id')
+    TradeItem.objects.update(
+        owner_username=Subquery(User.objects.filter(pk=owner).values('username')[:1]),
+        owner_avatar=NullIf(Subquery(UserProfile.objects.filter(user_id=owner).values('avatar')[:1]), Value('')),
+        owner_rating=Subquery(
+            Review.objects.filter(reviewee_id=owner).values('reviewee_id')
+            .annotate(rating=Avg('rating')).values('rating')
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_api', '0005_auth_user_email_upper_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tradeitem',
+            name='owner_avatar',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='profiles/'),
+        ),
+        migrations.AddField(
+            model_name='tradeitem',
+            name='owner_rating',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='tradeitem',
+            name='owner_username',
+            field=models.CharField(blank=True, default='', editable=False, max_length=150),
+        ),
+        migrations.RunPython(backfill_owner_snapshot, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='tradeitem',
+            index=models.Index(fields=['owner_username', '-created_at'], name='core_api_tr_owner_u_b5c36b_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_api', '0007_job'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TradeOffer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('message', models.TextField(blank=True, max_length=1000)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('accepted', 'Accepted'), ('declined', 'Declined'), ('countered', 'Countered'), ('cancelled', 'Cancelled'), ('completed', 'Completed')], default='pending', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('offered_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='offers_made', to='core_api.tradeitem')),
+                ('parent', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='counter_offers', to='core_api.tradeoffer')),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='offers_received', to=settings.AUTH_USER_MODEL)),
+                ('requested_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='offers_received', to='core_api.tradeitem')),
+                ('sender', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='offers_sent', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['recipient', 'status', '-created_at'], name='core_api_tr_recipie_f602c9_idx'), models.Index(fields=['sender', 'status', '-created_at'], name='core_api_tr_sender__86ba79_idx'), models.Index(fields=['recipient', '-created_at'], name='core_api_tr_recipie_ff3da1_idx'), models.Index(fields=['sender', '-created_at'], name='core_api_tr_sender__acd175_idx')],
+                'constraints': [models.CheckConstraint(condition=models.Q(('offered_item', models.F('requested_item')), _negated=True), name='core_api_tradeoffer_distinct_items')],
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.db import migrations
+
+# icontains on PostgreSQL filters on UPPER(col::text) LIKE UPPER(...), which
+# a pg_trgm GIN index over the same expression can answer
+TRIGRAM_INDEXES = {
+    'core_api_item_title_trgm': ('core_api_tradeitem', 'title'),
+    'core_api_item_owner_trgm': ('core_api_tradeitem', 'owner_username'),
+    'auth_user_username_upper_trgm': ('auth_user', 'username'),
+}
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            # search still works, it just scans; install postgresql-contrib and re-run
+            return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, (table, column) in TRIGRAM_INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin (UPPER({column}::text) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_api', '0009_tradeitem_userprofile_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_api', '0010_search_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tradeitem',
+            name='owner_trust_score',
+            field=models.FloatField(default=0.0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='trust_score',
+            field=models.FloatField(default=0.0, editable=False),
+        ),
+    ]
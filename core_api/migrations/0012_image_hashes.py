@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_api', '0011_trust_scores'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageHash',
+            fields=[
+                ('item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='image_hash', serialize=False, to='core_api.tradeitem')),
+                ('image', models.CharField(max_length=255)),
+                ('value', models.BigIntegerField()),
+                ('band_0', models.IntegerField()),
+                ('band_1', models.IntegerField()),
+                ('band_2', models.IntegerField()),
+                ('band_3', models.IntegerField()),
+                ('duplicate_of', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core_api.tradeitem')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['band_0'], name='core_api_im_band_0_fd8d9b_idx'), models.Index(fields=['band_1'], name='core_api_im_band_1_ba6948_idx'), models.Index(fields=['band_2'], name='core_api_im_band_2_31f674_idx'), models.Index(fields=['band_3'], name='core_api_im_band_3_ddf45f_idx')],
+            },
+        ),
+    ]
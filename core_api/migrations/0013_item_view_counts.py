@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_api', '0012_image_hashes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tradeitem',
+            name='trending_score',
+            field=models.FloatField(default=0.0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tradeitem',
+            name='view_count',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='tradeitem',
+            index=models.Index(fields=['-trending_score'], name='core_api_item_trending_idx'),
+        ),
+    ]
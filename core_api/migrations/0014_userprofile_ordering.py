@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:04
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_api', '0013_item_view_counts'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='userprofile',
+            options={'ordering': ['user']},
+        ),
+    ]
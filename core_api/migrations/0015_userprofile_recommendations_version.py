@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_api', '0014_userprofile_ordering'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='recommendations_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations
+
+# same as 0010, for the remaining admin search columns
+TRIGRAM_INDEXES = {
+    'core_api_item_description_trgm': ('core_api_tradeitem', 'description'),
+    'core_api_item_interests_trgm': ('core_api_tradeitem', 'interests'),
+    'core_api_profile_bio_trgm': ('core_api_userprofile', 'bio'),
+    'core_api_review_comment_trgm': ('core_api_review', 'comment'),
+}
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, (table, column) in TRIGRAM_INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin (UPPER({column}::text) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_api', '0015_userprofile_recommendations_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
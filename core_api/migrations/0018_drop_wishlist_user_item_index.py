@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:31
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_api', '0017_profilesample'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='wishlist',
+            name='core_api_wi_user_id_738597_idx',
+        ),
+    ]
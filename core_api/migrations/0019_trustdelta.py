@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core_api', '0018_drop_wishlist_user_item_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrustDelta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reviewer_id', models.BigIntegerField()),
+                ('reviewee_id', models.BigIntegerField()),
+                ('weight', models.FloatField()),
+            ],
+        ),
+    ]
@@ -1,14 +1,22 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex
+from django.utils import timezone
 from rest_framework.exceptions import ValidationError
 
+from .concurrency import VersionedModel
+
 
 # Create your models here.
-class UserProfile(models.Model):
+class UserProfile(VersionedModel):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     avatar = models.ImageField(upload_to='profiles/', blank=True, null=True)
     bio = models.TextField(max_length=500, blank=True)
     favorite_genres = models.JSONField(default=list, blank=True)
+    # Review-graph reputation, written by core_api/trust.py (1.0 is average)
+    trust_score = models.FloatField(default=0.0, editable=False)
+    # Bumped on wishlist/profile changes, part of the cached recommendations key
+    recommendations_version = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -17,8 +25,12 @@ class UserProfile(models.Model):
 
     class Meta:
         ordering = ['user']
+        indexes = [
+            # jsonb_ops, serves both @> (genres) and ?| (genres_any)
+            GinIndex(fields=['favorite_genres'], name='core_api_profile_genres_gin'),
+        ]
 
-class TradeItem(models.Model):
+class TradeItem(VersionedModel):
     STATUS_CHOICES = [
         ('available', 'Available'),
         ('traded', 'Traded'),
@@ -30,6 +42,14 @@ class TradeItem(models.Model):
     interests = models.TextField(help_text="What you're looking for in trade")
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='available')
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='trade_items')
+    # Owner display snapshot, kept in sync by signals (see core_api/snapshots.py)
+    owner_username = models.CharField(max_length=150, blank=True, default='', editable=False)
+    owner_avatar = models.ImageField(upload_to='profiles/', blank=True, null=True, editable=False)
+    owner_rating = models.FloatField(blank=True, null=True, editable=False)
+    owner_trust_score = models.FloatField(default=0.0, editable=False)
+    # Written in batches by core_api/viewcounts.py, never through save()
+    view_count = models.PositiveBigIntegerField(default=0, editable=False)
+    trending_score = models.FloatField(default=0.0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -41,8 +61,12 @@ class TradeItem(models.Model):
         indexes = [
             models.Index(fields=['status', 'created_at']),
             models.Index(fields=['owner', 'status']),
+            models.Index(fields=['owner_username', '-created_at']),
             models.Index(fields=['title']),
             models.Index(fields=['created_at']),
+            models.Index(fields=['-trending_score'], name='core_api_item_trending_idx'),
+            # trigram indexes on UPPER(title) / UPPER(owner_username) for
+            # icontains search come from migration 0010 where pg_trgm exists
         ]
 
 class Review(models.Model):
@@ -81,8 +105,228 @@ class Wishlist(models.Model):
 
     class Meta:
         ordering = ['-added_at']
-        # Ensures a user can only add an item to their wishlist once.
+        # Ensures a user can only add an item to their wishlist once; its
+        # unique index also serves lookups by (user, item)
         unique_together = [['user', 'item']]
+
+class ItemToken(models.Model):
+    """
+    Inverted index row for trade matching: one token of what an item has
+    (title/description) or wants (interests). Only available items are indexed.
+    """
+    HAS = 'has'
+    WANT = 'want'
+    KIND_CHOICES = [
+        (HAS, 'Has'),
+        (WANT, 'Wants'),
+    ]
+    item = models.ForeignKey(TradeItem, on_delete=models.CASCADE, related_name='tokens')
+    kind = models.CharField(max_length=4, choices=KIND_CHOICES)
+    token = models.CharField(max_length=50)
+
+    def __str__(self):
+        return f"{self.item_id} {self.kind} {self.token}"
+
+    class Meta:
+        unique_together = [['item', 'kind', 'token']]
         indexes = [
-            models.Index(fields=['user', 'item']),
-        ]
\ No newline at end of file
+            models.Index(fields=['kind', 'token']),
+        ]
+
+
+class TradeMatch(models.Model):
+    """
+    Precomputed mutual-interest pair: `item` wants what `matched_item` has and
+    the other way around. Stored in both directions.
+    """
+    item = models.ForeignKey(TradeItem, on_delete=models.CASCADE, related_name='matches')
+    matched_item = models.ForeignKey(TradeItem, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+
+    def __str__(self):
+        return f"{self.item_id} <-> {self.matched_item_id} ({self.score:.2f})"
+
+    class Meta:
+        ordering = ['-score']
+        unique_together = [['item', 'matched_item']]
+        indexes = [
+            models.Index(fields=['item', '-score']),
+        ]
+
+
+class ItemSimilarity(models.Model):
+    """
+    Precomputed item-item neighbour from wishlist co-occurrence (cosine),
+    rebuilt by the build_recommendations command.
+    """
+    item = models.ForeignKey(TradeItem, on_delete=models.CASCADE, related_name='similar_items')
+    similar_item = models.ForeignKey(TradeItem, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+
+    def __str__(self):
+        return f"{self.item_id} ~ {self.similar_item_id} ({self.score:.2f})"
+
+    class Meta:
+        ordering = ['-score']
+        unique_together = [['item', 'similar_item']]
+        indexes = [
+            models.Index(fields=['item', '-score']),
+        ]
+
+
+class ImageHash(models.Model):
+    """
+    64-bit difference hash of an item's image, split into four 16-bit bands
+    for multi-index Hamming search (see core_api/imagehash.py).
+    """
+    item = models.OneToOneField(TradeItem, on_delete=models.CASCADE, primary_key=True, related_name='image_hash')
+    image = models.CharField(max_length=255)  # stored name the hash was taken from
+    value = models.BigIntegerField()  # signed two's complement of the 64-bit hash
+    band_0 = models.IntegerField()
+    band_1 = models.IntegerField()
+    band_2 = models.IntegerField()
+    band_3 = models.IntegerField()
+    # same owner's near-identical listing, when flagged rather than rejected
+    duplicate_of = models.ForeignKey(
+        TradeItem, on_delete=models.SET_NULL, blank=True, null=True, related_name='+'
+    )
+
+    def __str__(self):
+        return f"{self.item_id} {self.value & 0xFFFFFFFFFFFFFFFF:016x}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['band_0']),
+            models.Index(fields=['band_1']),
+            models.Index(fields=['band_2']),
+            models.Index(fields=['band_3']),
+        ]
+
+
+class TradeOffer(models.Model):
+    """
+    One user's offer of their item for another user's item. State changes go
+    through core_api/trading.py, which locks the rows involved.
+    """
+    PENDING = 'pending'
+    ACCEPTED = 'accepted'
+    DECLINED = 'declined'
+    COUNTERED = 'countered'
+    CANCELLED = 'cancelled'
+    COMPLETED = 'completed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (ACCEPTED, 'Accepted'),
+        (DECLINED, 'Declined'),
+        (COUNTERED, 'Countered'),
+        (CANCELLED, 'Cancelled'),
+        (COMPLETED, 'Completed'),
+    ]
+    sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='offers_sent')
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='offers_received')
+    offered_item = models.ForeignKey(TradeItem, on_delete=models.CASCADE, related_name='offers_made')
+    requested_item = models.ForeignKey(TradeItem, on_delete=models.CASCADE, related_name='offers_received')
+    parent = models.ForeignKey(
+        'self', on_delete=models.SET_NULL, blank=True, null=True, related_name='counter_offers'
+    )
+    message = models.TextField(max_length=1000, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.offered_item_id} for {self.requested_item_id} ({self.status})"
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # inbox / outbox, optionally filtered by status
+            models.Index(fields=['recipient', 'status', '-created_at']),
+            models.Index(fields=['sender', 'status', '-created_at']),
+            models.Index(fields=['recipient', '-created_at']),
+            models.Index(fields=['sender', '-created_at']),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=~models.Q(offered_item=models.F('requested_item')),
+                name='core_api_tradeoffer_distinct_items',
+            ),
+        ]
+
+
+class Job(models.Model):
+    """
+    Deferred unit of work, see core_api/jobs.py. Rows stay after they finish
+    so failures can be inspected; run_jobs --purge clears old ones.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    idempotency_key = models.CharField(max_length=200, blank=True, null=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+    class Meta:
+        ordering = ['run_at']
+        indexes = [
+            models.Index(fields=['status', 'run_at']),
+        ]
+        constraints = [
+            # one pending run per key; a key can be queued again once it started
+            models.UniqueConstraint(
+                fields=['idempotency_key'], condition=models.Q(status='queued'),
+                name='core_api_job_queued_key_uniq',
+            ),
+        ]
+
+
+class ProfileSample(models.Model):
+    """
+    Samples of one folded stack on one route, summed across workers by
+    core_api/profiling.py.
+    """
+    route = models.CharField(max_length=200)
+    stack_hash = models.CharField(max_length=40)  # sha1, stacks are too long for an index
+    stack = models.TextField()
+    samples = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.route}: {self.samples}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['route', 'stack_hash'], name='core_api_profilesample_stack_uniq'),
+        ]
+
+
+class TrustDelta(models.Model):
+    """
+    A review weight change not yet folded into the trust scores. Incremental
+    refreshes in core_api/trust.py consume these instead of reloading every
+    review.
+    """
+    reviewer_id = models.BigIntegerField()
+    reviewee_id = models.BigIntegerField()
+    weight = models.FloatField()  # new minus old edge weight
+
+    def __str__(self):
+        return f"{self.reviewer_id} -> {self.reviewee_id}: {self.weight:+g}"
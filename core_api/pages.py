@@ -0,0 +1,103 @@
+"""
+Aggregated item pages: item, owner profile, owner rating summary and the
+caller's wishlist state in one response.
+
+Rendering a page used to take four requests (item, profile, user_reviews,
+wishlist). ItemPageLoader assembles the same data with one batched query
+per kind, however many items are asked for: items, owner profiles, rating
+aggregates and wishlist membership, or three queries for anonymous callers.
+Loads go through per-request Loaders, so owners shared by several items
+are fetched once (DataLoader style).
+
+The full owner profile is only returned to the owner, as on
+/api/users/<username>/profile/; everyone else gets the public subset.
+"""
+from django.db.models import Avg, Count
+
+from .models import Review, TradeItem, UserProfile, Wishlist
+from .serializers import PublicUserProfileSerializer, TradeItemDetailSerializer, UserProfileSerializer
+
+
+class Loader:
+    """
+    Per-request batching cache: `batch(keys)` returns {key: value} for the
+    keys it found and is only called for keys not loaded yet.
+    """
+
+    def __init__(self, batch):
+        self.batch = batch
+        self.cache = {}
+
+    def load_many(self, keys):
+        missing = sorted({key for key in keys if key not in self.cache})
+        if missing:
+            found = self.batch(missing)
+            for key in missing:
+                self.cache[key] = found.get(key)
+        return {key: self.cache[key] for key in keys}
+
+
+def _items(ids):
+    return TradeItem.objects.select_related('owner').in_bulk(ids)
+
+
+def _profiles(user_ids):
+    profiles = UserProfile.objects.filter(user_id__in=user_ids).select_related('user')
+    return {profile.user_id: profile for profile in profiles}
+
+
+def _ratings(user_ids):
+    rows = (
+        Review.objects.filter(reviewee_id__in=user_ids).order_by()
+        .values('reviewee_id').annotate(average=Avg('rating'), count=Count('id'))
+    )
+    return {row['reviewee_id']: row for row in rows}
+
+
+class ItemPageLoader:
+
+    def __init__(self, request):
+        self.request = request
+        self.items = Loader(_items)
+        self.profiles = Loader(_profiles)
+        self.ratings = Loader(_ratings)
+        user = request.user
+        self.wishlist = Loader(self._wishlisted) if user.is_authenticated else None
+
+    def _wishlisted(self, item_ids):
+        found = Wishlist.objects.filter(user=self.request.user, item_id__in=item_ids).values_list('item_id', flat=True)
+        return {item_id: True for item_id in found}
+
+    def _profile(self, profile, context):
+        if profile is None:
+            return None
+        if profile.user_id == self.request.user.pk:
+            return UserProfileSerializer(profile, context=context).data
+        return PublicUserProfileSerializer(profile, context=context).data
+
+    def pages(self, item_ids):
+        """
+        Page payloads for the items that exist, in the order asked for.
+        """
+        items = [item for item in self.items.load_many(item_ids).values() if item is not None]
+        owner_ids = [item.owner_id for item in items]
+        profiles = self.profiles.load_many(owner_ids)
+        ratings = self.ratings.load_many(owner_ids)
+        wishlisted = self.wishlist.load_many([item.pk for item in items]) if self.wishlist else {}
+
+        context = {'request': self.request}
+        pages = []
+        for item in items:
+            profile = profiles[item.owner_id]
+            rating = ratings[item.owner_id] or {}
+            pages.append({
+                'item': TradeItemDetailSerializer(item, context=context).data,
+                'owner_profile': self._profile(profile, context),
+                'rating': {
+                    'average_rating': rating.get('average') or 0,
+                    'review_count': rating.get('count', 0),
+                    'trust_score': profile.trust_score if profile else 0.0,
+                },
+                'in_wishlist': bool(wishlisted.get(item.pk)) if self.wishlist else None,
+            })
+        return pages
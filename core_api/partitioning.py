@@ -0,0 +1,284 @@
+"""
+Optional monthly range partitioning on created_at (PostgreSQL).
+
+`manage.py partition_tables convert core_api.Review` turns a table into a
+declaratively partitioned one in a single transaction, without copying
+rows:
+
+* the existing table is renamed to <table>_p_legacy and attached as the
+  partition for everything before the first day of next month;
+* the new parent keeps the table name, column defaults, CHECK constraints,
+  outbound foreign keys and Meta/migration index names, so the ORM and later
+  AddField/AddIndex migrations work unchanged;
+* the id sequence moves to the parent, and the primary key becomes
+  (id, created_at), since PostgreSQL requires the partition key in every
+  unique constraint.
+
+That last rule has two consequences, and convert refuses both unless told
+otherwise. Foreign keys *into* the table (Wishlist -> TradeItem, say) can't
+reference a partitioned table's id. --drop-inbound-fks drops them; Django
+still emulates on_delete, but the database stops checking integrity.
+Unique constraints without created_at (Review's reviewer/reviewee pair)
+can only be kept per partition. --relax-unique extends them with
+created_at, leaving the model/serializer validation to keep them
+globally.
+
+Only Review is in PARTITIONING['MODELS'] by default. TradeItem is not
+supported: Wishlist, TradeMatch, ItemSimilarity, ImageHash and TradeOffer all
+reference it, and dropping those foreign keys would leave every one of them
+without integrity checks.
+
+`partition_tables maintain` creates the next PARTITIONING['MONTHS_AHEAD']
+months of partitions, and with --detach it detaches partitions older than
+RETAIN_MONTHS, which stay behind as plain tables for archiving. Run it from
+cron: there is no default partition, so inserts past the last month fail.
+
+Range filters on created_at are pruned to the matching partitions by the
+planner.
+"""
+import re
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from django.db import connection, transaction
+
+PARTITION_KEY = 'created_at'
+LEGACY_SUFFIX = '_p_legacy'
+BOUND_RE = re.compile(r"FROM \((.+?)\) TO \((.+?)\)")
+
+
+class PartitioningError(Exception):
+    pass
+
+
+@dataclass
+class Partition:
+    name: str
+    lower: datetime  # None for MINVALUE
+    upper: datetime
+
+
+def month_start(value, offset=0):
+    month = value.year * 12 + value.month - 1 + offset
+    return datetime(month // 12, month % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def _quote(name):
+    return connection.ops.quote_name(name)
+
+
+def _fetch(sql, params=()):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def _execute(statements, log):
+    with connection.cursor() as cursor:
+        for sql in statements:
+            log(sql)
+            cursor.execute(sql)
+
+
+def is_partitioned(table):
+    return bool(_fetch(
+        'SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid '
+        'WHERE c.relname = %s AND c.relnamespace = current_schema()::regnamespace', [table]
+    ))
+
+
+def inbound_foreign_keys(table):
+    """
+    [(referencing table, constraint name)] for foreign keys pointing at `table`.
+    """
+    return _fetch(
+        'SELECT conrelid::regclass::text, conname FROM pg_constraint '
+        'WHERE contype = %s AND confrelid = %s::regclass AND conrelid <> confrelid ORDER BY 1, 2',
+        ['f', table],
+    )
+
+
+def global_uniques(table):
+    """
+    [(name, definition)] of unique constraints (other than the primary key)
+    and unique indexes that don't include the partition key.
+    """
+    rows = _fetch(
+        'SELECT i.relname, pg_get_indexdef(x.indexrelid), '
+        'ARRAY(SELECT a.attname FROM pg_attribute a WHERE a.attrelid = x.indrelid AND a.attnum = ANY(x.indkey)) '
+        'FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid '
+        'WHERE x.indrelid = %s::regclass AND x.indisunique AND NOT x.indisprimary ORDER BY 1',
+        [table],
+    )
+    return [(name, definition) for name, definition, columns in rows if PARTITION_KEY not in columns]
+
+
+def blockers(table, drop_inbound_fks=False, relax_unique=False):
+    """
+    Reasons `table` can't be converted with the given flags.
+    """
+    reasons = []
+    if not drop_inbound_fks:
+        reasons += [
+            f'{referencing}.{name} references {table} (--drop-inbound-fks)'
+            for referencing, name in inbound_foreign_keys(table)
+        ]
+    if not relax_unique:
+        reasons += [f'unique {name} excludes {PARTITION_KEY} (--relax-unique)' for name, _ in global_uniques(table)]
+    return reasons
+
+
+def partitions(table):
+    """
+    The table's partitions, oldest first.
+    """
+    rows = _fetch(
+        'SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i '
+        'JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = %s::regclass',
+        [table],
+    )
+    found = []
+    for name, bound in rows:
+        match = BOUND_RE.search(bound)
+        if match is None:
+            continue
+        lower, upper = (None if value == 'MINVALUE' else _parse_bound(value) for value in match.groups())
+        found.append(Partition(name, lower, upper))
+    return sorted(found, key=lambda p: p.upper)
+
+
+def _parse_bound(value):
+    value = value.strip("'")
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT %s::timestamptz', [value])
+        return cursor.fetchone()[0].astimezone(timezone.utc)
+
+
+def _partition_name(table, start):
+    return f'{table}_p{start:%Y%m}'
+
+
+def _create_partition_sql(table, start):
+    end = month_start(start, 1)
+    return (
+        f'CREATE TABLE IF NOT EXISTS {_quote(_partition_name(table, start))} PARTITION OF {_quote(table)} '
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+
+
+def convert(table, months_ahead=3, drop_inbound_fks=False, relax_unique=False, now=None, log=lambda sql: None):
+    """
+    Converts `table` in place; returns the statements run.
+    """
+    if is_partitioned(table):
+        raise PartitioningError(f'{table} is already partitioned')
+    reasons = blockers(table, drop_inbound_fks, relax_unique)
+    if reasons:
+        raise PartitioningError(f'{table} cannot be partitioned: ' + '; '.join(reasons))
+
+    now = now or datetime.now(timezone.utc)
+    boundary = month_start(now, 1)
+    legacy = table + LEGACY_SUFFIX
+    statements = []
+    run = statements.append
+
+    with transaction.atomic():
+        # deferred FK checks still pending in this transaction would block the ALTERs
+        _execute(['SET CONSTRAINTS ALL IMMEDIATE', f'LOCK TABLE {_quote(table)} IN ACCESS EXCLUSIVE MODE'], log)
+        for referencing, name in inbound_foreign_keys(table):
+            run(f'ALTER TABLE {referencing} DROP CONSTRAINT {_quote(name)}')
+
+        constraint_indexes = {name for (name,) in _fetch(
+            'SELECT conindid::regclass::text FROM pg_constraint WHERE conrelid = %s::regclass AND contype IN (%s, %s)',
+            [table, 'p', 'u'],
+        )}
+        indexes = _fetch(
+            'SELECT indexname, indexdef FROM pg_indexes WHERE schemaname = current_schema() AND tablename = %s '
+            'ORDER BY indexname', [table],
+        )
+        pk_name, pk_columns = _fetch(
+            'SELECT conname, ARRAY(SELECT attname FROM pg_attribute WHERE attrelid = conrelid AND attnum = ANY(conkey)) '
+            'FROM pg_constraint WHERE conrelid = %s::regclass AND contype = %s', [table, 'p'],
+        )[0]
+        uniques = _fetch(
+            'SELECT conname, ARRAY(SELECT attname FROM pg_attribute WHERE attrelid = conrelid AND attnum = ANY(conkey)) '
+            'FROM pg_constraint WHERE conrelid = %s::regclass AND contype = %s ORDER BY conname', [table, 'u'],
+        )
+        foreign_keys = _fetch(
+            'SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint '
+            'WHERE conrelid = %s::regclass AND contype = %s ORDER BY conname', [table, 'f'],
+        )
+        sequence = _fetch('SELECT pg_get_serial_sequence(%s, %s)', [table, 'id'])[0][0]
+        identity = _fetch(
+            'SELECT attidentity FROM pg_attribute WHERE attrelid = %s::regclass AND attname = %s', [table, 'id']
+        )[0][0]
+        next_id = _fetch(f'SELECT COALESCE(MAX(id), 0) + 1 FROM {_quote(table)}')[0][0]
+
+        # index names are schema-wide, hand the originals over to the parent
+        renamed = {name: f'{legacy}_{number}' for number, (name, _) in enumerate(indexes)}
+        for name, new_name in renamed.items():
+            run(f'ALTER INDEX {_quote(name)} RENAME TO {_quote(new_name)}')
+        run(f'ALTER TABLE {_quote(table)} RENAME TO {_quote(legacy)}')
+        if identity:
+            run(f'ALTER TABLE {_quote(legacy)} ALTER COLUMN id DROP IDENTITY')
+            sequence = None
+        run(
+            f'CREATE TABLE {_quote(table)} (LIKE {_quote(legacy)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+            f'PARTITION BY RANGE ({_quote(PARTITION_KEY)})'
+        )
+        if sequence is None:
+            sequence = f'{table}_id_seq'
+            run(f'CREATE SEQUENCE {_quote(sequence)} START {next_id}')
+            run(f"ALTER TABLE {_quote(table)} ALTER COLUMN id SET DEFAULT nextval('{sequence}'::regclass)")
+            run(f"ALTER TABLE {_quote(legacy)} ALTER COLUMN id SET DEFAULT nextval('{sequence}'::regclass)")
+        run(f'ALTER SEQUENCE {sequence} OWNED BY {_quote(table)}.id')
+
+        key = ', '.join(map(_quote, [column for column in pk_columns if column != PARTITION_KEY] + [PARTITION_KEY]))
+        run(f'ALTER TABLE {_quote(table)} ADD CONSTRAINT {_quote(pk_name)} PRIMARY KEY ({key})')
+        # the partition's key has to match the parent's; this builds one index over the old rows
+        run(f'ALTER TABLE {_quote(legacy)} DROP CONSTRAINT {_quote(renamed[pk_name])}')
+        run(f'ALTER TABLE {_quote(legacy)} ADD CONSTRAINT {_quote(legacy + "_pkey")} PRIMARY KEY ({key})')
+        for name, columns in uniques:
+            columns = [column for column in columns if column != PARTITION_KEY] + [PARTITION_KEY]
+            run(f'ALTER TABLE {_quote(table)} ADD CONSTRAINT {_quote(name)} UNIQUE ({", ".join(map(_quote, columns))})')
+        for name, definition in foreign_keys:
+            run(f'ALTER TABLE {_quote(table)} ADD CONSTRAINT {_quote(name)} {definition}')
+        for name, definition in indexes:
+            if name not in constraint_indexes:
+                run(definition)
+
+        run(
+            f'ALTER TABLE {_quote(table)} ATTACH PARTITION {_quote(legacy)} '
+            f"FOR VALUES FROM (MINVALUE) TO ('{boundary.isoformat()}')"
+        )
+        for offset in range(months_ahead + 1):
+            run(_create_partition_sql(table, month_start(boundary, offset)))
+        _execute(statements, log)
+    return statements
+
+
+def maintain(table, months_ahead=3, retain_months=None, detach=False, now=None, log=lambda sql: None):
+    """
+    Creates missing future partitions and, with `detach`, detaches those
+    entirely older than `retain_months`. Returns (created, detached) names.
+    """
+    if not is_partitioned(table):
+        raise PartitioningError(f'{table} is not partitioned, run convert first')
+    now = now or datetime.now(timezone.utc)
+    existing = partitions(table)
+    statements, created, detached = [], [], []
+    # with every partition detached, start over from the current month
+    start = max((partition.upper for partition in existing), default=month_start(now))
+    while start < month_start(now, months_ahead + 1):
+        statements.append(_create_partition_sql(table, start))
+        created.append(_partition_name(table, start))
+        start = month_start(start, 1)
+    if detach and retain_months is not None:
+        cutoff = month_start(now, -retain_months)
+        for partition in existing:
+            if partition.upper <= cutoff:
+                statements.append(f'ALTER TABLE {_quote(table)} DETACH PARTITION {_quote(partition.name)}')
+                detached.append(partition.name)
+    with transaction.atomic():
+        _execute(statements, log)
+    return created, detached
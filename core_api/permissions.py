@@ -1,5 +1,7 @@
 from rest_framework import permissions
 
+from .authentication import InternalService
+
 
 class IsOwnerOrReadOnly(permissions.BasePermission):
     """
@@ -45,4 +47,13 @@ class CanReviewUser(permissions.BasePermission):
             return False
 
         # Don't allow users to review themselves
-        return str(request.user.id) != str(reviewee_id)
\ No newline at end of file
+        return str(request.user.id) != str(reviewee_id)
+
+
+class IsInternalService(permissions.BasePermission):
+    """
+    Only allows requests authenticated by InternalServiceAuthentication.
+    """
+
+    def has_permission(self, request, view):
+        return isinstance(request.user, InternalService)
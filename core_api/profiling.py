@@ -0,0 +1,164 @@
+"""
+On-demand sampling profiler for single API requests.
+
+With PROFILING['ENABLED'], SamplingProfilerMiddleware is added to the
+stack. Staff requests carrying the `X-Profile: 1` header, by session or JWT,
+are then sampled at PROFILING['SAMPLE_RATE']. A background thread reads the
+request thread's stack from sys._current_frames() every INTERVAL seconds
+while the view runs. Other requests pay one header lookup. With the setting
+off the middleware isn't installed at all.
+
+Stacks are summed per route (URL name) in the ProfileSample table with one
+INSERT ... ON CONFLICT DO UPDATE per request, so concurrent requests from
+every worker add up without losing samples. /admin/profiling/ lists the
+profiled routes, and /admin/profiling/?route=<name> returns the route's
+MAX_STACKS heaviest stacks in the folded `frame;frame;frame count` format
+that flamegraph.pl and speedscope read.
+"""
+import hashlib
+import random
+import sys
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Sum
+from django.http import HttpResponse, JsonResponse
+from rest_framework.exceptions import APIException
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .models import ProfileSample
+
+
+def _options():
+    return settings.PROFILING
+
+
+def _stack_hash(stack):
+    return hashlib.sha1(stack.encode()).hexdigest()
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    module = frame.f_globals.get('__name__', '?')
+    return f'{module}:{code.co_name}:{frame.f_lineno}'.replace(';', ':').replace(' ', '_')
+
+
+class Sampler(threading.Thread):
+    """
+    Counts folded stacks of `thread_id` below `root` until stopped.
+    """
+
+    def __init__(self, thread_id, root, interval):
+        super().__init__(name='request-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.root = root
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and frame is not self.root:
+                stack.append(_frame_name(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+        return self.stacks
+
+
+def record(route, stacks):
+    """
+    Merges a request's samples into the route's totals.
+    """
+    if not stacks:
+        return
+    table = ProfileSample._meta.db_table
+    # sorted, so concurrent requests lock conflicting rows in the same order
+    rows = sorted((_stack_hash(stack), stack, count) for stack, count in stacks.items())
+    hashes, texts, counts = zip(*rows)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (route, stack_hash, stack, samples, updated_at) '
+            f'SELECT %s, h, s, n, now() FROM unnest(%s::varchar[], %s::text[], %s::bigint[]) AS v(h, s, n) '
+            f'ON CONFLICT (route, stack_hash) DO UPDATE '
+            f'SET samples = {table}.samples + EXCLUDED.samples, updated_at = EXCLUDED.updated_at',
+            [route, list(hashes), list(texts), list(counts)],
+        )
+
+
+def routes():
+    return dict(ProfileSample.objects.values('route').annotate(total=Sum('samples')).values_list('route', 'total'))
+
+
+def folded(route):
+    rows = (
+        ProfileSample.objects.filter(route=route).order_by('-samples')
+        .values_list('stack', 'samples')[:_options()['MAX_STACKS']]
+    )
+    return ''.join(f'{stack} {count}\n' for stack, count in sorted(rows))
+
+
+def clear():
+    ProfileSample.objects.all().delete()
+
+
+def _is_staff(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.is_staff
+    try:
+        result = JWTAuthentication().authenticate(request)
+    except APIException:
+        return False
+    return result is not None and result[0].is_staff
+
+
+def _route(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.view_name or match.route
+
+
+class SamplingProfilerMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        options = _options()
+        if request.META.get(options['HEADER']) != '1':
+            return self.get_response(request)
+        if random.random() >= options['SAMPLE_RATE'] or not _is_staff(request):
+            return self.get_response(request)
+
+        sampler = Sampler(threading.get_ident(), sys._getframe(), options['INTERVAL'])
+        sampler.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            stacks = sampler.stop()
+        record(_route(request), stacks)
+        response['X-Profile-Samples'] = str(sum(stacks.values()))
+        return response
+
+
+def profiling_view(request):
+    """
+    Admin endpoint: profiled routes, or one route's folded stacks.
+    """
+    if request.method == 'POST' and request.POST.get('clear'):
+        clear()
+        return JsonResponse({'cleared': True})
+    route = request.GET.get('route')
+    if route is None:
+        return JsonResponse({'routes': routes()})
+    return HttpResponse(folded(route), content_type='text/plain; charset=utf-8')
@@ -0,0 +1,148 @@
+"""
+Personalized item recommendations.
+
+The heavy part, item-item similarity from wishlist co-occurrence, is computed
+offline by the build_recommendations command and stored in ItemSimilarity.
+Per request we only sum the neighbours of the user's wishlist, blend in how
+well items match the user's favorite genres (through the matching token index)
+and cache the ranked ids per user in the bounded 'recommendations' cache.
+
+Cache keys carry versions read from the database, the user's
+UserProfile.recommendations_version and the id of the latest ItemSimilarity
+build, so invalidation holds across processes even with a per-process cache.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F, Max
+
+from .matching import tokenize
+from .models import ItemSimilarity, ItemToken, TradeItem, UserProfile, Wishlist
+
+
+def _cache():
+    return caches['recommendations']
+
+
+def _user_key(user_id):
+    version = UserProfile.objects.filter(user_id=user_id).values_list('recommendations_version', flat=True).first()
+    # rebuild_similarities replaces every row, so the highest id identifies the build
+    build = ItemSimilarity.objects.aggregate(build=Max('id'))['build']
+    return f'recommendations:{build or 0}:{user_id}:{version or 0}'
+
+
+def invalidate_user(user_id):
+    UserProfile.objects.filter(user_id=user_id).update(recommendations_version=F('recommendations_version') + 1)
+
+
+def compute_item_similarities(pairs, top_k):
+    """
+    Cosine similarity between items from (user_id, item_id) wishlist pairs.
+    Returns (item_id, similar_item_id, score) rows, top_k per item.
+    """
+    import numpy as np
+    from scipy import sparse
+
+    if not pairs:
+        return []
+    users, items = np.array(pairs, dtype=np.int64).T
+    user_ids, user_idx = np.unique(users, return_inverse=True)
+    item_ids, item_idx = np.unique(items, return_inverse=True)
+
+    # user x item incidence, item x item co-occurrence counts
+    incidence = sparse.csr_matrix(
+        (np.ones(len(user_idx), dtype=np.float64), (user_idx, item_idx)),
+        shape=(len(user_ids), len(item_ids))
+    )
+    cooccurrence = (incidence.T @ incidence).tocsr()
+    norms = np.sqrt(cooccurrence.diagonal())
+    cooccurrence.setdiag(0)
+    cooccurrence.eliminate_zeros()
+    inverse_norms = sparse.diags(1.0 / norms)
+    similarity = (inverse_norms @ cooccurrence @ inverse_norms).tocsr()
+
+    rows = []
+    for i in range(similarity.shape[0]):
+        start, end = similarity.indptr[i], similarity.indptr[i + 1]
+        if start == end:
+            continue
+        scores = similarity.data[start:end]
+        columns = similarity.indices[start:end]
+        if len(scores) > top_k:
+            best = np.argpartition(-scores, top_k)[:top_k]
+            scores, columns = scores[best], columns[best]
+        for column, score in zip(columns, scores):
+            rows.append((int(item_ids[i]), int(item_ids[column]), float(score)))
+    return rows
+
+
+def rebuild_similarities(top_k=None, batch_size=1000):
+    """
+    Recomputes ItemSimilarity from all wishlists and drops cached results.
+    Returns the number of stored rows.
+    """
+    top_k = top_k or settings.RECOMMENDATIONS['NEIGHBOURS']
+    pairs = list(
+        Wishlist.objects.filter(item__status='available')
+        .values_list('user_id', 'item_id').iterator(chunk_size=batch_size)
+    )
+    rows = compute_item_similarities(pairs, top_k)
+    with transaction.atomic():
+        ItemSimilarity.objects.all().delete()
+        ItemSimilarity.objects.bulk_create(
+            [ItemSimilarity(item_id=a, similar_item_id=b, score=score) for a, b, score in rows],
+            batch_size=batch_size
+        )
+    return len(rows)
+
+
+def _rank(user):
+    options = settings.RECOMMENDATIONS
+    wishlisted = set(Wishlist.objects.filter(user=user).values_list('item_id', flat=True))
+
+    scores = defaultdict(float)
+    if wishlisted:
+        neighbours = ItemSimilarity.objects.filter(item_id__in=wishlisted).values_list(
+            'similar_item_id', 'score'
+        )
+        for item_id, score in neighbours:
+            scores[item_id] += options['COOCCURRENCE_WEIGHT'] * score
+
+    genres = UserProfile.objects.filter(user=user).values_list('favorite_genres', flat=True).first()
+    genre_tokens = set()
+    for genre in genres or []:
+        genre_tokens |= tokenize(str(genre))
+    if genre_tokens:
+        hits = defaultdict(int)
+        for item_id in ItemToken.objects.filter(
+            kind=ItemToken.HAS, token__in=genre_tokens
+        ).values_list('item_id', flat=True):
+            hits[item_id] += 1
+        for item_id, count in hits.items():
+            scores[item_id] += options['GENRE_WEIGHT'] * count / len(genre_tokens)
+
+    for item_id in wishlisted:
+        scores.pop(item_id, None)
+    if not scores:
+        return []
+
+    candidates = sorted(scores, key=scores.get, reverse=True)[:options['LIMIT'] * 2]
+    eligible = set(
+        TradeItem.objects.filter(id__in=candidates, status='available')
+        .exclude(owner=user).values_list('id', flat=True)
+    )
+    return [(item_id, scores[item_id]) for item_id in candidates if item_id in eligible][:options['LIMIT']]
+
+
+def recommend(user):
+    """
+    Ranked [(item_id, score)] for the user, served from cache when possible.
+    """
+    key = _user_key(user.pk)
+    ranked = _cache().get(key)
+    if ranked is None:
+        ranked = _rank(user)
+        _cache().set(key, ranked)
+    return ranked
@@ -0,0 +1,53 @@
+"""
+Password hashing for registration, with bounded concurrency.
+
+PBKDF2 is pure CPU, so a burst of sign-ups can take every worker thread.
+Hashing still runs on the request thread (handing it to another thread
+would only leave this one blocked on the result), but at most
+PASSWORD_HASH_WORKERS requests hash at once and at most
+PASSWORD_HASH_QUEUE_SIZE more wait, each for up to PASSWORD_HASH_WAIT
+seconds. Anything beyond that fails fast with a 503 instead of queueing
+behind everyone else.
+"""
+import threading
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class HashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Registration is busy, please try again shortly.'
+    default_code = 'service_unavailable'
+
+
+_lock = threading.Lock()
+_admitted = None
+_running = None
+
+
+def _limits():
+    global _admitted, _running
+    with _lock:
+        if _running is None:
+            workers = settings.PASSWORD_HASH_WORKERS
+            _admitted = threading.BoundedSemaphore(workers + settings.PASSWORD_HASH_QUEUE_SIZE)
+            _running = threading.BoundedSemaphore(workers)
+    return _admitted, _running
+
+
+def hash_password(raw_password):
+    admitted, running = _limits()
+    if not admitted.acquire(blocking=False):
+        raise HashingBusy()
+    try:
+        if not running.acquire(timeout=settings.PASSWORD_HASH_WAIT):
+            raise HashingBusy()
+        try:
+            return make_password(raw_password)
+        finally:
+            running.release()
+    finally:
+        admitted.release()
@@ -1,7 +1,13 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.db import transaction
 from django.contrib.auth.password_validation import validate_password
-from .models import UserProfile, TradeItem, Review, Wishlist
+from .fieldsets import SparseFieldsetMixin
+from .genres import MAX_GENRES, normalize_genre, normalize_genres
+from . import imagehash, trading
+from .models import UserProfile, TradeItem, Review, Wishlist, TradeMatch, TradeOffer
+from .registration import hash_password
 
 
 # Basic User serializer for nested relationships
@@ -13,64 +19,133 @@ class UserSerializer(serializers.ModelSerializer):
 
 
 # UserProfile serializer
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
 
     class Meta:
         model = UserProfile
-        fields = ('id', 'user', 'avatar', 'bio', 'favorite_genres', 'created_at', 'updated_at')
-        read_only_fields = ('created_at', 'updated_at')
+        fields = ('id', 'user', 'avatar', 'bio', 'favorite_genres', 'trust_score', 'created_at', 'updated_at')
+        expandable_fields = ('user',)
+        read_only_fields = ('trust_score', 'created_at', 'updated_at')
 
     def validate_avatar(self, value):
         if value and value.size > 2 * 1024 * 1024:  # 2MB limit
             raise serializers.ValidationError("Image size cannot exceed 2MB")
         return value
 
+    def validate_favorite_genres(self, value):
+        if not isinstance(value, list) or not all(isinstance(genre, str) for genre in value):
+            raise serializers.ValidationError("Favorite genres must be a list of strings")
+        if any(genre.strip() and not normalize_genre(genre) for genre in value):
+            raise serializers.ValidationError("Genre names need at least one letter or digit")
+        genres = normalize_genres(value)
+        if len(genres) > MAX_GENRES:
+            raise serializers.ValidationError(f"You can pick at most {MAX_GENRES} genres")
+        return genres
+
+
+class PublicUserProfileSerializer(serializers.ModelSerializer):
+    """
+    The parts of a profile anyone may see, for embedding in public payloads.
+    """
+    username = serializers.CharField(source='user.username', read_only=True)
+
+    class Meta:
+        model = UserProfile
+        fields = ('username', 'avatar', 'trust_score')
+        read_only_fields = fields
+
 
 # TradeItem serializers
-class TradeItemSerializer(serializers.ModelSerializer):
+class TradeItemSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     owner = UserSerializer(read_only=True)
 
     class Meta:
         model = TradeItem
         fields = ('id', 'title', 'description', 'image', 'interests',
                   'status', 'owner', 'created_at', 'updated_at')
+        expandable_fields = ('owner',)
         read_only_fields = ('created_at', 'updated_at', 'owner')
 
     def validate_image(self, value):
         if value and value.size > 5 * 1024 * 1024:  # 5MB limit
             raise serializers.ValidationError("Image size cannot exceed 5MB")
+        self._image_hash = imagehash.dhash(value) if value else None
         return value
 
+    def validate(self, attrs):
+        # near-identical re-uploads of the owner's other listings
+        image_hash = getattr(self, '_image_hash', None)
+        if image_hash is not None and settings.IMAGE_HASH['DUPLICATES'] == 'reject':
+            owner_id = self.instance.owner_id if self.instance else self.context['request'].user.pk
+            duplicate = imagehash.find_duplicate(
+                image_hash, owner_id, exclude=self.instance.pk if self.instance else None
+            )
+            if duplicate is not None:
+                raise serializers.ValidationError(
+                    {'image': f"This image looks like a duplicate of your listing #{duplicate}."}
+                )
+        return attrs
+
     def create(self, validated_data):
         # Set the owner to the current user
         validated_data['owner'] = self.context['request'].user
-        return super().create(validated_data)
+        instance = super().create(validated_data)
+        self._index_image(instance)
+        return instance
+
+    def update(self, instance, validated_data):
+        instance = super().update(instance, validated_data)
+        self._index_image(instance)
+        return instance
+
+    def _index_image(self, instance):
+        # the hash is already computed, so the post_save job finds it current
+        image_hash = getattr(self, '_image_hash', None)
+        if image_hash is not None:
+            imagehash.index_item(instance, image_hash)
 
 
 # Optimized list serializer for TradeItems
-class TradeItemListSerializer(serializers.ModelSerializer):
-    owner_username = serializers.CharField(source='owner.username', read_only=True)
+# Owner fields come from the denormalized snapshot columns, no join needed
+class TradeItemListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
 
     class Meta:
         model = TradeItem
-        fields = ('id', 'title', 'status', 'owner_username', 'image', 'created_at')
-        read_only_fields = ('created_at', 'owner_username')
+        fields = ('id', 'title', 'status', 'owner_username', 'owner_avatar', 'owner_rating', 'owner_trust_score',
+                  'image', 'created_at')
+        read_only_fields = ('created_at', 'owner_username', 'owner_avatar', 'owner_rating', 'owner_trust_score')
+
+
+# Precomputed trade match, the other item rendered like a list row
+class TradeMatchSerializer(serializers.ModelSerializer):
+    matched_item = TradeItemListSerializer(read_only=True)
+
+    class Meta:
+        model = TradeMatch
+        fields = ('matched_item', 'score')
+
+
+# Near-duplicate image lookup result
+class SimilarItemSerializer(serializers.Serializer):
+    item = TradeItemListSerializer(read_only=True)
+    distance = serializers.IntegerField(read_only=True)
 
 
 # Detailed serializer for TradeItems
-class TradeItemDetailSerializer(serializers.ModelSerializer):
+class TradeItemDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     owner = UserSerializer(read_only=True)
 
     class Meta:
         model = TradeItem
         fields = ('id', 'title', 'description', 'image', 'interests',
                   'status', 'owner', 'created_at', 'updated_at')
+        expandable_fields = ('owner',)
         read_only_fields = ('created_at', 'updated_at', 'owner')
 
 
 # Review serializer
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     reviewer = UserSerializer(read_only=True)
     reviewee = UserSerializer(read_only=True)
     reviewee_id = serializers.PrimaryKeyRelatedField(
@@ -82,6 +157,7 @@ class ReviewSerializer(serializers.ModelSerializer):
     class Meta:
         model = Review
         fields = ('id', 'reviewer', 'reviewee', 'reviewee_id', 'rating', 'comment', 'created_at')
+        expandable_fields = ('reviewer', 'reviewee')
         read_only_fields = ('created_at', 'reviewer')
 
     def validate(self, attrs):
@@ -97,7 +173,7 @@ class ReviewSerializer(serializers.ModelSerializer):
 
 
 # Wishlist serializer
-class WishlistSerializer(serializers.ModelSerializer):
+class WishlistSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     item = TradeItemSerializer(read_only=True)
     item_id = serializers.PrimaryKeyRelatedField(
@@ -109,6 +185,7 @@ class WishlistSerializer(serializers.ModelSerializer):
     class Meta:
         model = Wishlist
         fields = ('id', 'user', 'item', 'item_id', 'added_at')
+        expandable_fields = ('user', 'item')
         read_only_fields = ('added_at', 'user')
 
     def create(self, validated_data):
@@ -139,6 +216,7 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         }
 
     def validate_email(self, value):
+        # served by the UPPER(email) index from migration 0005
         if User.objects.filter(email__iexact=value).exists():
             raise serializers.ValidationError("A user with that email already exists.")
         return value
@@ -150,12 +228,44 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         validated_data.pop('password2')
-        user = User.objects.create_user(
-            username=validated_data['username'],
-            email=validated_data['email'],
-            password=validated_data['password'],
+        # hash before opening the transaction so it isn't held during PBKDF2
+        password = hash_password(validated_data['password'])
+        user = User(
+            username=User.normalize_username(validated_data['username']),
+            email=User.objects.normalize_email(validated_data['email']),
+            password=password,
             first_name=validated_data.get('first_name', ''),
             last_name=validated_data.get('last_name', '')
         )
+        # the user and its profile (create_user_profile signal) commit together
+        with transaction.atomic():
+            user.save()
 
         return user
+
+
+# Trade offer serializer, writes go through core_api/trading.py
+class TradeOfferSerializer(serializers.ModelSerializer):
+    sender = serializers.CharField(source='sender.username', read_only=True)
+    recipient = serializers.CharField(source='recipient.username', read_only=True)
+    offered_item = TradeItemListSerializer(read_only=True)
+    requested_item = TradeItemListSerializer(read_only=True)
+    offered_item_id = serializers.PrimaryKeyRelatedField(
+        queryset=TradeItem.objects.all(),
+        write_only=True,
+        source='offered_item'
+    )
+    requested_item_id = serializers.PrimaryKeyRelatedField(
+        queryset=TradeItem.objects.all(),
+        write_only=True,
+        source='requested_item'
+    )
+
+    class Meta:
+        model = TradeOffer
+        fields = ('id', 'sender', 'recipient', 'offered_item', 'requested_item', 'offered_item_id',
+                  'requested_item_id', 'message', 'status', 'parent', 'created_at', 'updated_at')
+        read_only_fields = ('status', 'parent', 'created_at', 'updated_at')
+
+    def create(self, validated_data):
+        return trading.create_offer(self.context['request'].user, **validated_data)
@@ -1,10 +1,145 @@
 # core_api/signals.py
-from django.db.models.signals import post_save
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
 from django.contrib.auth.models import User
 from django.dispatch import receiver
-from .models import UserProfile
+from . import events, feed, imagehash, matching, recommendations, snapshots, trust
+from .models import UserProfile, TradeItem, Review, Wishlist
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
     if created:
-        UserProfile.objects.create(user=instance)
\ No newline at end of file
+        UserProfile.objects.create(user=instance)
+
+
+@receiver(post_init, sender=TradeItem)
+def remember_trade_item_status(sender, instance, **kwargs):
+    # read from __dict__ so a deferred status field doesn't trigger a query
+    instance._loaded_status = instance.__dict__.get('status')
+    instance._loaded_owner_id = instance.__dict__.get('owner_id')
+    instance._loaded_image = _file_name(instance.__dict__.get('image'))
+
+
+@receiver(post_init, sender=Review)
+def remember_review_reviewee(sender, instance, **kwargs):
+    # a moved review changes both users' ratings
+    instance._loaded_reviewee_id = instance.__dict__.get('reviewee_id')
+    loaded = instance.pk is not None and {'reviewer_id', 'reviewee_id', 'rating'} <= instance.__dict__.keys()
+    instance._loaded_edge = trust.edge(instance) if loaded else None
+
+
+def _file_name(value):
+    return getattr(value, 'name', value) or ''
+
+
+@receiver(post_save, sender=TradeItem)
+def publish_trade_item_status(sender, instance, created, update_fields=None, **kwargs):
+    previous = instance._loaded_status
+    instance._loaded_status = instance.status
+    if created or previous is None or previous == instance.status:
+        return
+    if update_fields is not None and 'status' not in update_fields:
+        return
+
+    item_id, status, updated_at = instance.pk, instance.status, instance.updated_at
+    transaction.on_commit(
+        lambda: events.publish_status_change(item_id, status, previous, updated_at)
+    )
+
+
+MATCHING_FIELDS = {'title', 'description', 'interests', 'status', 'owner'}
+
+
+@receiver(post_save, sender=TradeItem)
+def reindex_trade_item_matches(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is None and not created:
+        # post_save runs before VersionedModel forgets the loaded values
+        update_fields = instance.changed_fields()
+    if update_fields is not None and not MATCHING_FIELDS.intersection(update_fields):
+        return
+    matching.index_item_job.enqueue(item_id=instance.pk, key=f'matching:{instance.pk}')
+
+
+@receiver(post_save, sender=TradeItem)
+@receiver(post_delete, sender=TradeItem)
+def mark_landing_feed_stale(sender, instance, **kwargs):
+    transaction.on_commit(feed.mark_stale)
+
+
+@receiver(post_save, sender=Wishlist)
+@receiver(post_delete, sender=Wishlist)
+def invalidate_user_recommendations(sender, instance, **kwargs):
+    recommendations.invalidate_user(instance.user_id)
+
+
+@receiver(post_save, sender=UserProfile)
+def invalidate_genre_recommendations(sender, instance, created, update_fields=None, **kwargs):
+    # a new profile has nothing cached, and registration stays one round trip
+    if created:
+        return
+    if update_fields is None:
+        # post_save runs before VersionedModel forgets the loaded values
+        update_fields = instance.changed_fields()
+    if update_fields is not None and 'favorite_genres' not in update_fields:
+        return
+    recommendations.invalidate_user(instance.user_id)
+
+
+@receiver(pre_save, sender=TradeItem)
+def snapshot_trade_item_owner(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None:
+        return
+    if instance._state.adding or instance.owner_id != instance._loaded_owner_id:
+        snapshots.apply_snapshot(instance)
+        instance._loaded_owner_id = instance.owner_id
+
+
+# Usernames propagate in the writer's transaction (the by-owner listing filters
+# on them); avatar and rating are display only and go through the job queue.
+@receiver(post_save, sender=User)
+def sync_owner_username(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields is not None and 'username' not in update_fields):
+        return
+    snapshots.sync_owner(instance.pk, ('owner_username',))
+
+
+@receiver(post_save, sender=UserProfile)
+def sync_owner_avatar(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields is not None and 'avatar' not in update_fields):
+        return
+    user_id = instance.user_id
+    snapshots.sync_owner_job.enqueue(user_id=user_id, fields=['owner_avatar'], key=f'snapshot:{user_id}:avatar')
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def sync_owner_rating(sender, instance, **kwargs):
+    user_ids = {instance.reviewee_id, instance._loaded_reviewee_id} - {None}
+    instance._loaded_reviewee_id = instance.reviewee_id
+    for user_id in user_ids:
+        snapshots.sync_owner_job.enqueue(user_id=user_id, fields=['owner_rating'], key=f'snapshot:{user_id}:rating')
+
+
+# One queued refresh at a time; reviews arriving meanwhile share it
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def refresh_trust_scores(sender, instance, signal, **kwargs):
+    edge = None if signal is post_delete else trust.edge(instance)
+    changed = trust.record_change(instance._loaded_edge, edge)
+    instance._loaded_edge = edge
+    if changed:
+        trust.refresh_job.enqueue(key='trust:refresh', delay=timedelta(seconds=settings.TRUST['REFRESH_DELAY']))
+
+
+@receiver(post_save, sender=TradeItem)
+def index_trade_item_image(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and 'image' not in update_fields:
+        return
+    name = _file_name(instance.image)
+    if not created and name == instance._loaded_image:
+        return
+    instance._loaded_image = name
+    imagehash.index_item_job.enqueue(item_id=instance.pk, key=f'imagehash:{instance.pk}')
@@ -0,0 +1,175 @@
+"""
+Single-flight caching for hot read paths.
+
+When a popular entry expires, or an item write invalidates it, every
+concurrent reader would otherwise miss together and hit PostgreSQL with
+the same query. cached() lets exactly one caller compute:
+
+* in-process, followers wait on the leader's threading.Event and share
+  its result (or its exception);
+* across workers, the leader holds a lock made with cache.add(); other
+  workers serve the stale value if there is one, or poll briefly for the
+  fresh one, and only compute themselves if the leader is too slow.
+
+Entries also refresh early using XFetch (Vattani et al.): each reader
+refreshes with a probability that rises as expiry approaches, scaled by
+how long the value took to compute. So one reader usually recomputes
+before the entry expires and the rest keep hitting.
+
+SingleFlightViewMixin applies this to list/retrieve, keyed by the
+normalized request and the landing feed generation, which every
+TradeItem change bumps (see core_api/feed.py). With a per-process cache a
+write would only bump the generation of the process that handled it, so
+the mixin is off by default unless CACHES['default'] is shared.
+"""
+import math
+import random
+import threading
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from . import feed
+from .concurrency import etag_for
+
+
+def _options():
+    return settings.SINGLE_FLIGHT
+
+
+def _cache():
+    return caches[_options()['CACHE']]
+
+
+class _Flight:
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+def _coalesce(key, compute):
+    """
+    Runs compute() once per key among concurrent callers in this process.
+    """
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+    if not leader:
+        if flight.event.wait(_options()['WAIT']):
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        return compute()  # leader stuck, don't hold this request hostage
+
+    try:
+        flight.value = compute()
+    except Exception as exc:
+        flight.error = exc
+        raise
+    finally:
+        with _flights_lock:
+            _flights.pop(key, None)
+        flight.event.set()
+    return flight.value
+
+
+def _should_refresh(entry, now):
+    _, delta, expires_at = entry
+    # 1 - random() is in (0, 1], so log() is safe
+    return now - delta * _options()['BETA'] * math.log(1.0 - random.random()) >= expires_at
+
+
+def _fill(key, compute, ttl, stale):
+    cache = _cache()
+    options = _options()
+    lock_key = f'{key}:lock'
+    if not cache.add(lock_key, 1, options['LOCK_TIMEOUT']):
+        if stale is not None:
+            return stale[0]
+        deadline = time.monotonic() + options['WAIT']
+        while time.monotonic() < deadline:
+            time.sleep(options['POLL_INTERVAL'])
+            entry = cache.get(key)
+            if entry is not None:
+                return entry[0]
+            if cache.get(lock_key) is None:
+                break
+        return compute()
+
+    try:
+        started = time.monotonic()
+        value = compute()
+        delta = time.monotonic() - started
+        cache.set(key, (value, delta, time.time() + ttl), ttl)
+        return value
+    finally:
+        cache.delete(lock_key)
+
+
+def cached(key, compute, ttl=None):
+    """
+    compute()'s value for `key`, computed by a single caller at a time.
+    Exceptions are not cached.
+    """
+    ttl = _options()['TTL'] if ttl is None else ttl
+    entry = _cache().get(key)
+    if entry is not None and not _should_refresh(entry, time.time()):
+        return entry[0]
+    return _coalesce(key, lambda: _fill(key, compute, ttl, entry))
+
+
+def request_key(request, view_name):
+    """
+    Cache key for a read, independent of query parameter order.
+    """
+    params = urlencode(sorted((name, value) for name, values in request.query_params.lists() for value in values))
+    return (
+        f'singleflight:{feed.generation()}:{view_name}:'
+        f'{request.scheme}://{request.get_host()}{request.path}?{params}'
+    )
+
+
+class SingleFlightViewMixin:
+    """
+    Coalesces identical list/retrieve reads and caches their data for
+    SINGLE_FLIGHT['TTL'] seconds. Only JSON reads whose response doesn't
+    depend on the caller are eligible.
+    """
+
+    def _single_flight(self, handler, request, *args, **kwargs):
+        if (
+            not _options()['ENABLED']
+            or request.method not in ('GET', 'HEAD')
+            or request.META.get(feed.BUILD_FLAG)
+            or not isinstance(getattr(request, 'accepted_renderer', None), JSONRenderer)
+        ):
+            return handler(request, *args, **kwargs)
+
+        def compute():
+            response = handler(request, *args, **kwargs)
+            instance = getattr(self, 'versioned_object', None)
+            return response.data, etag_for(instance) if instance is not None else None
+
+        data, etag = cached(request_key(request, f'{type(self).__name__}.{self.action}'), compute)
+        response = Response(data)
+        if etag:
+            response['ETag'] = etag
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._single_flight(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._single_flight(super().retrieve, request, *args, **kwargs)
@@ -0,0 +1,96 @@
+"""
+Owner display fields denormalized onto TradeItem.
+
+Item rows carry owner_username, owner_avatar, owner_rating and
+owner_trust_score so list
+endpoints (and the by-owner listing) read a single table. Username changes
+propagate inside the writing transaction since the by-owner listing filters
+on it; avatar and rating follow through the job queue, and trust scores are
+mirrored by core_api/trust.py when it stores them. The
+sync_owner_snapshots command backfills and reports drift.
+"""
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Avg, Q
+
+from . import feed, jobs
+from .models import TradeItem
+
+SNAPSHOT_FIELDS = ('owner_username', 'owner_avatar', 'owner_rating', 'owner_trust_score')
+
+
+def owner_snapshots(user_ids):
+    """
+    {user_id: {field: value}} for the given users, in one query.
+    """
+    rows = (
+        User.objects.filter(pk__in=user_ids)
+        .annotate(rating=Avg('reviews_received__rating'))
+        .values_list('pk', 'username', 'userprofile__avatar', 'rating', 'userprofile__trust_score')
+    )
+    return {
+        pk: {
+            'owner_username': username, 'owner_avatar': avatar or None, 'owner_rating': rating,
+            'owner_trust_score': trust_score or 0.0,
+        }
+        for pk, username, avatar, rating, trust_score in rows
+    }
+
+
+def apply_snapshot(item):
+    """
+    Fills the snapshot fields on an unsaved item, or one whose owner changed.
+    """
+    snapshot = owner_snapshots([item.owner_id]).get(item.owner_id)
+    if snapshot:
+        for field, value in snapshot.items():
+            setattr(item, field, value)
+
+
+def _differs(field, value):
+    # ~Q() on a nullable column also matches NULL rows
+    return ~Q(**{field: value}) if value is not None else Q(**{f'{field}__isnull': False})
+
+
+def sync_owner(user_id, fields=SNAPSHOT_FIELDS):
+    """
+    Rewrites the given snapshot fields on the user's items; returns rows changed.
+    """
+    snapshot = owner_snapshots([user_id]).get(user_id)
+    if snapshot is None:
+        return 0
+    values = {field: snapshot[field] for field in fields}
+    stale = Q()
+    for field, value in values.items():
+        stale |= _differs(field, value)
+    # not in the detail payload, so the version (ETag) stays put
+    updated = TradeItem.objects.filter(owner_id=user_id).filter(stale).update(**values)
+    if updated:
+        # update() skips the TradeItem signals
+        transaction.on_commit(feed.mark_stale)
+    return updated
+
+
+@jobs.job('snapshots.sync_owner')
+def sync_owner_job(user_id, fields):
+    sync_owner(user_id, fields)
+
+
+def find_drift(batch_size=1000):
+    """
+    Yields (owner_id, stored, expected) for owners whose items disagree
+    with the source tables.
+    """
+    owner_ids = list(TradeItem.objects.order_by('owner_id').values_list('owner_id', flat=True).distinct())
+    for start in range(0, len(owner_ids), batch_size):
+        batch = owner_ids[start:start + batch_size]
+        expected = owner_snapshots(batch)
+        stored = (
+            TradeItem.objects.filter(owner_id__in=batch)
+            .values_list('owner_id', *SNAPSHOT_FIELDS).distinct()
+        )
+        for owner_id, *values in stored:
+            current = dict(zip(SNAPSHOT_FIELDS, values))
+            current['owner_avatar'] = current['owner_avatar'] or None
+            if current != expected.get(owner_id):
+                yield owner_id, current, expected.get(owner_id)
@@ -0,0 +1,66 @@
+"""
+Content-addressed media storage.
+
+Uploads are stored under `<upload_to>/<sha256[:2]>/<sha256><ext>`, so the
+same image uploaded twice is written once and every stored name is
+immutable (safe to cache forever). ContentAddressedMixin works on top of
+any Django storage; with an object store backend (e.g. django-storages S3
+with querystring auth) `storage.url()` already hands out signed URLs.
+For the local filesystem, MediaView in views.py hands the transfer off to
+the web server (X-Accel-Redirect / X-Sendfile), see MEDIA_SERVE_MODE.
+
+Since one stored file can back any number of rows, delete() leaves hashed
+names alone: FieldFile.delete() on one row must not break the others.
+Unreferenced blobs are left for an offline sweep.
+"""
+import hashlib
+import posixpath
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+HASHED_NAME = re.compile(r'(^|/)[0-9a-f]{2}/[0-9a-f]{64}(\.[a-z0-9]+)?$')
+
+
+def content_hash(content):
+    digest = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+def hashed_name(name, digest):
+    directory = posixpath.dirname(name)
+    ext = posixpath.splitext(name)[1].lower()
+    return posixpath.join(directory, digest[:2], digest + ext)
+
+
+def is_hashed_name(name):
+    return bool(HASHED_NAME.search(name))
+
+
+class ContentAddressedMixin:
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = hashed_name(name, content_hash(content))
+        if self.exists(name):
+            return name
+        # a concurrent identical upload may still win the race; the loser
+        # gets a suffixed copy, which costs disk but never breaks a reference
+        return super().save(name, content, max_length=max_length)
+
+    def delete(self, name):
+        if name and is_hashed_name(name):
+            return
+        super().delete(name)
+
+
+class ContentAddressedStorage(ContentAddressedMixin, FileSystemStorage):
+    pass
@@ -18,3 +18,9 @@ def temp_media_root(tmp_path_factory):
     yield
     shutil.rmtree(str(tmp_media), ignore_errors=True)
 
+
+
+@pytest.fixture(autouse=True)
+def eager_jobs(settings):
+    # run queued work in-process; tests of the queue itself turn this off
+    settings.JOBS_EAGER = True
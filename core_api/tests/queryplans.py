@@ -0,0 +1,96 @@
+"""
+Query plan checks for the test suite.
+
+capture_plans() runs a callable (typically a test client request), records
+every SELECT it sends, and EXPLAINs each one with enable_seqscan off. The
+planner still picks a sequential scan when no index can serve the query,
+so a Seq Scan in those plans means an index was lost or never matched.
+format_report() renders the statements and the scans they got for
+assertion messages. PostgreSQL only.
+"""
+import json
+from dataclasses import dataclass, field
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@dataclass
+class PlanNode:
+    node_type: str
+    relation: str = None
+    index: str = None
+
+
+@dataclass
+class StatementPlan:
+    sql: str
+    nodes: list = field(default_factory=list)
+
+    @property
+    def seq_scans(self):
+        return {node.relation for node in self.nodes if node.node_type == 'Seq Scan'}
+
+    @property
+    def indexes(self):
+        return {node.index for node in self.nodes if node.index}
+
+    @property
+    def relations(self):
+        return {node.relation for node in self.nodes if node.relation}
+
+
+def _walk(plan, nodes):
+    nodes.append(PlanNode(plan['Node Type'], plan.get('Relation Name'), plan.get('Index Name')))
+    for child in plan.get('Plans', ()):
+        _walk(child, nodes)
+    return nodes
+
+
+def explain(sql, params=()):
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return StatementPlan(sql, _walk(plan[0]['Plan'], []))
+
+
+def capture_plans(action):
+    """
+    Calls action() and returns (result, [StatementPlan]) for its SELECTs.
+    """
+    with CaptureQueriesContext(connection) as queries:
+        result = action()
+    statements = [query['sql'] for query in queries.captured_queries if query['sql'].lstrip().upper().startswith('SELECT')]
+    with connection.cursor() as cursor:
+        cursor.execute('SET LOCAL enable_seqscan = off')
+        try:
+            plans = [explain(sql) for sql in statements]
+        finally:
+            cursor.execute('SET LOCAL enable_seqscan = on')
+    return result, plans
+
+
+def indexes_leading_with(model, *columns):
+    """
+    Names of the table's indexes (declared, FK or unique) whose leading
+    columns are `columns`.
+    """
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, model._meta.db_table)
+    return {
+        name for name, info in constraints.items()
+        if info['index'] and tuple(info['columns'][:len(columns)]) == columns
+    }
+
+
+def format_report(plans):
+    lines = []
+    for number, plan in enumerate(plans, 1):
+        lines.append(f'[{number}] {plan.sql[:200]}')
+        for node in plan.nodes:
+            if node.relation:
+                using = f' using {node.index}' if node.index else ''
+                lines.append(f'      {node.node_type} on {node.relation}{using}')
+    return '\n'.join(lines)
@@ -0,0 +1,84 @@
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from core_api import events
+from core_api.admin import EstimatedCountPaginator
+from core_api.models import Job, TradeItem, Wishlist
+
+
+@pytest.fixture
+def admin_client_(db):
+    admin_user = User.objects.create_superuser(username='admin', password='pass', email='admin@example.com')
+    client = Client()
+    client.force_login(admin_user)
+    return client
+
+
+@pytest.mark.django_db
+def test_changelists_render_without_per_row_queries(admin_client_, django_assert_max_num_queries):
+    owners = [User.objects.create_user(username=f'user{i}', password='pass') for i in range(5)]
+    items = [
+        TradeItem.objects.create(title=f'Item {i}', description='desc', interests='fig', owner=owners[i % 5])
+        for i in range(20)
+    ]
+    for owner in owners:
+        Wishlist.objects.create(user=owner, item=items[0])
+
+    baseline = {}
+    for url in ('/admin/core_api/tradeitem/', '/admin/core_api/wishlist/', '/admin/core_api/review/'):
+        response = admin_client_.get(url)
+        assert response.status_code == 200
+        baseline[url] = response
+
+    with django_assert_max_num_queries(12):
+        response = admin_client_.get('/admin/core_api/tradeitem/?owner=user1&q=item')
+    assert response.status_code == 200
+    assert len(response.context['cl'].result_list) == 4
+    # the owner filter is a search box, not a list of every user
+    assert b'name="owner" value="user1"' in response.content
+    assert b'?owner__id__exact=' not in response.content
+
+    response = admin_client_.get('/admin/core_api/wishlist/?q=Item 0')
+    assert len(response.context['cl'].result_list) == 5
+
+
+@pytest.mark.django_db
+def test_bulk_status_action_is_one_update(admin_client_, django_capture_on_commit_callbacks, settings, monkeypatch):
+    settings.JOBS_EAGER = False
+    owner = User.objects.create_user(username='owner', password='pass')
+    items = [
+        TradeItem.objects.create(title=f'Item {i}', description='desc', interests='fig', owner=owner)
+        for i in range(3)
+    ]
+    TradeItem.objects.filter(pk=items[0].pk).update(status='traded')
+    published = []
+    monkeypatch.setattr(events, 'publish_status_change', lambda *args: published.append(args[:3]))
+    with django_capture_on_commit_callbacks(execute=True), CaptureQueriesContext(connection) as queries:
+        response = admin_client_.post('/admin/core_api/tradeitem/', {
+            'action': 'mark_traded', '_selected_action': [item.pk for item in items],
+        })
+    assert response.status_code == 302
+    assert len([q for q in queries if q['sql'].startswith('UPDATE "core_api_tradeitem"')]) == 1
+    assert set(TradeItem.objects.exclude(pk=items[0].pk).values_list('status', 'version')) == {('traded', 2)}
+    # only rows that actually changed are announced and reindexed
+    assert sorted(published) == [(item.pk, 'traded', 'available') for item in items[1:]]
+    assert sorted(Job.objects.get().payload['item_ids']) == [item.pk for item in items[1:]]
+
+
+@pytest.mark.django_db
+def test_estimated_count_only_for_the_unfiltered_list(admin_client_, monkeypatch):
+    owner = User.objects.create_user(username='owner', password='pass')
+    for i in range(3):
+        TradeItem.objects.create(title=f'Item {i}', description='desc', interests='fig', owner=owner)
+    monkeypatch.setattr(EstimatedCountPaginator, 'exact_below', 0)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE core_api_tradeitem')
+
+    paginator = EstimatedCountPaginator(TradeItem.objects.order_by('pk'), 10)
+    with CaptureQueriesContext(connection) as queries:
+        paginator.count
+    assert queries[0]['sql'].startswith('EXPLAIN')
+    filtered = EstimatedCountPaginator(TradeItem.objects.filter(title='Item 1').order_by('pk'), 10)
+    assert filtered.count == 1
@@ -73,4 +73,50 @@ def test_authentication_required_for_wishlist():
     item = TradeItem.objects.create(title='Poster', description='desc', interests='fig', owner=user)
     # Not authenticated
     response = client.post(f'/api/wishlist/{item.id}/add/')
-    assert response.status_code == 401
\ No newline at end of file
+    assert response.status_code == 401
+
+@pytest.mark.django_db
+def test_registration_uses_configured_hash_cost(settings):
+    settings.PASSWORD_HASH_ITERATIONS = 1000
+    client = APIClient()
+    data = {
+        "username": "cheapuser",
+        "password": "testpass123",
+        "password2": "testpass123",
+        "email": "Cheap@Example.com"
+    }
+    response = client.post('/api/auth/register/', data)
+    assert response.status_code == 201
+    user = User.objects.get(username='cheapuser')
+    assert user.password.startswith('pbkdf2_sha256$1000$')
+    assert user.check_password('testpass123')
+    assert user.userprofile is not None
+
+    data['username'] = 'otheruser'
+    data['email'] = 'cheap@example.COM'
+    response = client.post('/api/auth/register/', data)
+    assert response.status_code == 400
+    assert 'email' in response.data
+
+@pytest.mark.django_db
+def test_registration_answers_503_when_hashing_is_saturated(monkeypatch, settings):
+    import threading
+    from core_api import registration
+    settings.PASSWORD_HASH_WAIT = 0
+    admitted, running = threading.BoundedSemaphore(2), threading.BoundedSemaphore(1)
+    monkeypatch.setattr(registration, '_limits', lambda: (admitted, running))
+    data = {
+        "username": "busyuser",
+        "password": "testpass123",
+        "password2": "testpass123",
+        "email": "busy@example.com"
+    }
+    client = APIClient()
+    running.acquire()  # another registration is hashing
+    response = client.post('/api/auth/register/', data)
+    assert response.status_code == 503
+    admitted.acquire()  # and another is waiting
+    admitted.acquire()
+    response = client.post('/api/auth/register/', data)
+    assert response.status_code == 503
+    assert not User.objects.filter(username='busyuser').exists()
@@ -0,0 +1,102 @@
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from core_api.concurrency import VersionConflict
+from core_api.models import TradeItem, UserProfile
+
+
+@pytest.fixture
+def item(db):
+    owner = User.objects.create_user(username='owner', password='pass')
+    return TradeItem.objects.create(title='Naruto Figure', description='Limited', interests='fig', owner=owner)
+
+
+@pytest.mark.django_db
+def test_stale_save_conflicts_and_writes_only_changed_fields(item):
+    first_tab = TradeItem.objects.get(pk=item.pk)
+    second_tab = TradeItem.objects.get(pk=item.pk)
+
+    first_tab.status = 'pending'
+    with CaptureQueriesContext(connection) as queries:
+        first_tab.save()
+    update = next(q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE'))
+    assert '"status"' in update and '"description"' not in update and '"title"' not in update
+    assert first_tab.version == 2
+
+    second_tab.description = 'Signed'
+    # like an IntegrityError, a conflict aborts the surrounding transaction
+    with pytest.raises(VersionConflict), transaction.atomic():
+        second_tab.save()
+    assert second_tab.version == 1
+    item.refresh_from_db()
+    assert (item.status, item.description, item.version) == ('pending', 'Limited', 2)
+
+
+@pytest.mark.django_db
+def test_in_place_json_edits_are_detected(item):
+    profile = UserProfile.objects.get(user=item.owner)
+    profile.favorite_genres.append('mecha')
+    profile.save()
+    assert UserProfile.objects.get(pk=profile.pk).favorite_genres == ['mecha']
+
+
+@pytest.mark.django_db
+def test_if_match_on_item_and_profile(item):
+    client = APIClient()
+    client.force_authenticate(user=item.owner)
+
+    response = client.get(f'/api/items/{item.id}/')
+    assert response['ETag'] == '"1"'
+    response = client.patch(f'/api/items/{item.id}/', {'status': 'pending'}, format='json', HTTP_IF_MATCH='"0"')
+    assert response.status_code == 412
+    response = client.patch(f'/api/items/{item.id}/', {'status': 'pending'}, format='json', HTTP_IF_MATCH='"1"')
+    assert response.status_code == 200
+    assert response['ETag'] == '"2"'
+
+    response = client.get('/api/profile/')
+    etag = response['ETag']
+    assert client.patch('/api/profile/', {'bio': 'hi'}, format='json', HTTP_IF_MATCH=etag).status_code == 200
+    assert client.patch('/api/profile/', {'bio': 'again'}, format='json', HTTP_IF_MATCH=etag).status_code == 412
+
+
+@pytest.mark.django_db
+def test_refresh_from_db_forgets_reloaded_changes(item):
+    TradeItem.objects.filter(pk=item.pk).update(description='Signed', version=2)
+    item.title = 'Naruto Statue'
+    item.refresh_from_db(fields=['description', 'version'])
+    assert item.changed_fields() == ['title']
+    item.refresh_from_db()
+    assert item.changed_fields() == []
+    item.status = 'pending'
+    item.save()
+    assert item.version == 3
+
+
+@pytest.mark.django_db
+def test_denormalized_writes_keep_the_version(item):
+    from core_api import snapshots, viewcounts
+    User.objects.filter(pk=item.owner_id).update(username='renamed')
+    assert snapshots.sync_owner(item.owner_id, ['owner_username']) == 1
+    viewcounts.record(item.pk)
+    viewcounts.flush()
+    item.refresh_from_db()
+    assert (item.owner_username, item.view_count, item.version) == ('renamed', 1, 1)
+
+
+@pytest.mark.django_db
+def test_if_match_accepts_etags_weakened_by_compression(item, settings):
+    settings.COMPRESSION_MIN_SIZE = 0
+    # long enough that gzip's random padding can't make it bigger
+    TradeItem.objects.filter(pk=item.pk).update(description='Limited edition ' * 50)
+    client = APIClient()
+    client.force_authenticate(user=item.owner)
+
+    response = client.get(f'/api/items/{item.id}/', HTTP_ACCEPT_ENCODING='gzip')
+    assert response['Content-Encoding'] == 'gzip'
+    assert response['ETag'] == 'W/"1"'
+    response = client.patch(
+        f'/api/items/{item.id}/', {'status': 'pending'}, format='json', HTTP_IF_MATCH=response['ETag']
+    )
+    assert response.status_code == 200
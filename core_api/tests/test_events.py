@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from core_api import events
+from core_api.models import TradeItem
+
+
+@pytest.fixture
+def broker(settings):
+    settings.EVENT_BROKER = 'core_api.events.RecordingBroker'
+    broker = events.get_broker()
+    broker.published.clear()
+    return broker
+
+
+@pytest.mark.django_db
+def test_status_change_publishes_event(broker, django_capture_on_commit_callbacks):
+    user = User.objects.create_user(username='owner', password='pass')
+    item = TradeItem.objects.create(title='Poster', description='desc', interests='fig', owner=user)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        item.status = 'pending'
+        item.save()
+
+    assert len(broker.published) == 1
+    channel, event = broker.published[0]
+    assert channel == f'item:{item.id}'
+    assert event['status'] == 'pending'
+    assert event['previous_status'] == 'available'
+
+
+@pytest.mark.django_db
+def test_non_status_save_does_not_publish(broker, django_capture_on_commit_callbacks):
+    user = User.objects.create_user(username='owner', password='pass')
+    with django_capture_on_commit_callbacks(execute=True):
+        item = TradeItem.objects.create(title='Poster', description='desc', interests='fig', owner=user)
+        item = TradeItem.objects.get(pk=item.pk)
+        item.title = 'Poster v2'
+        item.save()
+
+    assert broker.published == []
+
+
+def test_local_broker_delivers_only_subscribed_channels():
+    broker = events.LocalBroker()
+
+    async def scenario():
+        subscription = broker.subscribe([events.item_channel(1)])
+        broker.publish(events.item_channel(2), {'type': 'status', 'item': 2})
+        broker.publish(events.item_channel(1), {'type': 'status', 'item': 1})
+        await asyncio.sleep(0)
+        received = await subscription.get(timeout=1)
+        leftover = await subscription.get(timeout=0.01)
+        subscription.close()
+        return received, leftover
+
+    received, leftover = async_to_sync(scenario)()
+    assert received['item'] == 1
+    assert leftover is None
+    assert broker._subscribers == {}
+
+
+@pytest.mark.django_db
+def test_wishlist_events_requires_asgi():
+    client = APIClient()
+    user = User.objects.create_user(username='wishuser', password='pass')
+    client.force_authenticate(user=user)
+    response = client.get('/api/wishlist/events/', HTTP_ACCEPT='text/event-stream')
+    assert response.status_code == 501
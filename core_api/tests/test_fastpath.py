@@ -0,0 +1,127 @@
+import json
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from core_api.fastpath import (
+    ReviewRowSerializer, TradeItemListRowSerializer, UserProfileRowSerializer
+)
+from core_api.models import Review, TradeItem, UserProfile
+from core_api.renderers import ORJSONRenderer, orjson
+from core_api.serializers import (
+    ReviewSerializer, TradeItemListSerializer, UserProfileSerializer
+)
+
+
+@pytest.fixture
+def marketplace(db):
+    alice = User.objects.create_user(
+        username='alice', password='pass', email='alice@example.com', first_name='Alicé'
+    )
+    bob = User.objects.create_user(username='bob', password='pass')
+    TradeItem.objects.create(
+        title='Naruto   Figure', description='desc', interests='fig', owner=alice,
+        image=SimpleUploadedFile('naruto.png', b'png', content_type='image/png')
+    )
+    TradeItem.objects.create(title='ワンピース Poster', description='desc', interests='fig', owner=bob)
+    Review.objects.create(reviewer=alice, reviewee=bob, rating=4, comment='Fast shipping 🚀')
+    profile = alice.userprofile
+    profile.favorite_genres = ['mecha', 'shounen']
+    profile.avatar = SimpleUploadedFile('alice.png', b'png', content_type='image/png')
+    profile.save()
+
+
+@pytest.mark.parametrize('model, drf_serializer, row_serializer', [
+    (TradeItem, TradeItemListSerializer, TradeItemListRowSerializer),
+    (Review, ReviewSerializer, ReviewRowSerializer),
+    (UserProfile, UserProfileSerializer, UserProfileRowSerializer),
+])
+def test_row_serializers_render_identical_bytes(marketplace, model, drf_serializer, row_serializer):
+    request = Request(APIRequestFactory().get('/api/'))
+    queryset = model.objects.all()
+
+    expected = JSONRenderer().render(
+        drf_serializer(queryset, many=True, context={'request': request}).data
+    )
+    fast = row_serializer(request=request).serialize(queryset.values(*row_serializer.columns))
+    assert ORJSONRenderer().render(fast) == expected
+    assert JSONRenderer().render(fast) == expected
+
+
+def test_orjson_renderer_floats():
+    data = {'score': 1e-05, 'rating': 4.5, 'big': 1e16}
+    assert json.loads(ORJSONRenderer().render(data)) == json.loads(JSONRenderer().render(data)) == data
+    if orjson is not None:
+        assert ORJSONRenderer().render({'score': float('nan')}) == b'{"score":null}'
+    with pytest.raises(ValueError):
+        JSONRenderer().render({'score': float('nan')})
+
+
+@pytest.mark.parametrize('url', ['/api/items/', '/api/items/?ordering=title', '/api/reviews/', '/api/profiles/'])
+def test_list_endpoints_identical_with_and_without_fast_path(marketplace, settings, url):
+    client = APIClient()
+    client.force_authenticate(user=User.objects.get(username='bob'))
+
+    settings.FAST_LIST_SERIALIZATION = False
+    slow = client.get(url)
+    settings.FAST_LIST_SERIALIZATION = True
+    fast = client.get(url)
+    assert fast.status_code == slow.status_code == 200
+    assert fast.content == slow.content
+
+
+def test_fast_list_is_a_single_query(marketplace, django_assert_num_queries):
+    client = APIClient()
+    client.force_authenticate(user=User.objects.get(username='bob'))
+    with django_assert_num_queries(1):
+        response = client.get('/api/reviews/')
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_owner_snapshot_follows_source_tables(marketplace, django_assert_num_queries,
+                                              django_capture_on_commit_callbacks):
+    alice = User.objects.get(username='alice')
+    item = TradeItem.objects.get(owner=alice)
+    assert item.owner_username == 'alice'
+
+    alice.username = 'alice2'
+    alice.save()
+    item.refresh_from_db()
+    assert item.owner_username == 'alice2'
+
+    # avatar and rating follow through jobs, run eagerly after commit
+    with django_capture_on_commit_callbacks(execute=True):
+        Review.objects.create(reviewer=User.objects.get(username='bob'), reviewee=alice, rating=2, comment='ok')
+        alice.userprofile.save()
+    item.refresh_from_db()
+    assert item.owner_rating == 2.0
+    assert item.owner_avatar.name == alice.userprofile.avatar.name
+
+    client = APIClient()
+    with django_assert_num_queries(1):
+        response = client.get('/api/users/alice2/items/')
+    assert [row['owner_username'] for row in response.data['results']] == ['alice2']
+    assert client.get('/api/users/alice/items/').status_code == 404
+
+    TradeItem.objects.filter(pk=item.pk).update(owner_username='stale')
+    with pytest.raises(CommandError):
+        call_command('sync_owner_snapshots', '--check')
+    call_command('sync_owner_snapshots')
+    call_command('sync_owner_snapshots', '--check')
+
+
+@pytest.mark.django_db
+def test_moved_review_resyncs_both_owners(marketplace, django_capture_on_commit_callbacks):
+    alice, bob = User.objects.get(username='alice'), User.objects.get(username='bob')
+    review = Review.objects.get(reviewee=bob)
+    with django_capture_on_commit_callbacks(execute=True):
+        review.reviewee = alice
+        review.save()
+    assert TradeItem.objects.get(owner=bob).owner_rating is None
+    assert TradeItem.objects.get(owner=alice).owner_rating == 4.0
@@ -0,0 +1,61 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from rest_framework.test import APIClient
+from core_api import feed
+from core_api.models import TradeItem
+
+
+@pytest.fixture
+def items(db, settings):
+    settings.LANDING_FEED = dict(settings.LANDING_FEED, ENABLED=True, PAGES=2)
+    cache.clear()
+    owner = User.objects.create_user(username='owner', password='pass')
+    yield [
+        TradeItem.objects.create(
+            title=f'Item {i}', description='desc', interests='fig', owner=owner,
+            status='traded' if i % 5 == 0 else 'available'
+        )
+        for i in range(25)
+    ]
+    cache.clear()
+
+
+def test_feed_pages_match_live_responses(items, django_assert_num_queries):
+    client = APIClient()
+    live = [client.get('/api/items/').content, client.get('/api/items/?status=traded').content]
+    next_url = client.get('/api/items/').data['next']
+    live_page_two = client.get(next_url).content
+
+    # 2 pages unfiltered, 2 available, 1 traded, 1 empty pending
+    assert feed.rebuild() == 6
+    with django_assert_num_queries(0):
+        served = [client.get('/api/items/').content, client.get('/api/items/?status=traded').content]
+        page_two = client.get(next_url)
+    assert served == live
+    assert 'Accept' in client.get('/api/items/')['Vary']
+    assert b'http://testserver/api/items/?cursor=' in served[0]
+    assert page_two.content == live_page_two
+
+    # anything else takes the regular path
+    assert client.get('/api/items/?search=Item').data['results']
+
+
+def test_stale_feed_is_served_then_rebuilt(items, django_capture_on_commit_callbacks):
+    client = APIClient()
+    feed.rebuild()
+    with django_capture_on_commit_callbacks(execute=True):
+        TradeItem.objects.create(title='Fresh', description='desc', interests='fig', owner=items[0].owner)
+
+    # first stale read gets the old page and (eager jobs) rebuilds after it
+    with django_capture_on_commit_callbacks(execute=True):
+        first = client.get('/api/items/').json()
+    assert first['results'][0]['title'] != 'Fresh'
+    assert client.get('/api/items/').json()['results'][0]['title'] == 'Fresh'
+
+
+def test_feed_is_skipped_when_disabled(items, settings, django_assert_num_queries):
+    feed.rebuild()
+    settings.LANDING_FEED = dict(settings.LANDING_FEED, ENABLED=False)
+    with django_assert_num_queries(1):
+        assert APIClient().get('/api/items/').status_code == 200
@@ -0,0 +1,69 @@
+import gzip
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from core_api.models import TradeItem, Wishlist
+
+
+@pytest.fixture
+def item(db):
+    owner = User.objects.create_user(username='owner', password='pass', first_name='Ollie')
+    return TradeItem.objects.create(
+        title='Naruto Figure', description='Limited edition ' * 200, interests='One Piece', owner=owner
+    )
+
+
+@pytest.mark.django_db
+def test_fields_narrow_payload_and_columns(item):
+    client = APIClient()
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(f'/api/items/{item.id}/?fields=id,title')
+    assert response.status_code == 200
+    assert response.data == {'id': item.id, 'title': 'Naruto Figure'}
+    sql = queries.captured_queries[-1]['sql']
+    assert 'description' not in sql
+    assert 'auth_user' not in sql
+
+
+@pytest.mark.django_db
+def test_expand_controls_nested_owner(item):
+    client = APIClient()
+    response = client.get(f'/api/items/{item.id}/?fields=id,owner')
+    assert response.data == {'id': item.id, 'owner': item.owner_id}
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(f'/api/items/{item.id}/?fields=id,owner&expand=owner')
+    assert response.data['owner']['first_name'] == 'Ollie'
+    assert len(queries) == 1
+
+    # no parameters, unchanged payload
+    response = client.get(f'/api/items/{item.id}/')
+    assert response.data['owner']['username'] == 'owner'
+    assert response.data['description'].startswith('Limited')
+
+
+@pytest.mark.django_db
+def test_wishlist_owner_is_joined_not_n_plus_one(item, django_assert_num_queries):
+    fan = User.objects.create_user(username='fan', password='pass')
+    other = TradeItem.objects.create(title='Poster', description='desc', interests='fig', owner=fan)
+    Wishlist.objects.create(user=fan, item=item)
+    Wishlist.objects.create(user=fan, item=other)
+    client = APIClient()
+    client.force_authenticate(user=fan)
+    with django_assert_num_queries(1):
+        response = client.get('/api/wishlist/')
+    assert {row['owner']['username'] for row in response.data['results']} == {'owner', 'fan'}
+
+
+@pytest.mark.django_db
+def test_large_responses_are_gzipped(item):
+    client = APIClient()
+    response = client.get(f'/api/items/{item.id}/', HTTP_ACCEPT_ENCODING='gzip')
+    assert response['Content-Encoding'] == 'gzip'
+    assert b'Limited edition' in gzip.decompress(response.content)
+
+    response = client.get(f'/api/items/{item.id}/?fields=id', HTTP_ACCEPT_ENCODING='gzip')
+    assert not response.has_header('Content-Encoding')
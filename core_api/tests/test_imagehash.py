@@ -0,0 +1,89 @@
+import io
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from PIL import Image, ImageDraw
+from rest_framework.test import APIClient
+from core_api import imagehash
+from core_api.models import ImageHash, TradeItem
+
+
+def picture(shape, size=(256, 256), fmt='PNG', quality=95):
+    image = Image.new('RGB', size, 'white')
+    draw = ImageDraw.Draw(image)
+    w, h = size
+    if shape == 'figure':
+        draw.ellipse((w * 0.2, h * 0.1, w * 0.6, h * 0.5), fill='orange')
+        draw.rectangle((w * 0.3, h * 0.5, w * 0.8, h * 0.95), fill='navy')
+    else:
+        draw.polygon([(0, h), (w, 0), (w, h)], fill='darkgreen')
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, **({'quality': quality} if fmt == 'JPEG' else {}))
+    return buffer.getvalue()
+
+
+def upload(client, data, name='figure.png'):
+    return client.post('/api/items/', {
+        'title': 'Figure', 'description': 'desc', 'interests': 'posters',
+        'image': SimpleUploadedFile(name, data),
+    }, format='multipart')
+
+
+def test_hash_survives_reencoding_and_band_lookup_is_complete():
+    original = imagehash.dhash(io.BytesIO(picture('figure')))
+    resized = imagehash.dhash(io.BytesIO(picture('figure', size=(640, 480), fmt='JPEG', quality=40)))
+    other = imagehash.dhash(io.BytesIO(picture('landscape')))
+    assert imagehash.distance(original, resized) <= 6
+    assert imagehash.distance(original, other) > 10
+    assert imagehash.dhash(io.BytesIO(b'not an image')) is None
+
+    # every hash within radius shares a band within radius // 4 bits
+    flipped = original ^ 0b1 ^ (1 << 17) ^ (1 << 40) ^ (1 << 63) ^ (1 << 62)
+    query_bands = imagehash.bands(original)
+    assert any(
+        band in imagehash._band_neighbours(query_bands[i], 5 // 4)
+        for i, band in enumerate(imagehash.bands(flipped))
+    )
+    assert imagehash.to_signed(1 << 63) < 0
+
+
+@pytest.mark.django_db
+def test_near_duplicates_are_flagged_or_rejected(settings, django_capture_on_commit_callbacks):
+    owner = User.objects.create_user(username='owner', password='pass')
+    client = APIClient()
+    client.force_authenticate(user=owner)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        first = upload(client, picture('figure'))
+        second = upload(client, picture('figure', size=(500, 500), fmt='JPEG', quality=50), 'again.jpg')
+        third = upload(client, picture('landscape'), 'landscape.png')
+    assert first.status_code == second.status_code == third.status_code == 201
+    assert ImageHash.objects.get(item_id=second.data['id']).duplicate_of_id == first.data['id']
+    assert ImageHash.objects.get(item_id=third.data['id']).duplicate_of_id is None
+
+    response = client.get(f"/api/items/{first.data['id']}/similar/")
+    assert [row['item']['id'] for row in response.data] == [second.data['id']]
+    assert response.data[0]['distance'] <= 6
+
+    settings.IMAGE_HASH = {**settings.IMAGE_HASH, 'DUPLICATES': 'reject'}
+    response = upload(client, picture('figure', size=(300, 300)))
+    assert response.status_code == 400
+    assert 'duplicate' in response.data['image'][0]
+
+    # only the owner's own listings count as duplicates
+    client.force_authenticate(user=User.objects.create_user(username='other', password='pass'))
+    assert upload(client, picture('figure')).status_code == 201
+
+
+@pytest.mark.django_db
+def test_backfill_indexes_existing_images():
+    owner = User.objects.create_user(username='owner', password='pass')
+    item = TradeItem.objects.create(
+        title='Figure', description='desc', interests='fig', owner=owner,
+        image=SimpleUploadedFile('figure.png', picture('figure'))
+    )
+    ImageHash.objects.all().delete()
+    call_command('index_image_hashes', stdout=io.StringIO())
+    assert ImageHash.objects.get(item=item).image == item.image.name
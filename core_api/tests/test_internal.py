@@ -0,0 +1,79 @@
+import pytest
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from core_api.models import TradeItem
+
+
+@pytest.fixture
+def internal_client(settings):
+    settings.INTERNAL_API_TOKENS = ['old-secret', 'new-secret']
+    client = APIClient()
+    client.credentials(HTTP_X_INTERNAL_TOKEN='new-secret')
+    return client
+
+
+@pytest.mark.django_db
+def test_item_batch_is_one_query(internal_client, django_assert_num_queries):
+    owner = User.objects.create_user(username='owner', password='pass')
+    items = [
+        TradeItem.objects.create(title=f'Item {i}', description='desc', interests='fig', owner=owner)
+        for i in range(3)
+    ]
+    ids = ','.join(str(item.id) for item in items) + ',999999'
+    with django_assert_num_queries(1):
+        response = internal_client.get(f'/api/internal/items/?ids={ids}')
+    assert response.status_code == 200
+    assert set(response.data['results']) == {str(item.id) for item in items}
+    assert response.data['results'][str(items[0].id)]['owner']['username'] == 'owner'
+    assert response.data['missing'] == ['999999']
+
+
+@pytest.mark.django_db
+def test_profile_batch_by_username(internal_client):
+    User.objects.create_user(username='alice', password='pass')
+    User.objects.create_user(username='bob', password='pass')
+    response = internal_client.post('/api/internal/profiles/', {'usernames': ['alice', 'bob', 'carol']}, format='json')
+    assert response.status_code == 200
+    assert response.data['results']['alice']['user']['username'] == 'alice'
+    assert response.data['missing'] == ['carol']
+
+
+@pytest.mark.django_db
+def test_internal_auth_and_limits(internal_client, settings):
+    user = User.objects.create_user(username='alice', password='pass')
+    client = APIClient()
+    assert client.get('/api/internal/items/?ids=1').status_code == 401
+    client.credentials(HTTP_X_INTERNAL_TOKEN='wrong')
+    assert client.get('/api/internal/items/?ids=1').status_code == 401
+    # a regular user token is not enough
+    client = APIClient()
+    client.force_authenticate(user=user)
+    assert client.get('/api/internal/items/?ids=1').status_code == 403
+
+    settings.INTERNAL_API_CLIENT_DNS = ['CN=search,O=animedia']
+    client = APIClient()
+    client.credentials(HTTP_X_SSL_CLIENT_VERIFY='SUCCESS', HTTP_X_SSL_CLIENT_DN='CN=search,O=animedia')
+    assert client.get('/api/internal/items/?ids=1').status_code == 200
+
+    settings.INTERNAL_BATCH_MAX_SIZE = 2
+    assert internal_client.get('/api/internal/items/?ids=1,2,3').status_code == 400
+    assert internal_client.get('/api/internal/items/?ids=a').status_code == 400
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('ids', ['²', '0', str(2 ** 63), '1.5'])
+def test_item_batch_rejects_invalid_ids(internal_client, ids):
+    response = internal_client.get(f'/api/internal/items/?ids={ids}')
+    assert response.status_code == 400
+    assert 'ids' in response.data
+
+
+@pytest.mark.django_db
+def test_batch_body_must_be_an_object(internal_client):
+    response = internal_client.post('/api/internal/items/', [1, 2], format='json')
+    assert response.status_code == 400
+    response = internal_client.post('/api/internal/items/', {'ids': 'nope'}, format='json')
+    assert response.status_code == 400
+    response = internal_client.post('/api/internal/items/', {'ids': [1, '1']}, format='json')
+    assert response.status_code == 200
+    assert response.data['missing'] == ['1']
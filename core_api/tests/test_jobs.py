@@ -0,0 +1,86 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from core_api import jobs
+from core_api.models import Job
+
+calls = []
+
+
+@jobs.job('tests.record', max_attempts=2)
+def record_job(value):
+    if value == 'boom':
+        raise RuntimeError('boom')
+    calls.append(value)
+
+
+@pytest.fixture
+def queued(settings):
+    settings.JOBS_EAGER = False
+    calls.clear()
+
+
+@pytest.mark.django_db
+def test_enqueue_waits_for_commit_and_dedupes_on_key(queued, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=False):
+        record_job.enqueue(value='a', key='k')
+    assert not Job.objects.exists()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        record_job.enqueue(value='a', key='k')
+        record_job.enqueue(value='a', key='k')
+        record_job.enqueue(value='b')
+    assert Job.objects.filter(status=Job.QUEUED).count() == 2
+
+    assert jobs.run_pending() == (2, 0)
+    assert sorted(calls) == ['a', 'b']
+    assert set(Job.objects.values_list('status', flat=True)) == {Job.DONE}
+
+    # finished keys can be queued again
+    with django_capture_on_commit_callbacks(execute=True):
+        record_job.enqueue(value='a', key='k')
+    assert Job.objects.filter(status=Job.QUEUED).count() == 1
+
+
+@pytest.mark.django_db
+def test_failures_back_off_then_fail(queued, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        record_job.enqueue(value='boom')
+
+    assert jobs.run_pending() == (0, 1)
+    job = Job.objects.get()
+    assert (job.status, job.attempts) == (Job.QUEUED, 1)
+    assert 'RuntimeError: boom' in job.last_error
+    assert jobs.run_pending() == (0, 0)  # not due yet
+
+    Job.objects.update(run_at=job.created_at)
+    assert jobs.run_pending() == (0, 1)
+    job.refresh_from_db()
+    assert (job.status, job.attempts) == (Job.FAILED, 2)
+
+
+@pytest.mark.django_db
+def test_eager_runs_after_commit(settings, django_capture_on_commit_callbacks):
+    settings.JOBS_EAGER = True
+    calls.clear()
+    with django_capture_on_commit_callbacks(execute=True):
+        record_job.enqueue(value='now')
+        assert calls == []
+    assert calls == ['now']
+    assert not Job.objects.exists()
+
+
+@pytest.mark.django_db
+def test_stale_running_jobs_are_reclaimed_until_out_of_attempts(queued, settings):
+    settings.JOBS_LOCK_TIMEOUT = 60
+    locked_at = timezone.now() - timedelta(minutes=5)
+    lost = Job.objects.create(name='tests.record', payload={'value': 'x'}, status=Job.RUNNING,
+                              locked_at=locked_at, attempts=1, max_attempts=2)
+    exhausted = Job.objects.create(name='tests.record', payload={'value': 'y'}, status=Job.RUNNING,
+                                   locked_at=locked_at, attempts=2, max_attempts=2)
+
+    assert [job.pk for job in jobs.claim(10)] == [lost.pk]
+    exhausted.refresh_from_db()
+    assert exhausted.status == Job.FAILED
+    assert jobs.claim(10) == []
@@ -0,0 +1,38 @@
+import json
+import random
+
+import pytest
+from core_api import loadtest
+
+
+def test_percentile_and_replay_parsing(tmp_path):
+    assert loadtest.percentile([0.1, 0.2, 0.3, 0.4], 0.5) == 0.2
+    assert loadtest.percentile([0.1, 0.2, 0.3, 0.4], 0.99) == 0.4
+
+    log = tmp_path / 'requests.jsonl'
+    log.write_text('\n'.join([
+        json.dumps({'method': 'get', 'path': '/api/items/'}),
+        json.dumps({'request_id': 'user-001', 'title': 'not a request'}),
+        json.dumps({'method': 'POST', 'path': '/api/auth/login/', 'body': {'username': 'a'}}),
+        'garbage',
+    ]))
+    requests, skipped = loadtest.load_replay(log)
+    assert [(r.method, r.path) for r in requests] == [('GET', '/api/items/'), ('POST', '/api/auth/login/')]
+    assert skipped == 2
+
+
+@pytest.mark.django_db(transaction=True)
+def test_wsgi_run_reports_per_route(settings):
+    settings.PASSWORD_HASH_ITERATIONS = 1000
+    loadtest.seed(users=3, items=20, wishlists_per_user=2)
+    mix = loadtest.TrafficMix({'browse_items': 1, 'item_detail': 1}, rng=random.Random(1))
+
+    results = loadtest.run_wsgi(
+        loadtest.build_app('wsgi'), lambda index: mix.next(),
+        rps=500, duration=5, concurrency=2, max_requests=12
+    )
+    summary = results.summary()
+    routes = {row['route']: row for row in summary['routes']}
+    assert set(routes) <= {'tradeitem-list', 'tradeitem-detail'}
+    assert sum(row['requests'] for row in routes.values()) == 12
+    assert all(row['error_rate'] == 0 for row in routes.values())
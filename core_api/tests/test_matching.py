@@ -0,0 +1,78 @@
+import pytest
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from core_api import matching
+from core_api.models import TradeItem, TradeMatch
+
+
+def test_tokenize_folds_plurals_and_drops_stopwords():
+    assert matching.tokenize('Looking for Naruto Figures and a poster') == {'naruto', 'figure', 'poster'}
+
+
+@pytest.fixture
+def traders(db):
+    alice = User.objects.create_user(username='alice', password='pass')
+    bob = User.objects.create_user(username='bob', password='pass')
+    naruto = TradeItem.objects.create(
+        title='Naruto Figure', description='Limited edition', interests='One Piece poster', owner=alice
+    )
+    one_piece = TradeItem.objects.create(
+        title='One Piece Poster', description='Signed', interests='Naruto figures', owner=bob
+    )
+    # alice's second item wants what bob has but bob doesn't want it
+    bleach = TradeItem.objects.create(
+        title='Bleach Manga', description='Vol 1', interests='One Piece poster', owner=alice
+    )
+    return naruto, one_piece, bleach
+
+
+@pytest.mark.django_db
+def test_index_item_stores_mutual_matches_only(traders):
+    naruto, one_piece, bleach = traders
+    for item in traders:
+        matching.index_item(item)
+
+    assert list(TradeMatch.objects.filter(item=naruto).values_list('matched_item_id', flat=True)) == [one_piece.id]
+    assert list(TradeMatch.objects.filter(item=one_piece).values_list('matched_item_id', flat=True)) == [naruto.id]
+    assert not TradeMatch.objects.filter(item=bleach).exists()
+
+    one_piece.status = 'traded'
+    one_piece.save()
+    matching.index_item(one_piece)
+    assert not TradeMatch.objects.exists()
+
+
+@pytest.mark.django_db
+def test_rebuild_index_matches_incremental_results(traders):
+    for item in traders:
+        matching.index_item(item)
+    incremental = set(TradeMatch.objects.values_list('item_id', 'matched_item_id', 'score'))
+
+    items, rows = matching.rebuild_index()
+    assert items == 3
+    assert rows == 2
+    assert set(TradeMatch.objects.values_list('item_id', 'matched_item_id', 'score')) == incremental
+
+
+@pytest.mark.django_db
+def test_matches_endpoint(traders):
+    naruto, one_piece, _ = traders
+    matching.rebuild_index()
+    response = APIClient().get(f'/api/items/{naruto.id}/matches/')
+    assert response.status_code == 200
+    assert response.data[0]['matched_item']['id'] == one_piece.id
+    assert response.data[0]['score'] > 0
+
+
+@pytest.mark.django_db
+def test_only_matching_field_changes_reindex(traders, monkeypatch):
+    naruto, _, _ = traders
+    calls = []
+    monkeypatch.setattr(matching.index_item_job, 'enqueue', lambda **kwargs: calls.append(kwargs))
+    item = TradeItem.objects.get(pk=naruto.pk)
+    item.image = 'items/naruto.jpg'
+    item.save()
+    assert calls == []
+    item.interests = 'Bleach manga'
+    item.save()
+    assert calls == [{'item_id': naruto.pk, 'key': f'matching:{naruto.pk}'}]
@@ -0,0 +1,21 @@
+import pytest
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from core_api.models import TradeItem
+
+pytest.importorskip('brotli')
+
+
+@pytest.mark.django_db
+def test_brotli_only_for_anonymous_responses(settings):
+    settings.COMPRESSION_MIN_SIZE = 0
+    owner = User.objects.create_user(username='owner', password='pass')
+    item = TradeItem.objects.create(title='Figure', description='Limited edition ' * 50, interests='x', owner=owner)
+
+    response = APIClient().get(f'/api/items/{item.id}/', HTTP_ACCEPT_ENCODING='br, gzip')
+    assert response['Content-Encoding'] == 'br'
+
+    client = APIClient()
+    client.force_authenticate(user=owner)
+    response = client.get(f'/api/items/{item.id}/', HTTP_ACCEPT_ENCODING='br, gzip')
+    assert response['Content-Encoding'] == 'gzip'
@@ -0,0 +1,103 @@
+import threading
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from rest_framework.test import APIClient
+from core_api import trading
+from core_api.models import TradeItem, TradeOffer
+
+
+@pytest.fixture
+def traders(db):
+    users = [User.objects.create_user(username=name, password='pass') for name in ('alice', 'bob', 'carol')]
+    items = {
+        user.username: TradeItem.objects.create(
+            title=f"{user.username}'s figure", description='desc', interests='fig', owner=user
+        )
+        for user in users
+    }
+    return users, items
+
+
+def client_for(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.mark.django_db
+def test_offer_lifecycle(traders):
+    (alice, bob, carol), items = traders
+    response = client_for(alice).post('/api/offers/', {
+        'offered_item_id': items['alice'].id, 'requested_item_id': items['bob'].id, 'message': 'swap?'
+    }, format='json')
+    assert response.status_code == 201
+    offer_id = response.data['id']
+    # carol wants bob's item too
+    other = trading.create_offer(carol, items['carol'], items['bob'])
+
+    inbox = client_for(bob).get('/api/offers/inbox/?status=pending')
+    assert {row['id'] for row in inbox.data['results']} == {offer_id, other.id}
+    assert client_for(alice).get('/api/offers/outbox/').data['results'][0]['recipient'] == 'bob'
+    assert client_for(carol).get(f'/api/offers/{offer_id}/').status_code == 404
+
+    assert client_for(alice).post(f'/api/offers/{offer_id}/accept/').status_code == 403
+    response = client_for(bob).post(f'/api/offers/{offer_id}/accept/')
+    assert response.data['status'] == 'accepted'
+    assert set(TradeItem.objects.filter(owner__in=[alice, bob]).values_list('status', flat=True)) == {'pending'}
+    other.refresh_from_db()
+    assert other.status == 'declined'
+    assert client_for(bob).post(f'/api/offers/{offer_id}/decline/').status_code == 409
+
+    assert client_for(alice).post(f'/api/offers/{offer_id}/complete/').data['status'] == 'completed'
+    assert set(TradeItem.objects.filter(owner__in=[alice, bob]).values_list('status', flat=True)) == {'traded'}
+
+
+@pytest.mark.django_db
+def test_counter_offer_goes_back_to_sender(traders):
+    (alice, bob, carol), items = traders
+    second = TradeItem.objects.create(title='Poster', description='desc', interests='fig', owner=alice)
+    offer = trading.create_offer(alice, items['alice'], items['bob'])
+    response = client_for(bob).post(f'/api/offers/{offer.id}/counter/', {
+        'offered_item_id': items['bob'].id, 'requested_item_id': second.id
+    }, format='json')
+    assert response.status_code == 201
+    assert (response.data['sender'], response.data['recipient'], response.data['parent']) == ('bob', 'alice', offer.id)
+    offer.refresh_from_db()
+    assert offer.status == 'countered'
+
+    # offering someone else's item is rejected up front
+    response = client_for(alice).post('/api/offers/', {
+        'offered_item_id': items['carol'].id, 'requested_item_id': items['bob'].id
+    }, format='json')
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_accepts_never_double_trade(traders):
+    (alice, bob, carol), items = traders
+    # bob's item is offered to both alice and carol; both accept at once
+    offers = [trading.create_offer(bob, items['bob'], items[name]) for name in ('alice', 'carol')]
+    barrier = threading.Barrier(2)
+    outcomes = []
+
+    def accept(offer, user):
+        try:
+            barrier.wait()
+            trading.accept(offer.id, user)
+            outcomes.append('accepted')
+        except trading.OfferConflict:
+            outcomes.append('conflict')
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=accept, args=args) for args in zip(offers, (alice, carol))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(outcomes) == ['accepted', 'conflict']
+    assert TradeOffer.objects.filter(status='accepted').count() == 1
+    assert TradeItem.objects.get(pk=items['bob'].pk).status == 'pending'
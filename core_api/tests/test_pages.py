@@ -0,0 +1,78 @@
+import pytest
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from core_api.models import Review, TradeItem, UserProfile, Wishlist
+
+
+@pytest.fixture
+def catalog(db):
+    seller = User.objects.create_user(username='seller', password='pass')
+    other = User.objects.create_user(username='other', password='pass')
+    fan = User.objects.create_user(username='fan', password='pass')
+    items = [
+        TradeItem.objects.create(title=f'Figure {i}', description='desc', interests='x', owner=seller)
+        for i in range(3)
+    ]
+    items.append(TradeItem.objects.create(title='Poster', description='desc', interests='x', owner=other))
+    Review.objects.create(reviewer=fan, reviewee=seller, rating=5, comment='great')
+    Review.objects.create(reviewer=other, reviewee=seller, rating=3, comment='ok')
+    Wishlist.objects.create(user=fan, item=items[1])
+    return fan, items
+
+
+@pytest.mark.django_db
+def test_item_page_in_one_response(catalog):
+    fan, items = catalog
+    client = APIClient()
+    client.force_authenticate(user=fan)
+    response = client.get(f'/api/items/{items[1].id}/page/')
+    assert response.status_code == 200
+    assert response.data['item']['title'] == 'Figure 1'
+    assert response.data['owner_profile']['username'] == 'seller'
+    assert response.data['rating']['average_rating'] == 4
+    assert response.data['rating']['review_count'] == 2
+    assert response.data['in_wishlist'] is True
+
+    assert APIClient().get(f'/api/items/{items[1].id}/page/').data['in_wishlist'] is None
+    assert client.get('/api/items/999999/page/').status_code == 404
+    for pk in ('²', str(2 ** 63)):
+        assert client.get(f'/api/items/{pk}/page/').status_code == 404
+
+
+@pytest.mark.django_db
+def test_batched_pages_use_fixed_queries(catalog, django_assert_num_queries):
+    fan, items = catalog
+    client = APIClient()
+    client.force_authenticate(user=fan)
+    ids = ','.join(str(item.id) for item in items) + ',999999'
+    # items, profiles, ratings, wishlist: shared owners are loaded once
+    with django_assert_num_queries(4):
+        response = client.get(f'/api/items/pages/?ids={ids}')
+    assert [page['item']['id'] for page in response.data['results']] == [item.id for item in items]
+    assert response.data['missing'] == [999999]
+    assert [page['in_wishlist'] for page in response.data['results']] == [False, True, False, False]
+    assert response.data['results'][3]['rating']['review_count'] == 0
+
+    for ids in ('a,b', '1,²', str(2 ** 63), ''):
+        assert client.get(f'/api/items/pages/?ids={ids}').status_code == 400
+
+
+@pytest.mark.django_db
+def test_owner_profile_is_public_subset_for_others(catalog):
+    fan, items = catalog
+    seller = items[0].owner
+    UserProfile.objects.filter(user=seller).update(bio='private bio', favorite_genres=['mecha'])
+
+    owner = APIClient()
+    owner.force_authenticate(user=seller)
+    anonymous = APIClient()
+    other = APIClient()
+    other.force_authenticate(user=fan)
+
+    assert owner.get(f'/api/items/{items[0].id}/page/').data['owner_profile']['bio'] == 'private bio'
+    for client in (anonymous, other):
+        profile = client.get(f'/api/items/{items[0].id}/page/').data['owner_profile']
+        assert set(profile) == {'username', 'avatar', 'trust_score'}
+        pages = client.get(f'/api/items/pages/?ids={items[0].id}').data['results']
+        assert 'bio' not in pages[0]['owner_profile']
+        assert 'favorite_genres' not in pages[0]['owner_profile']
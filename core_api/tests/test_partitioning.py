@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db import connection
+from core_api import partitioning
+from core_api.models import Review, TradeItem
+from core_api.tests.queryplans import explain
+
+pytestmark = pytest.mark.skipif(connection.vendor != 'postgresql', reason='partitioning needs PostgreSQL')
+
+NOW = datetime(2026, 10, 19, tzinfo=timezone.utc)
+
+
+@pytest.mark.django_db
+def test_tables_with_inbound_fks_or_global_uniques_are_refused():
+    reasons = partitioning.blockers(TradeItem._meta.db_table)
+    assert any('core_api_wishlist' in reason for reason in reasons)
+    assert any('unique' in reason for reason in partitioning.blockers(Review._meta.db_table))
+
+    with pytest.raises(CommandError, match='--drop-inbound-fks'):
+        call_command('partition_tables', 'convert', 'core_api.TradeItem', stdout=StringIO())
+    assert not partitioning.is_partitioned(TradeItem._meta.db_table)
+
+
+@pytest.mark.django_db
+def test_convert_keeps_rows_and_orm_and_prunes_ranges():
+    # DDL is transactional in PostgreSQL, the test's rollback undoes it
+    users = [User.objects.create_user(username=f'user{i}', password='pass') for i in range(3)]
+    old = Review.objects.create(reviewer=users[0], reviewee=users[1], rating=4, comment='old')
+    table = Review._meta.db_table
+
+    partitioning.convert(table, months_ahead=2, relax_unique=True, now=NOW)
+    assert partitioning.is_partitioned(table)
+    names = [partition.name for partition in partitioning.partitions(table)]
+    assert names == [f'{table}_p_legacy', f'{table}_p202611', f'{table}_p202612', f'{table}_p202701']
+
+    # the ORM reads old rows and writes new ones through the parent
+    new = Review.objects.create(reviewer=users[2], reviewee=users[1], rating=5, comment='new')
+    assert new.pk > old.pk
+    Review.objects.filter(pk=new.pk).update(created_at=datetime(2026, 11, 5, tzinfo=timezone.utc))
+    assert set(Review.objects.values_list('comment', flat=True)) == {'old', 'new'}
+
+    november = Review.objects.filter(created_at__gte=datetime(2026, 11, 1, tzinfo=timezone.utc),
+                                     created_at__lt=datetime(2026, 12, 1, tzinfo=timezone.utc))
+    assert explain(*november.query.sql_with_params()).relations == {f'{table}_p202611'}
+
+    created, detached = partitioning.maintain(
+        table, months_ahead=3, retain_months=1, detach=True, now=datetime(2027, 1, 10, tzinfo=timezone.utc)
+    )
+    assert created == [f'{table}_p202702', f'{table}_p202703', f'{table}_p202704']
+    assert detached == [f'{table}_p_legacy', f'{table}_p202611']
+    assert list(Review.objects.values_list('comment', flat=True)) == []
+
+
+@pytest.mark.django_db
+def test_maintain_creates_partitions_when_none_are_left():
+    table = Review._meta.db_table
+    partitioning.convert(table, months_ahead=0, relax_unique=True, now=NOW)
+    for partition in partitioning.partitions(table):
+        with connection.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE {table} DETACH PARTITION {partition.name}')
+
+    created, _ = partitioning.maintain(table, months_ahead=1, now=NOW)
+    assert created == [f'{table}_p202610', f'{table}_p202611']
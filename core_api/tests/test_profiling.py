@@ -0,0 +1,95 @@
+import sys
+import threading
+import time
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from rest_framework_simplejwt.tokens import RefreshToken
+from core_api import profiling
+
+
+@pytest.fixture
+def profiler(settings):
+    settings.PROFILING = {**settings.PROFILING, 'ENABLED': True, 'INTERVAL': 0.001}
+    settings.MIDDLEWARE = settings.MIDDLEWARE + ['core_api.profiling.SamplingProfilerMiddleware']
+
+
+def spin(seconds):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        pass
+
+
+def test_sampler_folds_stacks_below_the_root():
+    stacks = {}
+
+    def target():
+        sampler = profiling.Sampler(threading.get_ident(), sys._getframe(), 0.001)
+        sampler.start()
+        spin(0.1)
+        stacks.update(sampler.stop())
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    thread.join()
+    assert max(stacks, key=stacks.get).startswith(f'{__name__}:spin:')
+    assert not any(':target:' in stack for stack in stacks)
+
+
+@pytest.mark.django_db
+def test_staff_requests_with_header_are_profiled(profiler):
+    staff = User.objects.create_user(username='staff', password='pass', is_staff=True)
+    User.objects.create_user(username='seller', password='pass')
+    token = str(RefreshToken.for_user(staff).access_token)
+    client = Client()
+    url = '/api/reviews/user_reviews/?username=seller'
+
+    assert 'X-Profile-Samples' not in client.get(url, HTTP_AUTHORIZATION=f'Bearer {token}')
+    response = client.get(url, HTTP_AUTHORIZATION=f'Bearer {token}', HTTP_X_PROFILE='1')
+    assert response.status_code == 200
+    assert 'X-Profile-Samples' in response
+
+    # non-staff can't trigger it
+    User.objects.create_user(username='plain', password='pass')
+    client.login(username='plain', password='pass')
+    assert 'X-Profile-Samples' not in client.get(url, HTTP_X_PROFILE='1')
+
+
+@pytest.mark.django_db
+def test_admin_endpoint_serves_folded_stacks(profiler):
+    profiling.record('review-user-reviews', {'a:f:1;b:g:2': 3})
+    profiling.record('review-user-reviews', {'a:f:1;b:g:2': 2, 'a:f:1;c:h:3': 1})
+    client = Client()
+    assert client.get('/admin/profiling/').status_code == 302  # login required
+
+    admin = User.objects.create_superuser(username='admin', password='pass')
+    client.force_login(admin)
+    assert client.get('/admin/profiling/').json() == {'routes': {'review-user-reviews': 6}}
+    response = client.get('/admin/profiling/?route=review-user-reviews')
+    assert response.content.decode() == 'a:f:1;b:g:2 5\na:f:1;c:h:3 1\n'
+
+    client.post('/admin/profiling/', {'clear': '1'})
+    assert client.get('/admin/profiling/').json() == {'routes': {}}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_records_are_not_lost():
+    barrier = threading.Barrier(8)
+
+    def worker():
+        barrier.wait()
+        try:
+            for _ in range(5):
+                profiling.record('item-list', {'a:f:1': 1, 'a:f:1;b:g:2': 2})
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert profiling.routes() == {'item-list': 120}
+    assert profiling.folded('item-list') == 'a:f:1 40\na:f:1;b:g:2 80\n'
@@ -0,0 +1,78 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from rest_framework.test import APIClient
+from core_api import loadtest
+from core_api.models import Review, TradeItem, Wishlist
+from core_api.tests.queryplans import capture_plans, format_report, indexes_leading_with
+
+pytestmark = pytest.mark.skipif(connection.vendor != 'postgresql', reason='EXPLAIN checks need PostgreSQL')
+
+# tables big enough in production that a sequential scan is a regression
+LARGE_TABLES = {
+    TradeItem._meta.db_table, Review._meta.db_table, Wishlist._meta.db_table, User._meta.db_table,
+}
+
+
+@pytest.fixture
+def seeded(db, settings):
+    settings.SINGLE_FLIGHT = {**settings.SINGLE_FLIGHT, 'ENABLED': False}
+    cache.clear()
+    loadtest.seed(users=20, items=400, wishlists_per_user=5)
+    users = list(User.objects.filter(username__startswith=loadtest.LOADTEST_PREFIX).order_by('pk'))
+    Review.objects.bulk_create([
+        Review(reviewer=reviewer, reviewee=reviewee, rating=1 + (reviewer.pk + reviewee.pk) % 5, comment='ok')
+        for reviewer in users for reviewee in users[:5] if reviewer != reviewee
+    ])
+    # like production, only a handful of items are mid-trade at any time
+    pending = TradeItem.objects.filter(status='pending').values_list('pk', flat=True)[5:]
+    TradeItem.objects.filter(pk__in=list(pending)).update(status='available')
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    return users
+
+
+# (name, url, authenticate, [(model, leading columns of an index the plan must use)])
+ENDPOINTS = [
+    ('item list', lambda users: '/api/items/', False, [(TradeItem, 'created_at')]),
+    ('items by status', lambda users: '/api/items/?status=pending', False, [(TradeItem, 'status', 'created_at')]),
+    ('items by owner and status', lambda users: f'/api/items/?owner={users[0].pk}&status=available', False,
+     [(TradeItem, 'owner_id', 'status')]),
+    ('trending items', lambda users: '/api/items/trending/', False, [(TradeItem, 'trending_score')]),
+    ('user items', lambda users: f'/api/users/{users[0].username}/items/', False,
+     [(TradeItem, 'owner_username', 'created_at')]),
+    ('user reviews', lambda users: f'/api/reviews/user_reviews/?username={users[0].username}', False,
+     [(Review, 'reviewee_id')]),
+    ('wishlist', lambda users: '/api/wishlist/', True, [(Wishlist, 'user_id')]),
+]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('name, url, auth, expected', ENDPOINTS, ids=[endpoint[0] for endpoint in ENDPOINTS])
+def test_endpoint_queries_use_indexes(seeded, name, url, auth, expected):
+    client = APIClient()
+    if auth:
+        client.force_authenticate(user=seeded[0])
+    response, plans = capture_plans(lambda: client.get(url(seeded)))
+    assert response.status_code == 200
+    report = format_report(plans)
+
+    scanned = set().union(*(plan.seq_scans for plan in plans)) & LARGE_TABLES
+    assert not scanned, f'sequential scan on {", ".join(sorted(scanned))}:\n{report}'
+    used = set().union(*(plan.indexes for plan in plans))
+    for model, *columns in expected:
+        assert used & indexes_leading_with(model, *columns), (
+            f'no index on {model._meta.db_table}({", ".join(columns)}) used:\n{report}'
+        )
+
+
+@pytest.mark.django_db
+def test_lost_index_is_reported(seeded):
+    # dropped inside the test transaction, rolled back afterwards
+    with connection.cursor() as cursor:
+        cursor.execute('DROP INDEX core_api_item_trending_idx')
+    response, plans = capture_plans(lambda: APIClient().get('/api/items/trending/'))
+    assert response.status_code == 200
+    assert TradeItem._meta.db_table in plans[0].seq_scans
+    assert 'Seq Scan on core_api_tradeitem' in format_report(plans)
@@ -0,0 +1,94 @@
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from core_api import matching, recommendations
+from core_api.models import TradeItem, UserProfile, Wishlist
+
+pytest.importorskip('scipy')
+
+
+def test_compute_item_similarities_cosine():
+    # users 1 and 2 both want items 10 and 11, user 3 only wants 12
+    pairs = [(1, 10), (1, 11), (2, 10), (2, 11), (3, 12), (3, 10)]
+    rows = {(a, b): score for a, b, score in recommendations.compute_item_similarities(pairs, top_k=5)}
+    assert rows[(10, 11)] == pytest.approx(2 / (3 ** 0.5 * 2 ** 0.5))
+    assert rows[(10, 11)] == rows[(11, 10)]
+    assert (11, 12) not in rows
+
+
+@pytest.fixture
+def catalogue(db):
+    seller = User.objects.create_user(username='seller', password='pass')
+    items = [
+        TradeItem.objects.create(title=title, description='desc', interests='anything', owner=seller)
+        for title in ('Naruto Figure', 'Sasuke Figure', 'Mecha Gundam Kit')
+    ]
+    fans = [User.objects.create_user(username=f'fan{i}', password='pass') for i in range(3)]
+    for fan in fans[:2]:
+        Wishlist.objects.create(user=fan, item=items[0])
+        Wishlist.objects.create(user=fan, item=items[1])
+    Wishlist.objects.create(user=fans[2], item=items[0])
+    for item in items:
+        matching.index_item(item)
+    recommendations.rebuild_similarities()
+    return items, fans
+
+
+@pytest.mark.django_db
+def test_recommendations_from_cooccurrence(catalogue):
+    items, fans = catalogue
+    client = APIClient()
+    client.force_authenticate(user=fans[2])
+    response = client.get('/api/recommendations/')
+    assert response.status_code == 200
+    assert [row['item']['id'] for row in response.data] == [items[1].id]
+
+
+@pytest.mark.django_db
+def test_recommendations_blend_genres_and_refresh_on_profile_change(catalogue):
+    items, fans = catalogue
+    user = fans[2]
+    assert [item_id for item_id, _ in recommendations.recommend(user)] == [items[1].id]
+
+    profile = user.userprofile
+    profile.favorite_genres = ['Mecha']
+    profile.save()
+
+    ranked = [item_id for item_id, _ in recommendations.recommend(user)]
+    assert set(ranked) == {items[1].id, items[2].id}
+
+
+@pytest.mark.django_db
+def test_only_genre_changes_invalidate_profiles(catalogue):
+    items, fans = catalogue
+    with CaptureQueriesContext(connection) as queries:
+        User.objects.create_user(username='newcomer', password='pass')
+    assert not any(q['sql'].startswith('UPDATE') for q in queries.captured_queries)
+
+    profile = UserProfile.objects.get(user=fans[2])
+    version = profile.recommendations_version
+    profile.bio = 'hello'
+    profile.save()
+    assert UserProfile.objects.get(pk=profile.pk).recommendations_version == version
+    profile.favorite_genres = ['Mecha']
+    profile.save()
+    assert UserProfile.objects.get(pk=profile.pk).recommendations_version == version + 1
+
+
+@pytest.mark.django_db
+def test_cache_keys_follow_database_versions(catalogue):
+    items, fans = catalogue
+    user = fans[2]
+    key = recommendations._user_key(user.pk)
+    assert [item_id for item_id, _ in recommendations.recommend(user)] == [items[1].id]
+
+    # the old entry stays cached, as it would in another process, but is no longer read
+    Wishlist.objects.create(user=user, item=items[1])
+    assert recommendations._cache().get(key) is not None
+    assert recommendations.recommend(user) == []
+
+    key = recommendations._user_key(user.pk)
+    recommendations.rebuild_similarities()
+    assert recommendations._user_key(user.pk) != key
@@ -0,0 +1,75 @@
+import threading
+import time
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from rest_framework.test import APIClient
+from core_api import feed, singleflight
+from core_api.models import TradeItem
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def test_concurrent_misses_compute_once():
+    calls = []
+    barrier = threading.Barrier(8)
+    results = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return 'value'
+
+    def reader():
+        barrier.wait()
+        results.append(singleflight.cached('hot', compute))
+
+    threads = [threading.Thread(target=reader) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ['value'] * 8
+    assert len(calls) == 1
+
+
+def test_other_worker_holding_the_lock(settings):
+    settings.SINGLE_FLIGHT = {**settings.SINGLE_FLIGHT, 'WAIT': 0.2}
+    cache.add('hot:lock', 1, 10)
+    # a stale value is served while the lock holder refreshes
+    stale = ('old', 0.0, time.time() - 1)
+    assert singleflight._fill('hot', lambda: 'new', 30, stale) == 'old'
+    # nothing to serve: give up waiting and compute
+    assert singleflight._fill('hot', lambda: 'new', 30, None) == 'new'
+
+
+def test_xfetch_refreshes_early_in_proportion_to_cost(monkeypatch):
+    monkeypatch.setattr(singleflight.random, 'random', lambda: 0.5)
+    now = time.time()
+    assert not singleflight._should_refresh(('v', 0.01, now + 5), now)
+    # expensive values start refreshing well before expiry
+    assert singleflight._should_refresh(('v', 10.0, now + 5), now)
+    assert singleflight._should_refresh(('v', 0.01, now - 1), now)
+
+
+@pytest.mark.django_db
+def test_item_reads_are_served_from_the_flight_cache(settings, django_assert_num_queries):
+    settings.SINGLE_FLIGHT = {**settings.SINGLE_FLIGHT, 'ENABLED': True}
+    owner = User.objects.create_user(username='owner', password='pass')
+    item = TradeItem.objects.create(title='Figure', description='desc', interests='x', owner=owner)
+    client = APIClient()
+    first = client.get(f'/api/items/{item.id}/')
+    with django_assert_num_queries(0):
+        second = client.get(f'/api/items/{item.id}/')
+    assert second.data == first.data
+    assert second['ETag'] == first['ETag']
+
+    TradeItem.objects.filter(pk=item.pk).update(title='Renamed')
+    feed.mark_stale()
+    assert client.get(f'/api/items/{item.id}/').data['title'] == 'Renamed'
@@ -0,0 +1,71 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client
+from core_api import feed
+from core_api.models import TradeItem
+from core_api.storage import is_hashed_name
+
+
+@pytest.fixture
+def owner(db):
+    return User.objects.create_user(username='owner', password='pass')
+
+
+def upload(owner, filename, data):
+    return TradeItem.objects.create(
+        title='Figure', description='desc', interests='fig', owner=owner,
+        image=SimpleUploadedFile(filename, data, content_type='image/png')
+    )
+
+
+@pytest.mark.django_db
+def test_identical_uploads_share_one_file(owner):
+    first = upload(owner, 'Screenshot 1.PNG', b'same bytes')
+    second = upload(owner, 'copy.png', b'same bytes')
+    third = upload(owner, 'other.png', b'other bytes')
+    assert first.image.name == second.image.name != third.image.name
+    assert is_hashed_name(first.image.name)
+    assert first.image.name.startswith('trade_items/') and first.image.name.endswith('.png')
+
+    # deleting one row's file keeps the blob the other row points at
+    first.image.delete()
+    assert default_storage.exists(second.image.name)
+
+
+@pytest.mark.django_db
+def test_media_view_hands_off_to_web_server(owner, settings):
+    item = upload(owner, 'naruto.png', b'png bytes')
+    client = Client()
+
+    settings.MEDIA_SERVE_MODE = 'x-accel'
+    response = client.get(item.image.url)
+    assert response['X-Accel-Redirect'] == '/protected-media/' + item.image.name
+    assert response['Content-Type'] == 'image/png'
+    assert 'immutable' in response['Cache-Control']
+    assert response.content == b''
+
+    settings.MEDIA_SERVE_MODE = 'django'
+    assert b''.join(client.get(item.image.url).streaming_content) == b'png bytes'
+    assert client.get('/media/../settings.py').status_code == 404
+
+
+@pytest.mark.django_db
+def test_dedupe_media_moves_legacy_names(owner, settings, django_capture_on_commit_callbacks):
+    # files written before content addressing, under their upload names
+    plain = FileSystemStorage(location=settings.MEDIA_ROOT)
+    legacy = [plain.save(f'trade_items/shot{i}.png', ContentFile(b'dup')) for i in range(2)]
+    items = [
+        TradeItem.objects.create(title='Figure', description='desc', interests='fig', owner=owner, image=name)
+        for name in legacy
+    ]
+    generation = feed.generation()
+    with django_capture_on_commit_callbacks(execute=True):
+        call_command('dedupe_media')
+    assert feed.generation() == generation + 1
+    names = {TradeItem.objects.get(pk=item.pk).image.name for item in items}
+    assert len(names) == 1 and is_hashed_name(names.pop())
+    assert not any(default_storage.exists(name) for name in legacy)
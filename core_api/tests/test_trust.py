@@ -0,0 +1,113 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from core_api import jobs, trust
+from core_api.models import Job, Review, TradeItem, TrustDelta, UserProfile
+
+pytest.importorskip('scipy')
+
+
+def test_review_ring_gains_less_than_vouched_users():
+    # 1 is staff; 1..4 vouch for 5, 3 pans 4; 6..8 only praise each other
+    reviewers = [1, 2, 3, 4, 1, 2, 3, 6, 7, 8, 6]
+    reviewees = [5, 5, 5, 5, 2, 1, 4, 7, 8, 6, 8]
+    ratings = [5, 5, 5, 4, 5, 5, 1, 5, 5, 5, 5]
+    user_ids, scores, iterations = trust.compute_trust(reviewers, reviewees, ratings, pretrusted=[1])
+    score = dict(zip(user_ids.tolist(), scores.tolist()))
+    assert iterations < 100
+    assert sum(score.values()) == pytest.approx(len(user_ids))
+    assert score[5] > score[2] > score[4]
+    assert max(score[6], score[7], score[8]) == pytest.approx(0)
+
+    # warm start from the answer converges immediately
+    _, again, warm_iterations = trust.compute_trust(
+        reviewers, reviewees, ratings, pretrusted=[1], previous=score
+    )
+    assert warm_iterations <= 2
+    assert again == pytest.approx(scores)
+
+
+@pytest.mark.django_db
+def test_scores_are_stored_and_exposed(django_capture_on_commit_callbacks):
+    seller = User.objects.create_user(username='seller', password='pass')
+    buyers = [User.objects.create_user(username=f'buyer{i}', password='pass') for i in range(3)]
+    item = TradeItem.objects.create(title='Figure', description='desc', interests='x', owner=seller)
+    with django_capture_on_commit_callbacks(execute=True):
+        for buyer in buyers:
+            Review.objects.create(reviewer=buyer, reviewee=seller, rating=5, comment='great')
+    # the reviews share one queued refresh, run it now instead of after REFRESH_DELAY
+    Job.objects.filter(name='trust.refresh').update(run_at=timezone.now())
+    assert jobs.run_pending() == (1, 0)
+
+    profile = UserProfile.objects.get(user=seller)
+    item.refresh_from_db()
+    assert profile.trust_score > 1.0
+    assert item.owner_trust_score == profile.trust_score
+
+    client = APIClient()
+    response = client.get('/api/users/seller/items/')
+    assert response.data['results'][0]['owner_trust_score'] == profile.trust_score
+
+    # full recompute leaves settled scores alone; deleting the edges zeroes them
+    call_command('compute_trust_scores', stdout=open('/dev/null', 'w'))
+    Review.objects.all().delete()
+    trust.refresh()
+    assert UserProfile.objects.get(user=seller).trust_score == 0
+    assert TradeItem.objects.get(pk=item.pk).owner_trust_score == 0
+
+
+@pytest.mark.django_db
+def test_reviews_queue_one_delayed_refresh(settings, django_capture_on_commit_callbacks):
+    settings.TRUST = {**settings.TRUST, 'REFRESH_DELAY': 60}
+    reviewer = User.objects.create_user(username='reviewer', password='pass')
+    sellers = [User.objects.create_user(username=f'seller{i}', password='pass') for i in range(2)]
+    for eager in (False, True):
+        settings.JOBS_EAGER = eager
+        with django_capture_on_commit_callbacks(execute=True):
+            Review.objects.create(reviewer=reviewer, reviewee=sellers[eager], rating=5, comment='ok')
+    job = Job.objects.get(name='trust.refresh')
+    assert job.status == Job.QUEUED
+    assert job.run_at > timezone.now() + timedelta(seconds=30)
+
+
+@pytest.mark.django_db
+def test_incremental_refresh_pushes_changes_from_stored_scores(django_capture_on_commit_callbacks):
+    staff = User.objects.create_user(username='staff', password='pass', is_staff=True)
+    users = [User.objects.create_user(username=f'user{i}', password='pass') for i in range(6)]
+    item = TradeItem.objects.create(title='Figure', description='desc', interests='x', owner=users[3])
+    edges = [(staff, users[0], 5), (staff, users[1], 4), (users[0], users[2], 5), (users[1], users[3], 5),
+             (users[2], users[0], 4), (users[3], users[4], 5), (users[4], users[5], 3)]
+    for reviewer, reviewee, rating in edges:
+        Review.objects.create(reviewer=reviewer, reviewee=reviewee, rating=rating, comment='ok')
+    trust.refresh()
+    assert not TrustDelta.objects.exists()
+    item_version = TradeItem.objects.get(pk=item.pk).version
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Review.objects.create(reviewer=users[2], reviewee=users[3], rating=5, comment='ok')
+        Review.objects.filter(reviewer=users[0]).get().delete()
+    assert TrustDelta.objects.count() == 2
+    with CaptureQueriesContext(connection) as queries:
+        stats = trust.refresh(incremental=True)
+    assert stats['reviews'] == 2 and stats['updated'] > 0
+    review_table = Review._meta.db_table
+    assert all('WHERE' in q['sql'] for q in queries.captured_queries if review_table in q['sql'])
+    assert not TrustDelta.objects.exists()
+
+    reviewers, reviewees, ratings = trust.load_reviews()
+    user_ids, scores, _ = trust.compute_trust(reviewers, reviewees, ratings, pretrusted=[staff.pk])
+    stored = dict(UserProfile.objects.filter(user_id__in=user_ids.tolist()).values_list('user_id', 'trust_score'))
+    for user_id, score in zip(user_ids.tolist(), scores.tolist()):
+        assert stored[user_id] == pytest.approx(score, abs=2e-3)
+    item = TradeItem.objects.get(pk=item.pk)
+    assert item.owner_trust_score == stored[users[3].pk]
+    assert item.version == item_version
+
+    # a settled graph writes nothing
+    assert trust.refresh()['updated'] == 0
@@ -0,0 +1,60 @@
+import math
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from rest_framework.test import APIClient
+from core_api import viewcounts
+from core_api.models import TradeItem
+
+
+@pytest.fixture
+def items(db, settings):
+    settings.TRENDING = {**settings.TRENDING, 'FLUSH_INTERVAL': 3600, 'FLUSH_MAX_ITEMS': 1000}
+    settings.SINGLE_FLIGHT = {**settings.SINGLE_FLIGHT, 'ENABLED': False}
+    viewcounts._take()
+    cache.clear()
+    owner = User.objects.create_user(username='owner', password='pass')
+    return [
+        TradeItem.objects.create(title=f'Figure {i}', description='desc', interests='x', owner=owner)
+        for i in range(3)
+    ]
+
+
+@pytest.mark.django_db
+def test_views_are_buffered_then_flushed_in_one_update(items, django_assert_num_queries):
+    client = APIClient()
+    for _ in range(3):
+        client.get(f'/api/items/{items[0].id}/')
+    client.get(f'/api/items/{items[1].id}/')
+    assert TradeItem.objects.get(pk=items[0].pk).view_count == 0
+
+    # row locks, then the batched UPDATE, inside a savepoint
+    with django_assert_num_queries(4):
+        assert viewcounts.flush() == 2
+    first, second = TradeItem.objects.get(pk=items[0].pk), TradeItem.objects.get(pk=items[1].pk)
+    assert (first.view_count, second.view_count) == (3, 1)
+    assert first.trending_score == pytest.approx(second.trending_score + math.log2(3), abs=1e-3)
+    assert viewcounts.flush() == 0
+
+
+@pytest.mark.django_db
+def test_recent_views_outrank_old_ones(items, settings):
+    day = settings.TRENDING['HALF_LIFE']
+    start = settings.TRENDING['EPOCH'] + 1000 * day
+    # 0: 3 views two days ago and 1 today; 1: 2 views today; 2: never viewed
+    for _ in range(3):
+        viewcounts.record(items[0].pk)
+    viewcounts.flush(now=start)
+    for _ in range(2):
+        viewcounts.record(items[1].pk)
+    viewcounts.flush(now=start + 2 * day)
+    # a later view adds to the earlier ones in log space
+    viewcounts.record(items[0].pk)
+    viewcounts.flush(now=start + 2 * day)
+    score = TradeItem.objects.get(pk=items[0].pk).trending_score
+    # 3 views two half-lives old weigh 3/4 of one view today
+    assert 2 ** (score - viewcounts.decayed_weight(1, start + 2 * day)) == pytest.approx(1.75)
+
+    response = APIClient().get('/api/items/trending/')
+    assert [row['id'] for row in response.data] == [items[1].id, items[0].id, items[2].id]
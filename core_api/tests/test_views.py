@@ -82,4 +82,42 @@ def test_tradeitem_filtering_and_search():
     response = client.get('/api/items/?search=Rare')
     assert response.status_code == 200
     assert len(response.data['results']) == 1
-    assert response.data['results'][0]['title'] == 'One Piece Figure'
\ No newline at end of file
+    assert response.data['results'][0]['title'] == 'One Piece Figure'
+
+
+@pytest.mark.django_db
+def test_userprofile_genre_filters_normalize_spellings():
+    client = APIClient()
+    fan = User.objects.create_user(username='fan', password='pass')
+    client.force_authenticate(user=fan)
+    response = client.patch('/api/profile/', {'favorite_genres': ['Sci Fi', 'Mecha', 'SciFi']}, format='json')
+    assert response.status_code == 200
+    assert response.data['favorite_genres'] == ['sci-fi', 'mecha']
+    response = client.patch('/api/profile/', {'favorite_genres': ['Sci Fi', '日常系', 'Mecha']}, format='json')
+    assert response.data['favorite_genres'] == ['sci-fi', '日常系', 'mecha']
+    response = client.patch('/api/profile/', {'favorite_genres': ['!!!']}, format='json')
+    assert response.status_code == 400
+
+    other = User.objects.create_user(username='other', password='pass').userprofile
+    other.favorite_genres = ['mecha', 'slice-of-life']
+    other.save()
+
+    response = client.get('/api/profiles/?genres=Mecha,science fiction')
+    assert [p['user']['username'] for p in response.data['results']] == ['fan']
+    response = client.get('/api/profiles/?genres_any=mecha')
+    assert {p['user']['username'] for p in response.data['results']} == {'fan', 'other'}
+
+
+def test_openapi_schema_file_view(settings, tmp_path, rf):
+    from django.http import Http404
+    from core_api.views import OpenAPISchemaFileView
+    settings.OPENAPI_SCHEMA_FILE = str(tmp_path / 'schema.yml')
+    OpenAPISchemaFileView.content = None
+    with pytest.raises(Http404):
+        OpenAPISchemaFileView.as_view()(rf.get('/api/schema/'))
+
+    (tmp_path / 'schema.yml').write_text('openapi: 3.0.3\n')
+    response = OpenAPISchemaFileView.as_view()(rf.get('/api/schema/'))
+    assert response.content == b'openapi: 3.0.3\n'
+    assert response['Content-Type'] == 'application/vnd.oai.openapi'
+    OpenAPISchemaFileView.content = None
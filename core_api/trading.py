@@ -0,0 +1,149 @@
+"""
+TradeOffer state transitions.
+
+    pending -> accepted -> completed | cancelled
+            -> declined | cancelled
+            -> countered (a new pending offer in the other direction)
+
+Accepting flips both items to 'pending' and completing flips them to
+'traded'. Transitions that touch items lock both items in primary key
+order before the offer, so concurrent acceptances serialize on the items.
+The loser sees an item that is no longer available and gets a 409, and an
+item is never traded twice. Decline and counter lock only the offer.
+Keeping items ahead of offers everywhere is what keeps the sibling offers
+update in accept() from deadlocking.
+"""
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, PermissionDenied, ValidationError
+
+from .models import TradeItem, TradeOffer
+
+
+class OfferConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'The offer or one of its items changed, reload and try again.'
+    default_code = 'conflict'
+
+
+def _lock(offer_id):
+    """
+    Locks the offer's items in pk order, then the offer; returns (offer, items by pk).
+    """
+    # an offer's items never change, so they can be read before locking it
+    item_ids = TradeOffer.objects.values_list('offered_item_id', 'requested_item_id').get(pk=offer_id)
+    items = TradeItem.objects.select_for_update().filter(pk__in=item_ids).order_by('pk')
+    items = {item.pk: item for item in items}
+    offer = TradeOffer.objects.select_for_update().get(pk=offer_id)
+    return offer, items
+
+
+def _require(offer, state, user, party):
+    if getattr(offer, f'{party}_id') != user.pk:
+        raise PermissionDenied(f"Only the offer's {party} can do that.")
+    if offer.status not in state:
+        raise OfferConflict(f"The offer is {offer.status}.")
+
+
+def _set_status(offer, status_value):
+    offer.status = status_value
+    offer.save(update_fields=['status', 'updated_at'])
+
+
+def _set_item_status(items, status_value):
+    for item in items:
+        item.status = status_value
+        item.save(update_fields=['status', 'updated_at'])
+
+
+def validate_offer(sender, offered_item, requested_item):
+    if offered_item.owner_id != sender.pk:
+        raise ValidationError({'offered_item_id': "You can only offer your own items."})
+    if requested_item.owner_id == sender.pk:
+        raise ValidationError({'requested_item_id': "You can't request your own item."})
+    for field, item in (('offered_item_id', offered_item), ('requested_item_id', requested_item)):
+        if item.status != 'available':
+            raise ValidationError({field: "This item is not available for trade."})
+
+
+def create_offer(sender, offered_item, requested_item, message='', parent=None):
+    validate_offer(sender, offered_item, requested_item)
+    return TradeOffer.objects.create(
+        sender=sender, recipient_id=requested_item.owner_id,
+        offered_item=offered_item, requested_item=requested_item,
+        message=message, parent=parent,
+    )
+
+
+@transaction.atomic
+def accept(offer_id, user):
+    offer, items = _lock(offer_id)
+    _require(offer, {TradeOffer.PENDING}, user, 'recipient')
+    offered, requested = items.get(offer.offered_item_id), items.get(offer.requested_item_id)
+    if offered is None or requested is None:
+        raise OfferConflict("One of the items no longer exists.")
+    if offered.owner_id != offer.sender_id or requested.owner_id != offer.recipient_id:
+        raise OfferConflict("One of the items changed owner.")
+    if offered.status != 'available' or requested.status != 'available':
+        raise OfferConflict("One of the items is no longer available.")
+
+    _set_item_status([offered, requested], 'pending')
+    _set_status(offer, TradeOffer.ACCEPTED)
+    # other open offers on these items can't go through anymore
+    item_ids = list(items)
+    TradeOffer.objects.filter(
+        Q(offered_item_id__in=item_ids) | Q(requested_item_id__in=item_ids), status=TradeOffer.PENDING
+    ).update(status=TradeOffer.DECLINED, updated_at=timezone.now())
+    return offer
+
+
+def _require_party(offer, state, user):
+    if user.pk not in (offer.sender_id, offer.recipient_id):
+        raise PermissionDenied("Only the parties of the offer can do that.")
+    if offer.status not in state:
+        raise OfferConflict(f"The offer is {offer.status}.")
+
+
+@transaction.atomic
+def complete(offer_id, user):
+    offer, items = _lock(offer_id)
+    _require_party(offer, {TradeOffer.ACCEPTED}, user)
+    _set_item_status(items.values(), 'traded')
+    _set_status(offer, TradeOffer.COMPLETED)
+    return offer
+
+
+@transaction.atomic
+def decline(offer_id, user):
+    offer = TradeOffer.objects.select_for_update().get(pk=offer_id)
+    _require(offer, {TradeOffer.PENDING}, user, 'recipient')
+    _set_status(offer, TradeOffer.DECLINED)
+    return offer
+
+
+@transaction.atomic
+def cancel(offer_id, user):
+    offer, items = _lock(offer_id)
+    if offer.status == TradeOffer.ACCEPTED:
+        # either side can back out of an agreed trade; release the items
+        _require_party(offer, {TradeOffer.ACCEPTED}, user)
+        _set_item_status([item for item in items.values() if item.status == 'pending'], 'available')
+    else:
+        _require(offer, {TradeOffer.PENDING}, user, 'sender')
+    _set_status(offer, TradeOffer.CANCELLED)
+    return offer
+
+
+@transaction.atomic
+def counter(offer_id, user, offered_item, requested_item, message=''):
+    """
+    Recipient answers with different items; the counter goes back to the sender.
+    """
+    offer = TradeOffer.objects.select_for_update().get(pk=offer_id)
+    _require(offer, {TradeOffer.PENDING}, user, 'recipient')
+    if requested_item.owner_id != offer.sender_id:
+        raise ValidationError({'requested_item_id': "A counter offer must request one of the sender's items."})
+    _set_status(offer, TradeOffer.COUNTERED)
+    return create_offer(user, offered_item, requested_item, message=message, parent=offer)
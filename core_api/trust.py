@@ -0,0 +1,336 @@
+"""
+Reputation from the review graph, EigenTrust style.
+
+Every review is an edge reviewer -> reviewee weighted by its rating (1 star
+counts as no trust, 5 stars as full trust). Each reviewer's outgoing weights
+are normalized, and trust is the stationary vector of
+
+    t = (1 - d) * C^T t + d * p
+
+where p is spread over pre-trusted users (staff accounts in the graph), or
+uniform when there are none. Reviewers that trust nobody hand their share
+to p. A ring of accounts praising each other only earns what trusted users
+pass into it, whereas the plain average rating would rank it top.
+
+Scores are scaled so the average user in the graph has 1.0. They are
+stored on UserProfile.trust_score and mirrored onto items as
+owner_trust_score; changes below TRUST['WRITE_THRESHOLD'] aren't written.
+compute_trust_scores does full runs. Review changes record their weight
+change as a TrustDelta and enqueue a debounced incremental refresh, which
+pushes the residuals those changes cause through the graph from the stored
+scores, loading only the reviews of users the push reaches. Shifts it
+leaves out (uniform teleport mass, the number of users in the graph) are
+settled by the next full run.
+"""
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+
+from . import feed, jobs
+from .models import Review, TradeItem, TrustDelta, UserProfile
+
+# pg_advisory_xact_lock key, one refresh writes scores at a time
+REFRESH_LOCK = 0x7472757374
+
+
+def weight(rating):
+    return (rating - 1) / 4.0
+
+
+def edge(review):
+    """
+    (reviewer_id, reviewee_id, weight) of a review.
+    """
+    return review.reviewer_id, review.reviewee_id, weight(review.rating)
+
+
+def record_change(old, new):
+    """
+    Stores the weight change between two edges (either may be None) for the
+    next incremental refresh. Returns whether anything changed.
+    """
+    changes = defaultdict(float)
+    for sign, changed in ((-1, old), (1, new)):
+        if changed is not None:
+            reviewer_id, reviewee_id, edge_weight = changed
+            changes[reviewer_id, reviewee_id] += sign * edge_weight
+    deltas = [
+        TrustDelta(reviewer_id=reviewer_id, reviewee_id=reviewee_id, weight=delta)
+        for (reviewer_id, reviewee_id), delta in changes.items() if delta
+    ]
+    TrustDelta.objects.bulk_create(deltas)
+    return bool(deltas)
+
+
+def compute_trust(reviewers, reviewees, ratings, pretrusted=(), previous=None, damping=0.15,
+                  tolerance=1e-8, max_iterations=100):
+    """
+    Returns (user_ids, scores, iterations) for the edge arrays. `previous`
+    maps user id -> earlier score and seeds the iteration.
+    """
+    import numpy as np
+    from scipy import sparse
+
+    reviewers = np.asarray(reviewers, dtype=np.int64)
+    reviewees = np.asarray(reviewees, dtype=np.int64)
+    user_ids = np.unique(np.concatenate([reviewers, reviewees]))
+    n = len(user_ids)
+    if n == 0:
+        return user_ids, np.zeros(0), 0
+
+    weights = weight(np.asarray(ratings, dtype=np.float64))
+    keep = weights > 0
+    rows = np.searchsorted(user_ids, reviewers[keep])
+    cols = np.searchsorted(user_ids, reviewees[keep])
+    local = sparse.csr_matrix((weights[keep], (rows, cols)), shape=(n, n))
+
+    out_weight = np.asarray(local.sum(axis=1)).ravel()
+    dangling = out_weight == 0
+    inverse = np.divide(1.0, out_weight, out=np.zeros(n), where=~dangling)
+    # transposed once, so each step is a single CSR mat-vec
+    transition = (sparse.diags(inverse) @ local).T.tocsr()
+
+    teleport = np.isin(user_ids, np.asarray(list(pretrusted), dtype=np.int64)).astype(np.float64)
+    if not teleport.any():
+        teleport[:] = 1.0
+    teleport /= teleport.sum()
+    if previous:
+        trust = np.array([previous.get(int(user_id), 0.0) for user_id in user_ids], dtype=np.float64)
+        total = trust.sum()
+        trust = trust / total if total > 0 else teleport.copy()
+    else:
+        trust = teleport.copy()
+
+    iterations = 0
+    for iterations in range(1, max_iterations + 1):
+        spread = transition @ trust + trust[dangling].sum() * teleport
+        updated = (1.0 - damping) * spread + damping * teleport
+        delta = np.abs(updated - trust).sum()
+        trust = updated
+        if delta < tolerance:
+            break
+    return user_ids, trust * n, iterations
+
+
+def load_reviews():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT reviewer_id, reviewee_id, rating FROM {Review._meta.db_table}'
+        )
+        rows = cursor.fetchall()
+    if not rows:
+        return [], [], []
+    return tuple(zip(*rows))
+
+
+def store_scores(user_ids, scores, complete=True):
+    """
+    Writes profile scores that moved by at least TRUST['WRITE_THRESHOLD']
+    and mirrors them onto the owners' items. With `complete`, users missing
+    from `user_ids` are reset to 0. Profile versions are bumped, the score is
+    in the profile payload; item versions aren't, owner_trust_score isn't in
+    the item detail. Returns the number of profiles updated.
+    """
+    profile_table = UserProfile._meta.db_table
+    item_table = TradeItem._meta.db_table
+    threshold = settings.TRUST['WRITE_THRESHOLD']
+    user_ids = [int(user_id) for user_id in user_ids]
+    scores = [round(float(score), 6) for score in scores]
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                f'UPDATE {profile_table} AS p SET trust_score = v.score, version = p.version + 1 '
+                f'FROM (SELECT unnest(%s::bigint[]) AS user_id, unnest(%s::double precision[]) AS score) AS v '
+                f'WHERE p.user_id = v.user_id AND ABS(p.trust_score - v.score) >= %s RETURNING p.user_id',
+                [user_ids, scores, threshold],
+            )
+            changed = [user_id for user_id, in cursor.fetchall()]
+            if complete:
+                cursor.execute(
+                    f'UPDATE {profile_table} SET trust_score = 0, version = version + 1 '
+                    f'WHERE trust_score <> 0 AND NOT (user_id = ANY(%s::bigint[])) RETURNING user_id',
+                    [user_ids],
+                )
+                changed += [user_id for user_id, in cursor.fetchall()]
+            cursor.execute(
+                f'UPDATE {item_table} AS t SET owner_trust_score = p.trust_score FROM {profile_table} AS p '
+                f'WHERE p.user_id = t.owner_id AND t.owner_id = ANY(%s::bigint[]) '
+                f'AND t.owner_trust_score IS DISTINCT FROM p.trust_score',
+                [changed],
+            )
+        else:
+            by_user = dict(zip(user_ids, scores))
+            profiles = UserProfile.objects.only('id', 'user_id', 'trust_score', 'version')
+            if not complete:
+                profiles = profiles.filter(user_id__in=user_ids)
+            changed = []
+            for profile in profiles:
+                score = by_user.get(profile.user_id)
+                if score is None:
+                    score, stale = 0.0, profile.trust_score != 0
+                else:
+                    stale = abs(profile.trust_score - score) >= threshold
+                if stale:
+                    profile.trust_score = score
+                    profile.version += 1
+                    changed.append(profile)
+            UserProfile.objects.bulk_update(changed, ['trust_score', 'version'], batch_size=1000)
+            for profile in changed:
+                TradeItem.objects.filter(owner_id=profile.user_id).update(owner_trust_score=profile.trust_score)
+        updated = len(changed)
+        if updated:
+            transaction.on_commit(feed.mark_stale)
+    return updated
+
+
+def _lock():
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s)', [REFRESH_LOCK])
+
+
+def refresh(incremental=False):
+    """
+    Recomputes the scores, or with `incremental` folds the queued review
+    changes into the stored ones (a full run when nothing is stored yet).
+    Returns a stats dict.
+    """
+    with transaction.atomic():
+        _lock()
+        if incremental and UserProfile.objects.filter(trust_score__gt=0).exists():
+            return _refresh_incremental()
+        return _refresh_full()
+
+
+def _refresh_full():
+    options = settings.TRUST
+    started = time.perf_counter()
+    # taken before the reviews are read, so each change is in this run or a
+    # later one (rarely both, which the next full run settles)
+    TrustDelta.objects.all().delete()
+    reviewers, reviewees, ratings = load_reviews()
+    loaded = time.perf_counter()
+
+    pretrusted = User.objects.filter(is_staff=True, is_active=True).values_list('pk', flat=True)
+    user_ids, scores, iterations = compute_trust(
+        reviewers, reviewees, ratings, pretrusted=list(pretrusted), damping=options['DAMPING'],
+        tolerance=options['TOLERANCE'], max_iterations=options['MAX_ITERATIONS'],
+    )
+    computed = time.perf_counter()
+    updated = store_scores(user_ids, scores)
+    return {
+        'reviews': len(reviewers), 'users': len(user_ids), 'iterations': iterations, 'updated': updated,
+        'load_seconds': loaded - started, 'compute_seconds': computed - loaded,
+        'store_seconds': time.perf_counter() - computed,
+    }
+
+
+def _out_edges(user_ids):
+    """
+    {reviewer_id: {reviewee_id: weight}} for the given reviewers.
+    """
+    edges = {user_id: {} for user_id in user_ids}
+    rows = Review.objects.filter(reviewer_id__in=user_ids).order_by().values_list(
+        'reviewer_id', 'reviewee_id', 'rating'
+    )
+    for reviewer_id, reviewee_id, rating in rows:
+        if rating > 1:
+            edges[reviewer_id][reviewee_id] = weight(rating)
+    return edges
+
+
+def _load_scores(scores, user_ids):
+    missing = [user_id for user_id in user_ids if user_id not in scores]
+    if missing:
+        scores.update({user_id: 0.0 for user_id in missing})
+        scores.update(UserProfile.objects.filter(user_id__in=missing).values_list('user_id', 'trust_score'))
+
+
+def _refresh_incremental():
+    """
+    Gauss-Southwell push: a changed reviewer's old and new outgoing shares
+    differ, which leaves a residual on the users either set reaches. Each
+    round adds the residuals above INCREMENTAL_TOLERANCE to the scores and
+    passes (1 - d) of them on along the receivers' own reviews.
+    """
+    options = settings.TRUST
+    started = time.perf_counter()
+    deltas = list(TrustDelta.objects.values_list('pk', 'reviewer_id', 'reviewee_id', 'weight'))
+    TrustDelta.objects.filter(pk__in=[pk for pk, *_ in deltas]).delete()
+    changes = defaultdict(lambda: defaultdict(float))
+    for _, reviewer_id, reviewee_id, delta in deltas:
+        changes[reviewer_id][reviewee_id] += delta
+
+    edges = _out_edges(changes)
+    scores = {}
+    _load_scores(scores, set(changes).union(*changes.values()))
+    stored = dict(scores)
+    pretrusted = list(
+        UserProfile.objects.filter(user__is_staff=True, user__is_active=True, trust_score__gt=0)
+        .values_list('user_id', flat=True)
+    )
+    loaded = time.perf_counter()
+
+    share = 1.0 - options['DAMPING']
+    residual = defaultdict(float)
+
+    def spread(out_edges, amount):
+        total = sum(out_edges.values())
+        if total:
+            for target, edge_weight in out_edges.items():
+                residual[target] += amount * edge_weight / total
+        else:
+            # dangling; with uniform teleport the share goes to everyone, left to full runs
+            for target in pretrusted:
+                residual[target] += amount / len(pretrusted)
+
+    joined = set()
+    for reviewer_id, changed in changes.items():
+        new = edges[reviewer_id]
+        old = {reviewee_id: new.get(reviewee_id, 0.0) - changed.get(reviewee_id, 0.0)
+               for reviewee_id in new.keys() | changed.keys()}
+        old = {reviewee_id: edge_weight for reviewee_id, edge_weight in old.items() if edge_weight > 1e-9}
+        spread(new, share * scores[reviewer_id])
+        spread(old, -share * scores[reviewer_id])
+        if not pretrusted:
+            joined.update(
+                user_id for user_id in (reviewer_id, *(e for e, delta in changed.items() if delta > 0))
+                if not stored[user_id]
+            )
+    # users joining the graph get the uniform teleport share
+    for user_id in joined:
+        residual[user_id] += options['DAMPING']
+
+    rounds = 0
+    while rounds < options['INCREMENTAL_ITERATIONS']:
+        frontier = {
+            user_id: amount for user_id, amount in residual.items()
+            if abs(amount) >= options['INCREMENTAL_TOLERANCE']
+        }
+        if not frontier:
+            break
+        rounds += 1
+        _load_scores(scores, frontier)
+        edges.update(_out_edges(frontier.keys() - edges.keys()))
+        for user_id, amount in frontier.items():
+            residual[user_id] -= amount
+            scores[user_id] += amount
+            spread(edges[user_id], share * amount)
+    computed = time.perf_counter()
+
+    user_ids = list(scores)
+    updated = store_scores(user_ids, [max(scores[user_id], 0.0) for user_id in user_ids], complete=False)
+    return {
+        'reviews': len(deltas), 'users': len(scores), 'iterations': rounds, 'updated': updated,
+        'load_seconds': loaded - started, 'compute_seconds': computed - loaded,
+        'store_seconds': time.perf_counter() - computed,
+    }
+
+
+# queued even with JOBS_EAGER, otherwise every review would run a refresh
+@jobs.job('trust.refresh', eager=False)
+def refresh_job():
+    refresh(incremental=True)
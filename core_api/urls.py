@@ -7,6 +7,7 @@ from . import views
 router = DefaultRouter()
 router.register(r'items', views.TradeItemViewSet, basename='tradeitem')
 router.register(r'reviews', views.ReviewViewSet, basename='review')
+router.register(r'offers', views.TradeOfferViewSet, basename='tradeoffer')
 
 urlpatterns = [
     # Include router URLs
@@ -25,6 +26,14 @@ urlpatterns = [
 
     # Wishlist endpoints
     path('wishlist/', views.WishListView.as_view(), name='wishlist'),
+    path('wishlist/events/', views.WishlistEventsView.as_view(), name='wishlist_events'),
     path('wishlist/<int:pk>/add/', views.AddToWishlistView.as_view(), name='add_to_wishlist'),
     path('wishlist/<int:pk>/remove/', views.RemoveFromWishlistView.as_view(), name='remove_from_wishlist'),
+
+    # Internal service-to-service batch endpoints
+    path('internal/items/', views.InternalItemBatchView.as_view(), name='internal_items'),
+    path('internal/profiles/', views.InternalProfileBatchView.as_view(), name='internal_profiles'),
+
+    # Recommendations
+    path('recommendations/', views.RecommendationListView.as_view(), name='recommendations'),
 ]
\ No newline at end of file
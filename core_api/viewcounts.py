@@ -0,0 +1,102 @@
+"""
+Buffered item view counters and the trending score.
+
+TradeItemViewSet.retrieve only bumps an in-process Counter. Every
+TRENDING['FLUSH_INTERVAL'] seconds (or FLUSH_MAX_ITEMS distinct items),
+the request that notices folds the buffer into the table with one UPDATE.
+So a hot item costs one row write per worker per interval, not one per read.
+
+trending_score uses forward decay: a view at time t weighs
+2 ** ((t - EPOCH) / HALF_LIFE), so older views never need rewriting. Newer
+ones simply weigh more. The column stores log2 of the summed weights, which
+keeps it finite, and a flush adds in log space. 0 means never viewed.
+/api/items/trending/ reads the top of it through the (-trending_score)
+index.
+
+Counts buffered in a worker that dies before flushing are lost, which is
+acceptable for a popularity signal.
+"""
+import logging
+import math
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import TradeItem
+
+logger = logging.getLogger(__name__)
+
+_buffer = Counter()
+_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def record(item_id):
+    """
+    Counts one view; flushes the buffer when it's due.
+    """
+    global _last_flush
+    options = settings.TRENDING
+    with _lock:
+        _buffer[item_id] += 1
+        now = time.monotonic()
+        due = now - _last_flush >= options['FLUSH_INTERVAL'] or len(_buffer) >= options['FLUSH_MAX_ITEMS']
+        if due:
+            _last_flush = now
+    if due:
+        try:
+            flush()
+        except Exception:
+            # the counts went back into the buffer, a read shouldn't fail over them
+            logger.exception("Flushing item view counts failed")
+
+
+def _take():
+    global _buffer
+    with _lock:
+        counts, _buffer = _buffer, Counter()
+    return counts
+
+
+def _restore(counts):
+    with _lock:
+        _buffer.update(counts)
+
+
+def decayed_weight(count, timestamp):
+    """
+    log2 of `count` views at `timestamp` under forward decay.
+    """
+    options = settings.TRENDING
+    return math.log2(count) + (timestamp - options['EPOCH']) / options['HALF_LIFE']
+
+
+def flush(now=None):
+    """
+    Writes the buffered counts; returns the number of items updated.
+    """
+    counts = _take()
+    if not counts:
+        return 0
+    now = time.time() if now is None else now
+    item_ids = sorted(counts)
+    table = TradeItem._meta.db_table
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            # lock in id order so concurrent flushes from other workers can't deadlock
+            cursor.execute(f'SELECT id FROM {table} WHERE id = ANY(%s) ORDER BY id FOR UPDATE', [item_ids])
+            cursor.execute(
+                f'UPDATE {table} AS t SET view_count = t.view_count + v.n, trending_score = CASE '
+                f'WHEN t.trending_score = 0 THEN v.w '
+                f'ELSE GREATEST(t.trending_score, v.w) + LN(1 + POWER(2, -ABS(t.trending_score - v.w))) / LN(2) END '
+                f'FROM (SELECT unnest(%s::bigint[]) AS id, unnest(%s::bigint[]) AS n, '
+                f'unnest(%s::double precision[]) AS w) AS v WHERE t.id = v.id',
+                [item_ids, [counts[i] for i in item_ids], [decayed_weight(counts[i], now) for i in item_ids]],
+            )
+            return cursor.rowcount
+    except Exception:
+        _restore(counts)
+        raise
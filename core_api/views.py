@@ -1,3 +1,8 @@
+import mimetypes
+import posixpath
+from abc import ABC, abstractmethod
+from urllib.parse import quote
+
 from django.shortcuts import render
 
 # Create your views here.
@@ -5,25 +10,44 @@ from rest_framework import generics, permissions
 from .serializers import UserRegistrationSerializer
 from django.contrib.auth.models import User
 from django.contrib.auth.models import User
-from django.db.models import Avg
+from django.db.models import Avg, Q
 from django.shortcuts import get_object_or_404
-from rest_framework import viewsets, generics, status, filters
+from rest_framework import viewsets, generics, status, filters, serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
 from rest_framework.views import APIView
+from rest_framework.exceptions import ValidationError
 from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
 
-from .models import TradeItem, UserProfile, Review, Wishlist
+from .models import TradeItem, UserProfile, Review, Wishlist, TradeMatch, TradeOffer, ImageHash
 from .serializers import (
     TradeItemSerializer, TradeItemListSerializer, TradeItemDetailSerializer,
-    UserProfileSerializer, ReviewSerializer, UserRegistrationSerializer
+    UserProfileSerializer, ReviewSerializer, UserRegistrationSerializer,
+    TradeMatchSerializer, TradeOfferSerializer, SimilarItemSerializer
+)
+from .permissions import IsOwnerOrReadOnly, IsOwnerOnly, CanReviewUser, IsInternalService
+from .authentication import InternalServiceAuthentication
+from .filters import TradeItemFilter, UserProfileFilter
+from .renderers import EventStreamRenderer, ORJSONRenderer
+from .fieldsets import SparseFieldsetViewMixin
+from .feed import LandingFeedMixin
+from .pages import ItemPageLoader
+from .singleflight import SingleFlightViewMixin
+from .concurrency import VersionedViewMixin
+from .storage import is_hashed_name
+from .fastpath import (
+    FastListMixin, TradeItemListRowSerializer, ReviewRowSerializer, UserProfileRowSerializer
 )
-from .permissions import IsOwnerOrReadOnly, IsOwnerOnly, CanReviewUser
-from .filters import TradeItemFilter
+from . import events, imagehash, recommendations, trading, viewcounts
 from rest_framework.pagination import CursorPagination
 
-from django.http import JsonResponse
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views import View
 
 def health_check(request):
     """
@@ -33,6 +57,11 @@ def health_check(request):
 
 
 
+def item_id_field():
+    # bigint range; str.isdigit() lets through '²', which int() rejects
+    return serializers.IntegerField(min_value=1, max_value=2 ** 63 - 1)
+
+
 class CustomCursorPagination(CursorPagination):
     page_size = 10
     ordering = '-created_at'  # Use your actual field name
@@ -47,7 +76,8 @@ class UserRegistrationView(generics.CreateAPIView):
     serializer_class = UserRegistrationSerializer
     permission_classes = [permissions.AllowAny]  # Allow any user to register
 
-class TradeItemViewSet(viewsets.ModelViewSet):
+class TradeItemViewSet(LandingFeedMixin, SingleFlightViewMixin, FastListMixin, VersionedViewMixin,
+                       SparseFieldsetViewMixin, viewsets.ModelViewSet):
     queryset = TradeItem.objects.all()
     permission_classes = [IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -55,24 +85,117 @@ class TradeItemViewSet(viewsets.ModelViewSet):
     search_fields = ['title', 'description', 'interests']
     ordering_fields = ['created_at', 'title']
     pagination_class = CustomCursorPagination
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
+    fast_serializer_class = TradeItemListRowSerializer
 
     def get_serializer_class(self):
-        if self.action == 'list':
+        if self.action in ('list', 'trending'):
             return TradeItemListSerializer
         elif self.action == 'retrieve':
             return TradeItemDetailSerializer
+        elif self.action == 'matches':
+            return TradeMatchSerializer
+        elif self.action == 'similar':
+            return SimilarItemSerializer
         return TradeItemSerializer
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
-class UserProfileListView(generics.ListAPIView):
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        if response.status_code == 200:
+            # buffered, see core_api/viewcounts.py
+            viewcounts.record(int(kwargs[self.lookup_url_kwarg or self.lookup_field]))
+        return response
+
+    @action(detail=False, methods=['get'])
+    def trending(self, request):
+        """
+        The TRENDING['LIMIT'] most viewed items by decayed score, as one
+        list without a cursor: scores move between requests, so a cursor
+        over them would skip or repeat items. Takes the list filters.
+        """
+        queryset = self.filter_queryset(self.get_queryset()).order_by(
+            '-trending_score', '-id'
+        )[:settings.TRENDING['LIMIT']]
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['get'])
+    def matches(self, request, pk=None):
+        """
+        Items whose owners want what this item has, and have what it wants.
+        Read from the precomputed TradeMatch table, best score first.
+        """
+        item = get_object_or_404(TradeItem.objects.only('id'), pk=pk)
+        matches = (
+            TradeMatch.objects.filter(item=item)
+            .select_related('matched_item')
+            .order_by('-score')[:settings.TRADE_MATCH_LIMIT]
+        )
+        serializer = self.get_serializer(matches, many=True)
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['get'])
+    def page(self, request, pk=None):
+        """
+        Item, owner profile, owner rating summary and wishlist state in
+        one response (see core_api/pages.py).
+        """
+        try:
+            pk = item_id_field().run_validation(pk)
+        except ValidationError:
+            raise Http404
+        pages = ItemPageLoader(request).pages([pk])
+        if not pages:
+            raise Http404
+        return Response(pages[0])
+
+    @action(detail=False, methods=['get'])
+    def pages(self, request):
+        """
+        Item pages for `?ids=1,2,3`, with owners shared between items
+        loaded once. Unknown ids are listed under `missing`.
+        """
+        raw = [value.strip() for value in request.query_params.get('ids', '').split(',') if value.strip()]
+        try:
+            ids = serializers.ListField(child=item_id_field(), allow_empty=False).run_validation(raw)
+        except ValidationError:
+            raise ValidationError({'ids': "A comma-separated list of item ids is required."})
+        ids = list(dict.fromkeys(ids))
+        if len(ids) > settings.ITEM_PAGE_MAX_BATCH:
+            raise ValidationError({'ids': f"At most {settings.ITEM_PAGE_MAX_BATCH} items per request."})
+        pages = ItemPageLoader(request).pages(ids)
+        found = {page['item']['id'] for page in pages}
+        return Response({'results': pages, 'missing': [item_id for item_id in ids if item_id not in found]})
+
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        """
+        Items with a near-identical image, closest first. Looked up through
+        the banded ImageHash index (see core_api/imagehash.py).
+        """
+        item = get_object_or_404(TradeItem.objects.only('id'), pk=pk)
+        stored = ImageHash.objects.filter(item=item).values_list('value', flat=True).first()
+        if stored is None:
+            return Response([])
+        options = settings.IMAGE_HASH
+        found = imagehash.near(stored, options['SIMILAR_DISTANCE'], exclude=item.pk)[:options['SIMILAR_LIMIT']]
+        items = TradeItem.objects.in_bulk([item_id for _, item_id in found])
+        results = [{'item': items[item_id], 'distance': d} for d, item_id in found if item_id in items]
+        return Response(self.get_serializer(results, many=True).data)
+
+class UserProfileListView(FastListMixin, SparseFieldsetViewMixin, generics.ListAPIView):
     """
     API endpoint to list all user profiles.
     """
     queryset = UserProfile.objects.all()
     serializer_class = UserProfileSerializer
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
+    fast_serializer_class = UserProfileRowSerializer
     filter_backends = [DjangoFilterBackend ,filters.SearchFilter]
+    filterset_class = UserProfileFilter
     search_fields = ['user__username', 'bio']
     pagination_class = CustomCursorPagination
     permission_classes = [IsAuthenticated]
@@ -92,7 +215,7 @@ class UserProfileDetailView(generics.RetrieveAPIView):
 
 
 
-class CurrentUserProfileView(generics.RetrieveUpdateAPIView):
+class CurrentUserProfileView(VersionedViewMixin, generics.RetrieveUpdateAPIView):
     """
     API endpoint to retrieve and update the current user's profile.
     """
@@ -100,16 +223,18 @@ class CurrentUserProfileView(generics.RetrieveUpdateAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_object(self):
-        return get_object_or_404(UserProfile, user=self.request.user)
+        return self.track_version(get_object_or_404(UserProfile, user=self.request.user))
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(FastListMixin, SparseFieldsetViewMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing reviews.
     Users can only create, update, and delete their own reviews.
     """
     queryset = Review.objects.all()
     serializer_class = ReviewSerializer
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
+    fast_serializer_class = ReviewRowSerializer
     permission_classes = [IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['reviewer', 'reviewee']
@@ -135,21 +260,67 @@ class ReviewViewSet(viewsets.ModelViewSet):
         reviews = Review.objects.filter(reviewee=user)
 
         avg_rating = reviews.aggregate(Avg('rating'))['rating__avg'] or 0
+        trust_score = UserProfile.objects.filter(user=user).values_list('trust_score', flat=True).first() or 0.0
 
         serializer = self.get_serializer(reviews, many=True)
         return Response({
             'average_rating': avg_rating,
+            'trust_score': trust_score,
             'reviews': serializer.data
         })
 
-class WishListView(generics.ListAPIView):
+class WishListView(SparseFieldsetViewMixin, generics.ListAPIView):
     serializer_class = TradeItemSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = CustomCursorPagination
 
     #a usual getter , gets the wishlist items for the current user
     def get_queryset(self):
         return TradeItem.objects.filter(wishlist__user=self.request.user)
 
+class WishlistEventsView(APIView):
+    """
+    Server-sent event stream of status changes for items in the current
+    user's wishlist. Only served by the ASGI application; clients reconnect
+    after changing their wishlist to pick up the new set of items.
+    """
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [EventStreamRenderer, JSONRenderer]
+
+    def get(self, request):
+        if not isinstance(request._request, ASGIRequest):
+            return Response(
+                {"detail": "Event stream is only available through the ASGI application."},
+                status=status.HTTP_501_NOT_IMPLEMENTED
+            )
+
+        item_ids = list(
+            Wishlist.objects.filter(user=request.user).values_list('item_id', flat=True)
+        )
+        response = StreamingHttpResponse(
+            events.wishlist_event_stream(item_ids),
+            content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+class RecommendationListView(APIView):
+    """
+    Items recommended for the current user from wishlist co-occurrence and
+    favorite genres. Rankings come precomputed and cached per user.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        ranked = recommendations.recommend(request.user)
+        items = TradeItem.objects.in_bulk([item_id for item_id, _ in ranked])
+        context = {'request': request}
+        return Response([
+            {'item': TradeItemListSerializer(items[item_id], context=context).data, 'score': score}
+            for item_id, score in ranked if item_id in items
+        ])
+
 class AddToWishlistView(APIView):
 
     permission_classes = [IsAuthenticated]
@@ -196,13 +367,230 @@ class RemoveFromWishlistView(APIView):
             )
 
 
-class TradeItemsByOwnerView(generics.ListAPIView):
+class TradeItemsByOwnerView(FastListMixin, SparseFieldsetViewMixin, generics.ListAPIView):
     """
     View for listing all trade items owned by a specific user.
+    Filters on the owner_username snapshot, so a page is one index scan;
+    the user is only looked up when the page comes back empty.
     """
     serializer_class = TradeItemListSerializer
+    pagination_class = CustomCursorPagination
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
+    fast_serializer_class = TradeItemListRowSerializer
 
     def get_queryset(self):
-        username = self.kwargs.get('username')
-        user = get_object_or_404(User, username=username)
-        return TradeItem.objects.filter(owner=user)
\ No newline at end of file
+        return TradeItem.objects.filter(owner_username=self.kwargs.get('username'))
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if not response.data['results'] and not User.objects.filter(username=self.kwargs.get('username')).exists():
+            raise Http404
+        return response
+
+
+class InternalBatchView(APIView, ABC):
+    """
+    Base for internal multi-get endpoints: shared-secret/mTLS auth, no
+    per-user throttling, ids from `?<param>=a,b,c` or a JSON body list.
+    Subclasses set `batch_param` and implement `fetch`.
+    """
+    authentication_classes = [InternalServiceAuthentication]
+    permission_classes = [IsInternalService]
+    throttle_classes = []
+    renderer_classes = [ORJSONRenderer]
+    batch_param = None
+
+    def get_key_field(self):
+        return serializers.CharField()
+
+    def get_keys(self, request):
+        if request.method == 'POST':
+            if not isinstance(request.data, dict):
+                raise ValidationError("Expected a JSON object.")
+            keys = request.data.get(self.batch_param, [])
+        else:
+            keys = [key for key in request.query_params.get(self.batch_param, '').split(',') if key]
+        try:
+            keys = serializers.ListField(child=self.get_key_field()).run_validation(keys)
+        except ValidationError as exc:
+            raise ValidationError({self.batch_param: exc.detail})
+        keys = list(dict.fromkeys(str(key).strip() for key in keys))
+        if not keys:
+            raise ValidationError({self.batch_param: "At least one value is required."})
+        if len(keys) > settings.INTERNAL_BATCH_MAX_SIZE:
+            raise ValidationError(
+                {self.batch_param: f"At most {settings.INTERNAL_BATCH_MAX_SIZE} values per request."}
+            )
+        return keys
+
+    @abstractmethod
+    def fetch(self, keys):
+        """
+        {key: serialized data} for the keys that exist.
+        """
+
+    def get(self, request):
+        keys = self.get_keys(request)
+        found = self.fetch(keys)
+        return Response({
+            'results': found,
+            'missing': [key for key in keys if key not in found],
+        })
+
+    def post(self, request):
+        return self.get(request)
+
+
+class InternalItemBatchView(InternalBatchView):
+    """
+    Items by id, serialized like /api/items/<id>/, in one query.
+    """
+    batch_param = 'ids'
+
+    def get_key_field(self):
+        return item_id_field()
+
+    def fetch(self, keys):
+        items = TradeItem.objects.select_related('owner').in_bulk([int(key) for key in keys])
+        context = {'request': self.request}
+        return {
+            str(pk): TradeItemDetailSerializer(item, context=context).data
+            for pk, item in items.items()
+        }
+
+
+class InternalProfileBatchView(InternalBatchView):
+    """
+    Profiles by username, serialized like /api/users/<username>/profile/.
+    """
+    batch_param = 'usernames'
+
+    def fetch(self, keys):
+        # one query instead of User.in_bulk + a profile lookup
+        profiles = UserProfile.objects.select_related('user').filter(user__username__in=keys)
+        context = {'request': self.request}
+        return {
+            profile.user.username: UserProfileSerializer(profile, context=context).data
+            for profile in profiles
+        }
+
+
+class TradeOfferViewSet(viewsets.GenericViewSet):
+    """
+    Trade offers between users. Create with POST /api/offers/, read the
+    inbox/outbox, and move offers along with the transition actions.
+    """
+    serializer_class = TradeOfferSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = CustomCursorPagination
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
+
+    def get_queryset(self):
+        user = self.request.user
+        return TradeOffer.objects.filter(Q(sender=user) | Q(recipient=user)).select_related(
+            'sender', 'recipient', 'offered_item', 'requested_item'
+        )
+
+    def create(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def retrieve(self, request, pk=None):
+        return Response(self.get_serializer(self.get_object()).data)
+
+    def _mailbox(self, request, **filters):
+        queryset = self.get_queryset().filter(**filters)
+        offer_status = request.query_params.get('status')
+        if offer_status:
+            queryset = queryset.filter(status=offer_status)
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+    @action(detail=False, methods=['get'])
+    def inbox(self, request):
+        return self._mailbox(request, recipient=request.user)
+
+    @action(detail=False, methods=['get'])
+    def outbox(self, request):
+        return self._mailbox(request, sender=request.user)
+
+    def _transition(self, transition, *args, **kwargs):
+        offer = self.get_object()
+        offer = transition(offer.pk, self.request.user, *args, **kwargs)
+        return Response(self.get_serializer(self.get_queryset().get(pk=offer.pk)).data)
+
+    @action(detail=True, methods=['post'])
+    def accept(self, request, pk=None):
+        return self._transition(trading.accept)
+
+    @action(detail=True, methods=['post'])
+    def decline(self, request, pk=None):
+        return self._transition(trading.decline)
+
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        return self._transition(trading.cancel)
+
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        return self._transition(trading.complete)
+
+    @action(detail=True, methods=['post'])
+    def counter(self, request, pk=None):
+        offer = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        counter_offer = trading.counter(
+            offer.pk, request.user, data['offered_item'], data['requested_item'], data.get('message', '')
+        )
+        serializer = self.get_serializer(self.get_queryset().get(pk=counter_offer.pk))
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class OpenAPISchemaFileView(View):
+    """
+    Serves the OpenAPI schema generated at build time (OPENAPI_SCHEMA_FILE),
+    read once per process.
+    """
+    content = None
+
+    def get(self, request):
+        cls = type(self)
+        if cls.content is None:
+            try:
+                with open(settings.OPENAPI_SCHEMA_FILE, 'rb') as schema:
+                    cls.content = schema.read()
+            except FileNotFoundError:
+                raise Http404("OpenAPI schema file has not been generated.")
+        return HttpResponse(cls.content, content_type='application/vnd.oai.openapi')
+
+
+class MediaView(View):
+    """
+    Media files. Outside development the web server sends the bytes
+    (MEDIA_SERVE_MODE), workers only check the name and set headers.
+    """
+
+    def get(self, request, name):
+        name = posixpath.normpath(name)
+        if name.startswith(('.', '/')):
+            raise Http404
+        mode = settings.MEDIA_SERVE_MODE
+        if mode == 'x-accel':
+            response = HttpResponse()
+            response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX + quote(name)
+        elif mode == 'x-sendfile':
+            response = HttpResponse()
+            response['X-Sendfile'] = default_storage.path(name)
+        else:
+            if not default_storage.exists(name):
+                raise Http404
+            response = FileResponse(default_storage.open(name))
+        content_type, _ = mimetypes.guess_type(name)
+        response['Content-Type'] = content_type or 'application/octet-stream'
+        if is_hashed_name(name):
+            response['Cache-Control'] = 'public, max-age=31536000, immutable'
+        return response